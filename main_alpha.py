@@ -1,25 +1,38 @@
+import argparse
 from dotenv import load_dotenv
 from pathlib import Path
-import pm4py
 from src.utils.paths import Paths
+from src.pm4py_pipeline.xes_cache import load_log
+from src.utils.profiling import profile_stage, rows_of
 
 
-def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Alpha Miner Petri-háló ábra egy XES logból.")
+    ap.add_argument("--xes", type=str, default=None,
+                    help="XES útvonal (alapértelmezés: data/xes/event_log_remaining_ALL.xes)")
+    return ap.parse_args(argv)
+
+
+def run(args: argparse.Namespace, load=load_log) -> None:
+    """Alpha Miner ábra a parser argumentumaival; load: XES → log (moodle-pm run: megosztott log)."""
     load_dotenv()
     p = Paths()
     p.ensure()
 
     # --- 1) XES beolvasása ---
-    xes_path = p.xes / "event_log_remaining_ALL.xes"
+    xes_path = Path(args.xes) if args.xes else (p.xes / "event_log_remaining_ALL.xes")
     if not xes_path.exists():
         raise SystemExit(f"Nincs XES fájl: {xes_path}\nElőbb futtasd: python main_pm4py.py")
 
+    import pm4py  # lusta import: csak a tényleges bányászathoz kell
+
     print(f"Beolvasás: {xes_path}")
-    log = pm4py.read_xes(str(xes_path))
+    log = load(xes_path)
 
     # --- 2) Alpha Miner modell építése ---
     print("Alpha Miner futtatása...")
-    net, im, fm = pm4py.discover_petri_net_alpha(log)
+    with profile_stage("alpha.discover", rows_in=rows_of(log)):
+        net, im, fm = pm4py.discover_petri_net_alpha(log)
 
     # --- 3) Ábrák mentése ---
     out_dir = p.figures / "alpha"
@@ -33,6 +46,10 @@ def main():
     print(f"Alpha Miner Petri-háló elmentve ide: {out_dir / 'alpha_miner_petri.png'}")
 
 
+def main():
+    run(parse_args())
+
+
 if __name__ == "__main__":
     main()
 
@@ -6,86 +6,73 @@ import argparse
 from pathlib import Path
 
 from dotenv import load_dotenv
-import pm4py
-from pm4py.algo.evaluation.replay_fitness import algorithm as replay_fitness
-from pm4py.algo.evaluation.precision import algorithm as precision_eval
-from pm4py.algo.evaluation.generalization import algorithm as generalization_eval
-from pm4py.algo.evaluation.simplicity import algorithm as simplicity_eval
 
 from src.utils.paths import Paths
+from src.pm4py_pipeline.xes_cache import load_log, log_stats
+from src.cache import ArtifactCache, package_version
+from src.pm4py_pipeline import xes_cache
+from src.pm4py_pipeline.config import ALIGN_TIMEOUT_S
+from src.utils.profiling import profile_stage, profiled, rows_of
 
+# the metric code (shared evaluator, alignments, XES reader) is part of the cache key
+EVAL_CODE = [Path(xes_cache.__file__).with_name(name) for name in ("metrics.py", "alignments.py", "xes_cache.py")]
+
+
+@profiled("alpha.metrics")
+def compute_metrics_for_log(xes_path: Path, align: dict | None = None, load=load_log) -> dict:
+    # pm4py is only loaded when the model is actually (re)computed: fast --help and cache hits
+    import pm4py
+    from pm4py.algo.evaluation.simplicity import algorithm as simplicity_eval
+    from src.pm4py_pipeline.metrics import compress_variants, replay_metrics, etc_precision
+    from src.pm4py_pipeline.alignments import alignment_metrics
 
-def compute_metrics_for_log(xes_path: Path) -> dict:
     if not xes_path.exists():
         raise FileNotFoundError(f"XES not found: {xes_path}")
 
     # 1) Log beolvasása
-    log = pm4py.read_xes(str(xes_path))
-    print(f"Log loaded: {len(log)} traces")
+    log = load(xes_path)
+    print(f"Log loaded: {log_stats(log)[0]} traces")
 
     # 2) Alpha Miner modell
-    net, im, fm = pm4py.discover_petri_net_alpha(log)
+    with profile_stage("alpha.discover", rows_in=rows_of(log)):
+        net, im, fm = pm4py.discover_petri_net_alpha(log)
     print(f"Petri net discovered: {len(net.places)} places, {len(net.transitions)} transitions")
 
+    # each trace variant is replayed once, results weighted by frequency
+    vlog = compress_variants(log)
+    print(f"Variants: {vlog.n_variants} / {vlog.n_traces} traces (compression {vlog.compression_ratio:.2f}x)")
+
     # =============================
-    # FITNESS - token based replay
+    # FITNESS + GENERALIZATION - one shared token replay
     # =============================
     try:
-        fitness_result = replay_fitness.apply(log, net, im, fm, variant=replay_fitness.Variants.TOKEN_BASED)
-        fitness = float(fitness_result['log_fitness'])
+        replay = replay_metrics(vlog, net, im, fm)
+        fitness = replay["log_fitness"]
+        generalization_score = replay["generalization"]
+        coverage = replay["activated_coverage"]
         print(f"Fitness calculated: {fitness}")
+        print(f"Generalization calculated: {generalization_score}")
     except Exception as e:
-        print(f"Fitness calculation failed: {e}")
-        fitness = 0.0
+        print(f"Token replay failed: {e}")
+        fitness, generalization_score, coverage = 0.0, 0.5, 0.0
 
     # =============================
     # PRECISION - alignments based (megbízhatóbb)
     # =============================
     try:
         # Először próbáljuk meg az alignments-t (ajánlott)
-        precision = float(precision_eval.apply(log, net, im, fm, variant=precision_eval.Variants.ALIGN_ETCONFORMANCE))
+        precision = etc_precision(vlog, net, im, fm, variant="align")
         print(f"Precision calculated: {precision}")
     except Exception as e:
         print(f"⚠️  Alignments precision failed: {e}")
         try:
             # Fallback: token based precision
-            precision = float(precision_eval.apply(log, net, im, fm, variant=precision_eval.Variants.ETCONFORMANCE_TOKEN))
+            precision = etc_precision(vlog, net, im, fm, variant="token")
             print(f"Token-based precision calculated: {precision}")
         except Exception as e2:
             print(f"Precision calculation failed: {e2}")
             precision = 0.0
 
-    # =============================
-    # GENERALIZATION
-    # =============================
-    try:
-        generalization_score = float(generalization_eval.apply(log, net, im, fm))
-        print(f"Generalization calculated: {generalization_score}")
-    except Exception as e:
-        print(f"Generalization calculation failed: {e}")
-        # Alternatív generalization számítás
-        try:
-            from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
-            
-            replayed_traces = token_replay.apply(log, net, im, fm)
-            activated_transitions = set()
-            
-            for trace in replayed_traces:
-                if 'activated_transitions' in trace:
-                    activated_transitions.update(trace['activated_transitions'])
-            
-            all_transitions = set(t.label for t in net.transitions if t.label is not None)
-            
-            if all_transitions:
-                generalization_score = len(activated_transitions) / len(all_transitions)
-            else:
-                generalization_score = 0.5
-                
-            print(f"Alternative generalization calculated: {generalization_score}")
-        except Exception as e2:
-            print(f"Alternative generalization failed: {e2}")
-            generalization_score = 0.5
-
     # =============================
     # SIMPLICITY - arc degree
     # =============================
@@ -112,11 +99,13 @@ def compute_metrics_for_log(xes_path: Path) -> dict:
                 simplicity_score = 0.5
             print(f"Basic simplicity calculated: {simplicity_score}")
 
-    return {
+    metrics = {
         "xes_path": str(xes_path),
         "fitness_token_based": fitness,
         "precision_etconformance": precision,
         "generalization": generalization_score,
+        "activated_coverage": coverage,
+        "variants": vlog.info(),
         "simplicity": simplicity_score,
         "model_info": {
             "places": len(net.places),
@@ -125,12 +114,18 @@ def compute_metrics_for_log(xes_path: Path) -> dict:
         }
     }
 
+    # =============================
+    # ALIGNMENTS - fitness + precision per variant (optional, worker pool + time budget)
+    # =============================
+    if align is not None:
+        try:
+            metrics["alignment"] = alignment_metrics(vlog, net, im, fm, **align)
+        except Exception as e:
+            print(f"⚠️  Alignment evaluation failed: {e}")
+    return metrics
 
-def main():
-    load_dotenv()
-    p = Paths()
-    p.ensure()
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Alpha Miner metrics")
     parser.add_argument(
         "--xes",
@@ -138,7 +133,36 @@ def main():
         default=None,
         help="XES path (default: event_log_remaining_ALL.xes)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the artifact cache (always rediscover and re-evaluate)",
+    )
+    parser.add_argument(
+        "--alignments",
+        action="store_true",
+        help="Also compute alignment-based fitness + precision (variants on a worker pool)",
+    )
+    parser.add_argument(
+        "--align-workers",
+        type=int,
+        default=None,
+        help="Alignment worker processes (default: number of cores)",
+    )
+    parser.add_argument(
+        "--align-timeout",
+        type=float,
+        default=ALIGN_TIMEOUT_S,
+        help=f"Per-variant alignment time budget in seconds (default {ALIGN_TIMEOUT_S:g})",
+    )
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, load=load_log) -> dict:
+    """Alpha Miner metrics with parsed arguments; `load` reads the XES log (shared in moodle-pm run)."""
+    load_dotenv()
+    p = Paths()
+    p.ensure()
 
     # alapértelmezett XES
     xes_path = Path(args.xes) if args.xes else (p.xes / "event_log_remaining_ALL.xes")
@@ -146,7 +170,22 @@ def main():
     print(f"▶︎ Computing Alpha Miner metrics for: {xes_path}")
     print("=" * 60)
     
-    metrics = compute_metrics_for_log(xes_path)
+    if not xes_path.exists():
+        raise FileNotFoundError(f"XES not found: {xes_path}")
+
+    # cache: same log content + same code -> same model and metrics
+    cache = ArtifactCache(p.cache, enabled=not args.no_cache)
+    cache_key = cache.make_key("alpha_metrics", inputs=[xes_path],
+                               params={"pm4py": package_version("pm4py"), "alignments": args.alignments,
+                                       "align_timeout": args.align_timeout},
+                               code=[__file__, *EVAL_CODE])
+    align = ({"workers": args.align_workers, "timeout": args.align_timeout, "cache": cache}
+             if args.alignments else None)
+    metrics = cache.load(cache_key)
+    if metrics is None:
+        metrics = compute_metrics_for_log(xes_path, align=align, load=load)
+        cache.save(cache_key, data=metrics)
+    metrics["xes_path"] = str(xes_path)
 
     # mentés
     out_dir = p.figures / "alpha"
@@ -163,8 +202,10 @@ def main():
     with open(csv_path, "w", encoding="utf-8") as f:
         f.write("metric,value\n")
         for k, v in metrics.items():
-            if k not in ["xes_path", "model_info"]:
+            if k != "xes_path" and not isinstance(v, dict):
                 f.write(f"{k},{v}\n")
+        for k, v in metrics.get("alignment", {}).items():
+            f.write(f"alignment_{k},{v}\n")
 
     print("\n" + "=" * 60)
     print("Final Results:")
@@ -173,7 +214,16 @@ def main():
     print(f"Generalization: {metrics['generalization']:.4f}")
     print(f"Simplicity: {metrics['simplicity']:.4f}")
     print(f"Model: {metrics['model_info']['places']} places, {metrics['model_info']['transitions']} transitions")
+    if "alignment" in metrics:
+        from src.pm4py_pipeline.alignments import summary_lines
+        for line in summary_lines(metrics["alignment"]):
+            print(line)
     print(f"Saved to:\n - {json_path}\n - {csv_path}")
+    return metrics
+
+
+def main():
+    run(parse_args())
 
 
 if __name__ == "__main__":
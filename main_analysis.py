@@ -1,46 +1,56 @@
+import argparse
+import json
+import os
+
+import pandas as pd
 from dotenv import load_dotenv
 from src.utils.paths import Paths
-from src.analysis.plotting import (
-    plot_timeparts_stacked_by_category,
-    plot_timeparts_stacked_by_orai_otthoni,
-    plot_monthly_bars_orai_otthoni,
-    save_four_subplots_category,
-    save_four_subplots_orai,
-    save_four_subplots_3way,
-)
 from src.analysis.stats import print_basic_stats
-import pandas as pd
+from src.analysis.cube import build_cube
+from src.analysis.render import analysis_jobs, render_figures
+from src.cache import ArtifactCache
+from src.data_loading import read_store
+from src.utils.profiling import profile_stage
 
 
-def main():
+def main(workers: int | None = None, use_cache: bool = True, df_remaining: pd.DataFrame | None = None):
+    """df_remaining: a memóriában lévő köztes tár (moodle-pm run); alapból a Parquet tárból olvasunk."""
     load_dotenv()
     p = Paths()
     p.ensure()
 
-    df_remaining = pd.read_csv(p.processed / "df_remaining_export.csv")
+    if df_remaining is None:
+        df_remaining = read_store(p.processed / "df_remaining_export.parquet")
 
     # Alap leírók
     print_basic_stats(df_remaining)
 
-    # Ábrák mentése – kategóriák szerint
-    save_four_subplots_category(df_remaining, out_dir=p.figures / "osszesitett")
+    # Közös előaggregált kocka (időrész × kategória × munka típus → darabszám):
+    # az eseménytáblát egyszer járjuk be, minden ábra ebből dolgozik
+    with profile_stage("analysis.build_cube", rows_in=len(df_remaining)):
+        cube = build_cube(df_remaining)
 
-    # Ábrák mentése – Órai vs Otthoni
-    save_four_subplots_orai(df_remaining, out_dir=p.figures / "osszesitett")
+    # Ábrák: kategóriák szerint, Órai vs Otthoni, háromutas (Otthoni / Órai – nem számonkérés /
+    # Órai – számonkérés), időrészek szerinti halmozott ábrák, havi bontás.
+    # Független jobok process poolon; a változatlan bemenetű ábrák a cache-ből jönnek.
+    cache = ArtifactCache(p.cache, enabled=use_cache)
+    report = render_figures(cube, analysis_jobs(p.figures), cache, workers=workers)
 
-    # Háromutas verzió: Otthoni / Órai – nem számonkérés / Órai – számonkérés
-    save_four_subplots_3way(df_remaining, out_dir=p.figures / "osszesitett")
-
-    # Időrészek szerinti halmozott ábrák
-    plot_timeparts_stacked_by_category(df_remaining, out_dir=p.figures / "reszletes")
-    plot_timeparts_stacked_by_orai_otthoni(df_remaining, out_dir=p.figures / "reszletes")
-    
-    # Havi bontás
-    plot_monthly_bars_orai_otthoni(df_remaining, out_dir=p.figures)
+    rendered = [r for r in report if r["status"] == "rendered"]
+    print(f"Ábrák: {len(rendered)} renderelve ({sum(r['seconds'] for r in rendered):.1f}s), "
+          f"{sum(r['status'] == 'cache' for r in report)} a cache-ből, "
+          f"{sum(r['status'] == 'error' for r in report)} hiba")
+    report_path = p.figures / "render_report.json"
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
 
     print("Elemzési ábrák mentve a figures/ alá.")
 
 
 if __name__ == "__main__":
-
-    main()
+    ap = argparse.ArgumentParser(description="Leíró statisztikák + elemzési ábrák a feldolgozott tárból.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Párhuzamos renderelő processzek száma (alap: magok száma)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Artefaktum-cache kikapcsolása (minden ábra újrarenderelődik)")
+    args = ap.parse_args()
+    main(workers=args.workers, use_cache=not args.no_cache)
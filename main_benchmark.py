@@ -0,0 +1,467 @@
+# main_benchmark.py – mikro-benchmarkok szintetikus Moodle logon
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_loading import HU_MONTHS, parse_hu_datetime_series, _parse_hu_datetime_series_regex
+from src.categories import build_mapping
+
+_HU_MONTH_NAMES = {v: k for k, v in HU_MONTHS.items()}
+
+
+def make_synthetic_log(n_rows: int, n_unique_ts: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Szintetikus, Moodle-exporthoz hasonló nyers log (magyar 'Idő' formátummal).
+    Az időbélyegek n_unique_ts egyedi értékből ismétlődnek, ahogy a valódi logban is.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-02-17 00:00:00")
+    secs = rng.integers(0, 126 * 24 * 3600, size=n_unique_ts)
+    uniq = [start + pd.Timedelta(seconds=int(x)) for x in secs]
+    uniq_str = np.array([
+        f"{t.year}. {_HU_MONTH_NAMES[t.month]} {t.day}., {t.hour}:{t.minute:02d}:{t.second:02d}"
+        for t in uniq
+    ], dtype=object)
+
+    return pd.DataFrame({
+        "Idő": uniq_str[rng.integers(0, n_unique_ts, size=n_rows)],
+    })
+
+
+def make_synthetic_raw_log(n_rows: int, n_users: int = 400, seed: int = 0) -> pd.DataFrame:
+    """
+    Teljes nyers Moodle-export szerkezetű szintetikus log (Idő, Eseménykörnyezet, Leírás, IP-cím, ...).
+    Az oszlopok object dtype-úak, hogy a tracemalloc a szöveges adatot is lássa.
+    """
+    rng = np.random.default_rng(seed)
+    df = make_synthetic_log(n_rows, max(n_rows // 15, 1), seed=seed)
+    contexts = np.array(list(build_mapping()) + ["Címke: JELENLÉT", "Más", "Fórum: Hírek"], dtype=object)
+    users = rng.integers(100000, 100000 + n_users, size=n_rows)
+    users[rng.random(n_rows) < 0.02] = 605                   # kizárt (oktatói) felhasználó
+    descr = np.array([f"The user with id '{u}' viewed the 'url' activity with course module id '1508513'."
+                      for u in range(100000, 100000 + n_users)] +
+                     ["The user with id '605' viewed the course."], dtype=object)
+    ips = np.array([f"146.110.{i}.{j}" for i in range(4) for j in range(8)] +
+                   [f"84.225.{i}.{j}" for i in range(16) for j in range(16)], dtype=object)
+    return pd.DataFrame({
+        "Idő": df["Idő"].to_numpy(dtype=object),
+        "Eseménykörnyezet": contexts[rng.integers(0, len(contexts), size=n_rows)],
+        "Összetevő": np.full(n_rows, "URL", dtype=object),
+        "Esemény neve": np.full(n_rows, "Megtekintett kurzusmodul", dtype=object),
+        "Leírás": descr[np.where(users == 605, n_users, users - 100000)],
+        "Eredet": np.full(n_rows, "web", dtype=object),
+        "IP-cím": ips[rng.integers(0, len(ips), size=n_rows)],
+    })
+
+
+def make_synthetic_event_store(n_rows: int, n_users: int = 400, seed: int = 0) -> pd.DataFrame:
+    """A df_remaining_export tár XES-hez használt oszlopai (user_id, Uj_oszlop, Idő_dt), szintetikusan."""
+    rng = np.random.default_rng(seed)
+    cats = np.array(sorted(set(build_mapping().values())) + ["Egyéb"], dtype=object)
+    start = np.datetime64("2025-02-17T00:00:00")
+    return pd.DataFrame({
+        "user_id": pd.array(rng.integers(100000, 100000 + n_users, size=n_rows), dtype="Int64"),
+        "Uj_oszlop": pd.Categorical(cats[rng.integers(0, len(cats), size=n_rows)]),
+        "Idő_dt": start + rng.integers(0, 126 * 24 * 3600, size=n_rows).astype("timedelta64[s]"),
+    })
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def bench_parse_datetime(args) -> None:
+    df = make_synthetic_log(args.rows, args.unique, seed=args.seed)
+    print(f"Szintetikus log: {len(df):,} sor | {df['Idő'].nunique():,} egyedi időbélyeg")
+
+    new, t_new = _timed(parse_hu_datetime_series, df["Idő"])
+    print(f"  factorize + tokenizer : {t_new:8.3f} s | {len(df) / t_new:14,.0f} sor/s")
+    if args.skip_legacy:
+        return
+
+    old, t_old = _timed(_parse_hu_datetime_series_regex, df["Idő"])
+    print(f"  regex + ISO-string    : {t_old:8.3f} s | {len(df) / t_old:14,.0f} sor/s")
+    print(f"  gyorsulás: {t_old / t_new:.1f}×")
+
+    same = bool((new.isna() == old.isna()).all() and (new.dropna() == old.dropna()).all())
+    print(f"  azonos eredmény: {same}")
+
+
+def _legacy_add_extracted_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """A korábbi src.cleaning.add_extracted_ids: soronkénti str.extract mintánként, új frame."""
+    from src.cleaning import ID_PATTERNS
+
+    extracts = {name: df["Leírás"].str.extract(pat, expand=False).astype("Int64") for name, pat in ID_PATTERNS.items()}
+    out = df.assign(**extracts)
+    return out.drop(columns=[c for c in ["attempt_id", "quiz_id"] if c in out.columns])
+
+
+def _legacy_apply_exclusions(df: pd.DataFrame) -> pd.DataFrame:
+    """A korábbi src.cleaning.apply_exclusions: másolat + szabálycsoportonként új szűrt frame."""
+    from src.cleaning import _EXACT_EXCLUSIONS, _EXCLUDE_PREFIX
+
+    out = df.copy()
+    for col, prefixes in _EXCLUDE_PREFIX.items():
+        if col in out.columns:
+            mask = False
+            for px in prefixes:
+                mask |= out[col].astype(str).str.startswith(px, na=False)
+            out = out[~mask]
+    for col, values in _EXACT_EXCLUSIONS.items():
+        if col in out.columns:
+            out = out[~out[col].isin(values)]
+    return out
+
+
+def _legacy_preprocess(raw: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+    """
+    A korábbi main_preprocess.main memóriaprofilja: minden lépés másol, a köztes frame-ek élnek.
+    A tisztítás a korábbi implementációkkal fut (regex parser, soronkénti ID-kinyerés,
+    másoló kizárások), hogy az összevetés a valódi régi pipeline-nal történjen.
+    """
+    from main_preprocess import IDS_EXCLUDE, _week_catalog
+    from src.cleaning import apply_time_window
+    from src.slicing import split_users, add_time_parts, label_orai_otthoni, build_slices
+    from src.weekly_plan import attach_week_plan_columns
+    from src.transformations import reclassify_exam_to_admin_if_otthoni
+
+    df = raw.copy()                                   # read_input_excel
+    df["Idő_dt"] = _parse_hu_datetime_series_regex(df["Idő"])
+    df = apply_time_window(df, start, end)
+    df = _legacy_add_extracted_ids(df)
+    df = _legacy_apply_exclusions(df)
+    df["Uj_oszlop"] = df["Eseménykörnyezet"].map(build_mapping()).fillna("Egyéb")
+    df_masik_users, df_remaining = split_users(df, IDS_EXCLUDE)
+    df_remaining = add_time_parts(df_remaining)
+    df_remaining = label_orai_otthoni(df_remaining)
+    df_remaining = attach_week_plan_columns(df_remaining)
+    catalog = _week_catalog(df_remaining)
+    slices = build_slices(df_remaining)
+    df_remaining = label_orai_otthoni(df_remaining)
+    df_remaining = reclassify_exam_to_admin_if_otthoni(df_remaining)
+    mask_no_loops = df_remaining["Uj_oszlop"].ne(df_remaining.groupby("user_id")["Uj_oszlop"].shift())
+    df_no_loops = df_remaining.loc[mask_no_loops, ["Idő_dt", "Uj_oszlop", "user_id"]].reset_index(drop=True)
+    return df, df_masik_users, df_remaining, catalog, slices, df_no_loops
+
+
+def _pipeline_preprocess(raw: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+    from main_preprocess import IDS_EXCLUDE, clean_raw, preprocess_stages
+    from src.pipeline import run_pipeline
+
+    return run_pipeline(clean_raw(raw.copy(), start, end), preprocess_stages(build_mapping(), IDS_EXCLUDE),
+                        verbose=False)
+
+
+def _peak_memory(fn, *args) -> tuple[float, int]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    res = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del res
+    gc.collect()
+    return elapsed, peak
+
+
+def bench_preprocess_memory(args) -> None:
+    raw = make_synthetic_raw_log(args.rows, seed=args.seed)
+    start, end = pd.Timestamp("2025-02-17 00:00:00"), pd.Timestamp("2025-06-23 23:59:59")
+    raw_mb = raw.memory_usage(deep=True).sum() / 2**20
+    print(f"Szintetikus nyers log: {len(raw):,} sor | {raw_mb:,.1f} MiB")
+
+    with contextlib.redirect_stdout(io.StringIO()):     # a lépések kiírásai nem kellenek
+        t_old, peak_old = _peak_memory(_legacy_preprocess, raw, start, end)
+        t_new, peak_new = _peak_memory(_pipeline_preprocess, raw, start, end)
+    print(f"  korábbi main (másoló lépések): peak {peak_old / 2**20:8.1f} MiB | {t_old:6.2f} s")
+    print(f"  stage-pipeline (helyben)     : peak {peak_new / 2**20:8.1f} MiB | {t_new:6.2f} s")
+    print(f"  csúcsmemória aránya: {peak_new / peak_old:.2f}")
+
+
+def _legacy_export_xes(df: pd.DataFrame, out_path: Path) -> None:
+    """A korábbi export_xes: EventLog objektum → pm4py.write_xes → fejléc-fix (teljes újraolvasás)."""
+    import pm4py
+    from src.pm4py_pipeline.eventlog import to_event_log, fix_xes_for_prom
+
+    pm4py.write_xes(to_event_log(df), str(out_path))
+    fix_xes_for_prom(out_path)
+
+
+def _xes_bytes_sorted_extensions(path: Path) -> bytes:
+    """
+    XES tartalom rendezett <extension> sorokkal: a pm4py write_xes ezeket halmaz-bejárási
+    sorrendben írja (PYTHONHASHSEED-függő), így bájtra csak ettől eltekintve vethető össze.
+    """
+    lines = path.read_bytes().splitlines(keepends=True)
+    idx = [i for i, line in enumerate(lines) if line.lstrip().startswith(b"<extension ")]
+    for i, line in zip(idx, sorted(lines[i] for i in idx)):
+        lines[i] = line
+    return b"".join(lines)
+
+
+def bench_xes_export(args) -> None:
+    from src.pm4py_pipeline.eventlog import export_xes
+    from src.data_loading import read_store
+
+    if args.store:
+        df = read_store(Path(args.store), columns=["user_id", "Uj_oszlop", "Idő_dt"])
+        print(f"Tár: {args.store} | {len(df):,} esemény | {df['user_id'].nunique():,} eset")
+    else:
+        df = make_synthetic_event_store(args.rows, seed=args.seed)
+        print(f"Szintetikus eseménytár: {len(df):,} esemény | {df['user_id'].nunique():,} eset")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = Path(tmp) / "legacy.xes", Path(tmp) / "stream.xes"
+        with contextlib.redirect_stdout(io.StringIO()):
+            t_old, peak_old = _peak_memory(_legacy_export_xes, df, old_path)
+            t_new, peak_new = _peak_memory(export_xes, df, new_path)
+        mb = new_path.stat().st_size / 2**20
+        print(f"  EventLog + write_xes + fix : {t_old:7.2f} s | {len(df) / t_old:11,.0f} esemény/s | "
+              f"peak {peak_old / 2**20:8.1f} MiB")
+        print(f"  streaming író             : {t_new:7.2f} s | {len(df) / t_new:11,.0f} esemény/s | "
+              f"peak {peak_new / 2**20:8.1f} MiB")
+        print(f"  gyorsulás: {t_old / t_new:.1f}× | csúcsmemória aránya: {peak_new / peak_old:.2f} | {mb:,.1f} MiB XES")
+        same = _xes_bytes_sorted_extensions(old_path) == _xes_bytes_sorted_extensions(new_path)
+        print(f"  bájtra azonos kimenet (az <extension> sorok sorrendjétől eltekintve): {same}")
+
+
+def bench_xes_load(args) -> None:
+    import warnings
+    import pm4py
+    from src.pm4py_pipeline.xes_cache import load_log, sidecar_path
+
+    warnings.filterwarnings("ignore")                   # rustxes ajánlás
+    xes_path = Path(args.xes)
+    print(f"XES: {xes_path} | {xes_path.stat().st_size / 2**20:,.1f} MiB")
+
+    ref, t_pm = _timed(lambda: pm4py.read_xes(str(xes_path), show_progress_bar=False))
+    sidecar_path(xes_path).unlink(missing_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cold, t_cold = _timed(load_log, xes_path)
+    warm, t_warm = _timed(load_log, xes_path)
+    print(f"  pm4py.read_xes          : {t_pm:7.3f} s")
+    print(f"  load_log (iterparse)    : {t_cold:7.3f} s | {t_pm / t_cold:5.1f}×")
+    print(f"  load_log (sidecar)      : {t_warm:7.3f} s | {t_pm / t_warm:5.1f}×")
+    same = ref[list(warm.columns)].equals(warm) and warm.equals(cold)
+    print(f"  azonos eset/aktivitás/idő oszlopok: {same}")
+
+
+def bench_dfg(args) -> None:
+    from pm4py.algo.discovery.dfg.adapters.pandas import df_statistics, freq_triples
+    from pm4py.statistics.attributes.pandas import get as attr_get
+    from pm4py.statistics.end_activities.pandas import get as ea_get
+    from pm4py.statistics.start_activities.pandas import get as sa_get
+    from src.pm4py_pipeline.dfg import directly_follows
+    from src.pm4py_pipeline.eventlog import to_event_frame
+
+    df = to_event_frame(make_synthetic_event_store(args.rows, seed=args.seed))
+    print(f"Szintetikus eseménytábla: {len(df):,} esemény | {df['case:concept:name'].nunique():,} eset")
+    keys = dict(case_id_glue="case:concept:name", activity_key="concept:name", timestamp_key="time:timestamp")
+
+    def legacy():
+        return (df_statistics.get_dfg_graph(df, **keys),
+                df_statistics.get_dfg_graph(df, measure="performance", **keys),
+                df_statistics.get_dfg_graph(df, measure="performance", perf_aggregation_key="median", **keys),
+                df_statistics.get_dfg_graph(df, window=2, **keys),
+                freq_triples.get_freq_triples(df, **keys),
+                sa_get.get_start_activities(df), ea_get.get_end_activities(df),
+                attr_get.get_attribute_values(df, "concept:name"))
+
+    ref, t_old = _timed(legacy)
+    new, t_new = _timed(directly_follows, df)
+    print(f"  pm4py (8 külön bejárás)   : {t_old:7.3f} s")
+    print(f"  directly_follows (1 menet): {t_new:7.3f} s | {t_old / t_new:5.1f}×")
+    same = (dict(ref[0]) == new.frequency and dict(ref[3]) == new.window_2
+            and dict(ref[4]) == new.freq_triples and dict(ref[5]) == new.start_activities
+            and dict(ref[6]) == new.end_activities and dict(ref[7]) == new.activities
+            and all(abs(ref[1][k] - new.mean_duration[k]) < 1e-6 for k in ref[1])
+            and all(abs(ref[2][k] - new.median_duration[k]) < 1e-6 for k in ref[2]))
+    print(f"  azonos DFG / időtartamok / kezdő-záró / aktivitás-számok: {same}")
+
+
+def bench_loops(args) -> None:
+    from src.slicing import collapse_runs
+
+    df = make_synthetic_event_store(args.rows, n_users=args.users, seed=args.seed)
+    # a tárban sok egymást követő azonos kategória van: rövid kategória-ábécé szimulálása
+    df["Uj_oszlop"] = df["Uj_oszlop"].cat.codes.mod(2).map({0: "Orai", 1: "Hazi"}).astype("category")
+    print(f"Szintetikus tár: {len(df):,} esemény | {df['user_id'].nunique():,} felhasználó")
+
+    def legacy():
+        d = df.sort_values(["user_id", "Idő_dt"], kind="stable")
+        mask = d["Uj_oszlop"].astype(object).ne(d.groupby("user_id")["Uj_oszlop"].shift().astype(object))
+        return d.loc[mask, ["Idő_dt", "Uj_oszlop", "user_id"]].reset_index(drop=True)
+
+    ref, t_old = _timed(legacy)
+    new, t_new = _timed(collapse_runs, df)
+    print(f"  groupby-shift maszk          : {t_old:7.3f} s")
+    print(f"  collapse_runs (RLE, 1 menet) : {t_new:7.3f} s | {t_old / t_new:5.1f}× | {len(new):,} run")
+    print(f"  azonos sorok: {ref.equals(new[list(ref.columns)])} | "
+          f"összevont események: {int(new['ismetles_db'].sum()):,}")
+
+
+# ezek nem töltődhetnek be egy parancs --help-jénél (csak a számoló ágon)
+HEAVY_MODULES = ("pm4py", "matplotlib", "openpyxl", "xlsxwriter")
+
+
+def _import_profile(argv: list[str]) -> tuple[float, dict[str, float]]:
+    """
+    `python -X importtime <argv>` egy friss processzben → (falióra ms, legfelső szintű
+    importok kumulált ideje ms-ban). A -X importtime sorai: "import time: self | kumulált | név",
+    a beágyazott importok neve behúzva.
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    top: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        top[name.strip()] = top.get(name.strip(), 0.0) + int(cumulative) / 1000
+    return wall_ms, top
+
+
+def bench_startup(args) -> None:
+    from main_cli import COMMANDS
+
+    cli = str(Path(__file__).with_name("main_cli.py"))
+    targets = [("moodle-pm", [cli, "--help"])]
+    targets += [(f"moodle-pm {name}", [cli, name, "--help"]) for name in (args.commands or COMMANDS)]
+
+    over = []
+    print(f"Indulási idő (--help, legjobb {args.repeat} futásból) | keret: {args.budget_ms:.0f} ms")
+    for label, argv in targets:
+        wall_ms, top = min((_import_profile(argv) for _ in range(args.repeat)), key=lambda r: r[0])
+        heavy = sorted({n.split(".")[0] for n in top} & set(HEAVY_MODULES))
+        slowest = sorted(top.items(), key=lambda kv: -kv[1])[:3]
+        status = "OK"
+        if heavy:
+            status = f"NEHÉZ IMPORT: {', '.join(heavy)}"
+        elif wall_ms > args.budget_ms:
+            status = "KERET FELETT"
+        if status != "OK":
+            over.append(label)
+        print(f"  {label:<26}: {wall_ms:7.0f} ms | import {sum(top.values()):7.0f} ms | "
+              + ", ".join(f"{n} {ms:.0f}" for n, ms in slowest) + f" | {status}")
+    if over:
+        raise SystemExit(f"❌ {len(over)} parancs túllépte az indulási keretet: {', '.join(over)}")
+    print("✅ Minden parancs a kereten belül, nehéz függőség importja nélkül.")
+
+
+def _stage_totals(path: str) -> dict[str, dict[str, float]]:
+    """Profil riport (src.utils.profiling) → stage-enkénti összesítés (hívásszám, idők, csúcs RSS)."""
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    totals: dict[str, dict[str, float]] = {}
+    for rec in report["stages"]:
+        t = totals.setdefault(rec["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rss_peak_mb": 0.0})
+        t["calls"] += 1
+        t["wall_s"] += rec["wall_s"]
+        t["cpu_s"] += rec["cpu_s"]
+        t["rss_peak_mb"] = max(t["rss_peak_mb"], rec.get("rss_peak_mb") or 0.0)
+    return totals
+
+
+def bench_profile_diff(args) -> None:
+    old, new = _stage_totals(args.old), _stage_totals(args.new)
+    regressions = []
+    print(f"{'stage':<44} {'régi s':>9} {'új s':>9} {'arány':>7} {'RSS MB (régi → új)':>22}")
+    for stage in sorted(old.keys() | new.keys(), key=lambda s: -max(old.get(s, {}).get("wall_s", 0.0),
+                                                                        new.get(s, {}).get("wall_s", 0.0))):
+        if stage not in new or stage not in old:
+            print(f"{stage:<44} {'csak a ' + ('régiben' if stage in old else 'újban'):>27}")
+            continue
+        o, n = old[stage], new[stage]
+        ratio = n["wall_s"] / o["wall_s"] if o["wall_s"] > 0 else float("inf")
+        slower = n["wall_s"] - o["wall_s"] > args.min_seconds and ratio > 1 + args.threshold
+        if slower:
+            regressions.append(stage)
+        print(f"{stage:<44} {o['wall_s']:9.3f} {n['wall_s']:9.3f} {ratio:6.2f}× "
+              f"{o['rss_peak_mb']:10.0f} → {n['rss_peak_mb']:<9.0f}" + ("  ⚠️ LASSULT" if slower else ""))
+    if regressions:
+        raise SystemExit(f"❌ {len(regressions)} stage lassult {args.threshold:.0%} felett: {', '.join(regressions)}")
+    print("✅ Nincs lassulás a küszöb felett.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Teljesítmény-benchmarkok szintetikus Moodle logon.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("parse-datetime", help="parse_hu_datetime_series: új vs. regex alapú parser")
+    sp.add_argument("--rows", type=int, default=3_000_000, help="Sorok száma (alapértelmezett: 3 000 000)")
+    sp.add_argument("--unique", type=int, default=200_000, help="Egyedi időbélyegek száma")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.add_argument("--skip-legacy", action="store_true", help="Csak az új parser mérése")
+    sp.set_defaults(func=bench_parse_datetime)
+
+    sp = sub.add_parser("preprocess-memory",
+                        help="Előfeldolgozás csúcsmemóriája (tracemalloc): korábbi main vs. stage-pipeline")
+    sp.add_argument("--rows", type=int, default=500_000, help="Nyers sorok száma (alapértelmezett: 500 000)")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.set_defaults(func=bench_preprocess_memory)
+
+    sp = sub.add_parser("xes-export",
+                        help="Napi XES export: EventLog + pm4py.write_xes vs. streaming DataFrame→XES író")
+    sp.add_argument("--store", type=str, default=None,
+                    help="Valódi tár (pl. data/processed/df_remaining_export.parquet) – az ALL XES munkaterhelése")
+    sp.add_argument("--rows", type=int, default=300_000, help="Szintetikus események száma (ha nincs --store)")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.set_defaults(func=bench_xes_export)
+
+    sp = sub.add_parser("xes-load", help="XES beolvasás: pm4py.read_xes vs. load_log (iterparse + sidecar)")
+    sp.add_argument("--xes", type=str, default="data/xes/event_log_remaining_ALL.xes")
+    sp.set_defaults(func=bench_xes_load)
+
+    sp = sub.add_parser("dfg", help="DFG + kezdő/záró + aktivitás-számok: pm4py bejárások vs. egy NumPy menet")
+    sp.add_argument("--rows", type=int, default=1_000_000, help="Szintetikus események száma")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.set_defaults(func=bench_dfg)
+
+    sp = sub.add_parser("loops", help="Loop-mentes szelet: groupby-shift maszk vs. run-length összevonás")
+    sp.add_argument("--rows", type=int, default=1_000_000, help="Szintetikus események száma")
+    sp.add_argument("--users", type=int, default=400, help="Felhasználók száma")
+    sp.add_argument("--seed", type=int, default=0)
+    sp.set_defaults(func=bench_loops)
+
+    sp = sub.add_parser("startup",
+                        help="CLI indulási idő (-X importtime): parancsonkénti --help idő + nehéz importok")
+    sp.add_argument("--commands", nargs="+", default=None, help="Mért parancsok (alapértelmezett: mind)")
+    sp.add_argument("--budget-ms", type=float, default=2000.0,
+                    help="Keret parancsonként ms-ban (alapértelmezett: 2000); túllépéskor hibakód")
+    sp.add_argument("--repeat", type=int, default=3, help="Ismétlések száma (a legjobbat vesszük)")
+    sp.set_defaults(func=bench_startup)
+
+    sp = sub.add_parser("profile-diff",
+                        help="Két profil riport (PROFILE=1, data/profiling/*.json) stage-enkénti összevetése")
+    sp.add_argument("old", help="Régi (alap) riport")
+    sp.add_argument("new", help="Új riport")
+    sp.add_argument("--threshold", type=float, default=0.2,
+                    help="Megengedett relatív lassulás (alapértelmezett: 0.2 = 20%%); felette hibakód")
+    sp.add_argument("--min-seconds", type=float, default=0.5,
+                    help="Ennél kisebb abszolút lassulás zajnak számít (alapértelmezett: 0.5 s)")
+    sp.set_defaults(func=bench_profile_diff)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
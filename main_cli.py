@@ -0,0 +1,66 @@
+# main_cli.py – egységes belépési pont: moodle-pm <parancs> [argumentumok]
+"""
+A parancsok a meglévő main_*.py szkripteket futtatják (runpy, __main__ néven), a saját
+argumentumaikkal – a `python main_X.py ...` és a `python main_cli.py X ...` ugyanaz.
+
+A parancs-regiszter statikus (modulnév + súgószöveg): a `moodle-pm --help` és a
+parancsválasztás egyik szkriptet sem importálja, a nehéz függőségek (pm4py, matplotlib,
+openpyxl, xlsxwriter) pedig csak a ténylegesen számoló parancson belül töltődnek be.
+Az indulási időt a `python main_benchmark.py startup` méri (-X importtime).
+"""
+from __future__ import annotations
+
+import argparse
+import runpy
+import sys
+
+PROG = "moodle-pm"
+
+# parancs → (futtatott modul, rövid leírás)
+COMMANDS: dict[str, tuple[str, str]] = {
+    "run": ("main_run", "A teljes pipeline függőségi gráfként (párhuzamos ágak, csak a változott lépések)"),
+    "preprocess": ("main_preprocess", "Tisztítás + szeletek + exportok (nyers Moodle log → Parquet tár)"),
+    "analysis": ("main_analysis", "Leíró statisztikák + elemzési ábrák"),
+    "xes": ("main_pm4py", "XES exportok (napi, heti, absztrakt, munkamenet) + heti CSV-k"),
+    "alpha": ("main_alpha", "Alpha Miner Petri-háló ábra"),
+    "alpha-metrics": ("main_alpha_metrics", "Alpha Miner minőségi metrikák"),
+    "heuristics": ("main_heuristics", "Heuristics Miner (metrikák, küszöb-sweep, Pareto-front)"),
+    "inductive": ("main_inductive", "Inductive Miner metrikák"),
+    "fuzzy": ("main_fuzzy", "Fuzzy Miner modell + significance táblák"),
+    "grid": ("main_evaluate_grid", "Bányász × paraméter × log kiértékelő rács"),
+    "benchmark": ("main_benchmark", "Teljesítmény-benchmarkok (köztük az indulási idő: startup)"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    epilog = "parancsok:\n" + "\n".join(f"  {name:<16}{desc}" for name, (_, desc) in COMMANDS.items())
+    ap = argparse.ArgumentParser(
+        prog=PROG,
+        description="Moodle process mining pipeline – egységes parancssor.",
+        epilog=epilog + f"\n\nParancsonkénti súgó: {PROG} <parancs> --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument("command", choices=list(COMMANDS), metavar="parancs", help="a futtatandó lépés")
+    return ap
+
+
+def run_command(name: str, args: list[str]) -> None:
+    """A parancs szkriptjének futtatása __main__-ként, a megadott argumentumokkal."""
+    module = COMMANDS[name][0]
+    # argv[0]-t a runpy a szkript útvonalára állítja (a súgóban így a szkript neve látszik)
+    sys.argv = [sys.argv[0], *args]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    ap = build_parser()
+    # csak az első szót értelmezzük; a többi (a --help is) a parancs saját parserét illeti
+    if not argv or argv[0].startswith("-"):
+        ap.parse_args(argv[:1] or ["--help"])
+    ap.parse_args(argv[:1])
+    run_command(argv[0], argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# main_evaluate_grid.py
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.utils.paths import Paths
+from src.cache import ArtifactCache, package_version
+from src.pm4py_pipeline import discovery
+from src.pm4py_pipeline.config import ALIGN_TIMEOUT_S
+from src.pm4py_pipeline.discovery import MINERS, param_grid
+from src.pm4py_pipeline.xes_cache import load_log
+
+# pm4py-based evaluation is imported inside the workers (fast --help / startup)
+METRICS_FILE = Path(discovery.__file__).with_name("metrics.py")
+ALIGNMENTS_FILE = Path(discovery.__file__).with_name("alignments.py")
+XES_CACHE_FILE = Path(discovery.__file__).with_name("xes_cache.py")
+
+# Per-worker log store: each process parses (or reads the sidecar of) a log once
+# and reuses it for every job on that log.
+_WORKER_LOGS: Dict[str, Any] = {}
+
+
+def _worker_log(xes_path: str):
+    from src.pm4py_pipeline.metrics import compress_variants
+
+    if xes_path not in _WORKER_LOGS:
+        log = load_log(Path(xes_path))
+        _WORKER_LOGS[xes_path] = compress_variants(log)
+    return _WORKER_LOGS[xes_path]
+
+
+def run_job(job: Dict[str, Any], cache_root: str | None = None) -> Dict[str, Any]:
+    """Discovery + evaluation for one (log, miner, params) cell of the grid."""
+    from src.pm4py_pipeline.metrics import evaluate_model
+
+    t0 = time.perf_counter()
+    vlog = _worker_log(job["xes"])
+    t_load = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    net, im, fm = MINERS[job["miner"]](vlog.source, **job["params"])
+    t_discover = time.perf_counter() - t1
+
+    t2 = time.perf_counter()
+    # the grid is already parallel: alignments run in-process, sharing the alignment cache
+    align = None
+    if job["align_timeout"] is not None:
+        align = {"workers": 1, "timeout": job["align_timeout"],
+                 "cache": ArtifactCache(Path(cache_root)) if cache_root else None}
+    result = evaluate_model(vlog, net, im, fm, precision=job["precision_variant"], alignments=align)
+    t_evaluate = time.perf_counter() - t2
+
+    result["timings"] = {
+        "load_s": round(t_load, 3),
+        "discover_s": round(t_discover, 3),
+        "evaluate_s": round(t_evaluate, 3),
+        "total_s": round(time.perf_counter() - t0, 3),
+        "pid": os.getpid(),
+    }
+    return result
+
+
+def build_jobs(xes_files: List[Path], miners: List[str], args) -> List[Dict[str, Any]]:
+    grids = {
+        "alpha": [{}],
+        "heuristics": param_grid(dependency_threshold=args.dependency, and_threshold=args.andthr,
+                                 loop_two_threshold=args.loop2),
+        "inductive": param_grid(noise_threshold=args.noise),
+    }
+    # grouped by log so consecutive jobs on a worker tend to share the parsed log
+    return [
+        {"xes": str(x), "miner": m, "params": params, "precision_variant": args.precision,
+         "align_timeout": args.align_timeout if args.alignments else None}
+        for x in xes_files for m in miners for params in grids[m]
+    ]
+
+
+def _flatten(row: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for k, v in row.items():
+        if isinstance(v, dict):
+            out.update({f"{k}.{kk}": vv for kk, vv in v.items()})
+        else:
+            out[k] = v
+    return out
+
+
+def main():
+    load_dotenv()
+    p = Paths()
+    p.ensure()
+
+    ap = argparse.ArgumentParser(
+        description="Discover and evaluate a grid of logs x miners x parameters on a process pool."
+    )
+    ap.add_argument("--xes", nargs="+", default=None,
+                    help="XES files (default: every data/xes/*.xes)")
+    ap.add_argument("--miners", nargs="+", default=list(MINERS), choices=list(MINERS),
+                    help="Miners to run (default: all)")
+    ap.add_argument("--dependency", nargs="+", type=float, default=[0.5],
+                    help="Heuristics dependency_threshold values (default 0.5)")
+    ap.add_argument("--andthr", nargs="+", type=float, default=[0.65],
+                    help="Heuristics and_threshold values (default 0.65)")
+    ap.add_argument("--loop2", nargs="+", type=float, default=[0.5],
+                    help="Heuristics loop_two_threshold values (default 0.5)")
+    ap.add_argument("--noise", nargs="+", type=float, default=[0.0],
+                    help="Inductive noise_threshold values (default 0.0)")
+    ap.add_argument("--precision", choices=["token", "align"], default="token",
+                    help="ETC precision variant (default: token)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Worker processes (default: number of cores)")
+    ap.add_argument("--output-dir", type=str, default=None,
+                    help="Output directory (default: figures/evaluation)")
+    ap.add_argument("--alignments", action="store_true",
+                    help="Also compute alignment-based fitness + precision for every model")
+    ap.add_argument("--align-timeout", type=float, default=ALIGN_TIMEOUT_S,
+                    help=f"Per-variant alignment time budget in seconds (default {ALIGN_TIMEOUT_S:g})")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Disable the artifact cache (always rediscover and re-evaluate)")
+    args = ap.parse_args()
+
+    xes_files = [Path(x) for x in args.xes] if args.xes else sorted(p.xes.glob("*.xes"))
+    missing = [x for x in xes_files if not x.exists()]
+    if not xes_files or missing:
+        raise SystemExit(f"❌ XES file(s) not found: {missing or p.xes}. Generate them first (python main_pm4py.py).")
+
+    out_dir = Path(args.output_dir) if args.output_dir else (p.figures / "evaluation")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # build the sidecars in the parent so workers never race on writing them
+    for x in xes_files:
+        load_log(x)
+
+    jobs = build_jobs(xes_files, args.miners, args)
+    cache = ArtifactCache(p.cache, enabled=not args.no_cache)
+    code = [discovery.__file__, METRICS_FILE, ALIGNMENTS_FILE, XES_CACHE_FILE]
+    rows: List[Dict[str, Any]] = []
+    pending = []
+    for job in jobs:
+        key = cache.make_key("grid", inputs=[job["xes"]],
+                             params={**job, "xes": None, "pm4py": package_version("pm4py")}, code=code)
+        cached = cache.load(key)
+        if cached is not None:
+            rows.append({**job, **cached, "cached": True})
+        else:
+            pending.append((key, job))
+
+    print(f"▶︎ {len(jobs)} jobs ({len(xes_files)} logs x {len(args.miners)} miners), "
+          f"{len(rows)} from cache, {len(pending)} on {args.workers} workers")
+    t0 = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(pending)))) as pool:
+            cache_root = str(p.cache) if cache.enabled else None
+            futures = {pool.submit(run_job, job, cache_root): (key, job) for key, job in pending}
+            for fut in as_completed(futures):
+                key, job = futures[fut]
+                name = f"{Path(job['xes']).name} | {job['miner']} {job['params']}"
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"⚠️ Job failed: {name}: {e}")
+                    rows.append({**job, "error": str(e), "cached": False})
+                    continue
+                cache.save(key, data=result)
+                rows.append({**job, **result, "cached": False})
+                print(f"✅ {name}: fitness={result['fitness']:.4f} precision={result['precision']:.4f} "
+                      f"({result['timings']['total_s']:.1f}s)")
+    wall = time.perf_counter() - t0
+
+    rows.sort(key=lambda r: (r["xes"], r["miner"], json.dumps(r["params"], sort_keys=True)))
+
+    json_path = out_dir / "grid_results.json"
+    csv_path = out_dir / "grid_results.csv"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"wall_s": round(wall, 3), "workers": args.workers, "results": rows},
+                  f, indent=2, ensure_ascii=False)
+    pd.DataFrame([_flatten(r) for r in rows]).to_csv(csv_path, index=False, encoding="utf-8")
+
+    busy = sum(r.get("timings", {}).get("total_s", 0.0) for r in rows if not r.get("cached"))
+    print(f"Done in {wall:.1f}s wall ({busy:.1f}s of job time).")
+    print(f"💾 Saved: {json_path}\n💾 Saved: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,20 @@ from pathlib import Path
 from typing import Any, Dict, Tuple
 
 from dotenv import load_dotenv
-import pm4py
 
 from src.utils.paths import Paths
+from src.pm4py_pipeline.xes_cache import load_log, log_stats
+from src.utils.profiling import profiled
 
 
+@profiled("fuzzy.discover")
 def discover_fuzzy(log) -> Tuple[Any, Dict[str, Any]]:
     """
     Fuzzy Miner model felfedezése; több fallback-kel, hogy különböző PM4Py verziókon is fusson.
     Visszatér: (model, params_dict)
     """
+    import pm4py  # lusta import: a --help pm4py betöltése nélkül fut
+
     # 1) Újabb wrapper
     try:
         model, params = pm4py.discover_fuzzy_model(log)
@@ -113,24 +117,28 @@ def export_fuzzy_tables(model: Any, out_dir: Path) -> None:
                 f.write(f"{s},{t},{'' if sig is None else sig},{'' if corr is None else corr}\n")
 
 
-def main():
-    load_dotenv()
-    p = Paths()
-    p.ensure()
-
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     ap = argparse.ArgumentParser(description="Fuzzy Miner on an XES log (CSV táblák, vizualizáció nélkül).")
     ap.add_argument("--xes", type=str, default=None,
                     help="XES path (alapértelmezett: data/xes/event_log_remaining_ALL.xes)")
     ap.add_argument("--out", type=str, default=None,
                     help="Kimeneti mappa (alapértelmezett: figures/fuzzy)")
-    args = ap.parse_args()
+    return ap.parse_args(argv)
+
+
+def run(args: argparse.Namespace, load=load_log) -> None:
+    """Fuzzy Miner a parser argumentumaival; load: XES → log (moodle-pm run: megosztott log)."""
+    load_dotenv()
+    p = Paths()
+    p.ensure()
 
     xes_path = Path(args.xes) if args.xes else (p.xes / "event_log_remaining_ALL.xes")
     if not xes_path.exists():
         raise SystemExit(f"XES nem található: {xes_path}. Előbb generáld le (python main_pm4py.py).")
 
-    log = pm4py.read_xes(str(xes_path))
-    print(f"📥 Log: {xes_path} | traces={len(log)} | events={sum(len(tr) for tr in log)}")
+    log = load(xes_path)
+    traces, events = log_stats(log)
+    print(f"📥 Log: {xes_path} | traces={traces} | events={events}")
 
     model, params = discover_fuzzy(log)
 
@@ -147,6 +155,10 @@ def main():
     print(f"CSV-k: {out_dir}")
 
 
+def main():
+    run(parse_args())
+
+
 if __name__ == "__main__":
     main()
 
@@ -4,28 +4,37 @@ from __future__ import annotations
 import json
 import argparse
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import TYPE_CHECKING, Tuple, Dict, Any, List
 from dotenv import load_dotenv
-import pm4py
-from pm4py.objects.petri_net.obj import PetriNet, Marking
-from pm4py.objects.log.obj import EventLog
+import pandas as pd
 
 from src.utils.paths import Paths
-
-# PM4Py 2.7+ compatible evaluators
-from pm4py.algo.evaluation.replay_fitness import algorithm as fitness_eval
-from pm4py.algo.evaluation.precision import algorithm as precision_eval
-from pm4py.algo.evaluation.generalization import algorithm as generalization_eval
-from pm4py.algo.evaluation.simplicity import algorithm as simplicity_eval
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.pm4py_pipeline.xes_cache import load_log, log_stats
+from src.cache import ArtifactCache, package_version
+from src.pm4py_pipeline import xes_cache
+from src.pm4py_pipeline.config import ALIGN_TIMEOUT_S
+from src.pm4py_pipeline.discovery import param_grid
+from src.utils.profiling import profiled
+
+# A pm4py és a rá épülő modulok (közös kiértékelő: egy token replay / log–háló pár,
+# heuristics sweep, alignment) a használó függvényekben töltődnek be: a --help és az
+# argumentumhibák pm4py import nélkül térnek vissza.
+if TYPE_CHECKING:
+    from pm4py.objects.petri_net.obj import PetriNet, Marking
+    from pm4py.objects.log.obj import EventLog
+    from pm4py.objects.heuristics_net.obj import HeuristicsNet
+
+# A metrikák és a háló forrása (közös kiértékelő, alignment, XES olvasó, DFG-motor) is a cache-kulcs része.
+EVAL_CODE = [Path(xes_cache.__file__).with_name(name)
+             for name in ("metrics.py", "alignments.py", "xes_cache.py", "dfg.py", "heuristics_sweep.py")]
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 logger = logging.getLogger(__name__)
 
 # --- Petri export helper (PNML + PNG) ---
-from pathlib import Path
-import pm4py
 
 def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
     """
@@ -33,6 +42,8 @@ def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
     out_dir/basename.pnml
     out_dir/basename.png
     """
+    import pm4py
+
     out_dir.mkdir(parents=True, exist_ok=True)
     pnml_path = out_dir / f"{basename}.pnml"
     png_path = out_dir / f"{basename}.png"
@@ -62,16 +73,19 @@ def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
 
 
 
+@profiled("heuristics.discover")
 def discover_heuristics_petri(
     log: EventLog,
     dependency_threshold: float = 0.5,
     and_threshold: float = 0.65,
     loop_two_threshold: float = 0.5,
-) -> Tuple[PetriNet, Marking, Marking]:
+) -> Tuple[PetriNet, Marking, Marking, HeuristicsNet]:
     """
     Discover Petri net using Heuristics Miner.
     
-    Higher threshold values produce stricter, "cleaner" models.
+    Higher threshold values produce stricter, "cleaner" models. The log is traversed
+    once by the shared directly-follows engine; the heuristics net is built from its
+    statistics and converted to a Petri net (the net is returned for visualization too).
     
     Args:
         log: Event log to mine from
@@ -80,130 +94,95 @@ def discover_heuristics_petri(
         loop_two_threshold: Threshold for length-two loops
         
     Returns:
-        Tuple of (Petri net, initial marking, final marking)
+        Tuple of (Petri net, initial marking, final marking, heuristics net)
     """
+    from src.pm4py_pipeline.heuristics_sweep import heuristics_stats, to_petri
+
     logger.info(f"Discovering Petri net with thresholds: dependency={dependency_threshold}, "
                 f"and={and_threshold}, loop2={loop_two_threshold}")
     
-    net, im, fm = pm4py.discover_petri_net_heuristics(
-        log,
+    heu_net = heuristics_stats(log).heuristics_net(
         dependency_threshold=dependency_threshold,
         and_threshold=and_threshold,
         loop_two_threshold=loop_two_threshold,
     )
+    net, im, fm = to_petri(heu_net)
 
-    
     logger.info(f"Discovered Petri net: {len(net.places)} places, {len(net.transitions)} transitions")
-    return net, im, fm
+    return net, im, fm, heu_net
 
 
-def compute_metrics_fixed(log: EventLog, net: PetriNet, im: Marking, fm: Marking) -> Dict[str, Any]:
+@profiled("heuristics.metrics")
+def compute_metrics_fixed(log: EventLog, net: PetriNet, im: Marking, fm: Marking,
+                          align: Dict[str, Any] | None = None) -> Dict[str, Any]:
     """
     Compute quality metrics for the discovered model with robust error handling.
+
+    Fitness, generalization and activated-transition coverage come from a single
+    token replay; precision (ETC) replays the log prefixes separately. Both replay
+    each trace variant once and weight the results by its frequency.
     
     Args:
         log: Event log for evaluation
         net: Petri net
         im: Initial marking
         fm: Final marking
+        align: If given (workers/timeout/cache), also compute alignment fitness + precision
         
     Returns:
         Dictionary containing quality metrics
     """
-    metrics = {}
-    
-    # 1. Fitness calculation - using PM4Py's high-level API
-    try:
-        fitness_dict = fitness_eval.apply(log, net, im, fm, variant=fitness_eval.Variants.TOKEN_BASED)
-        metrics["fitness"] = float(fitness_dict["average_trace_fitness"])
-        logger.info(f"Fitness calculated successfully: {metrics['fitness']:.4f}")
-    except Exception as e:
-        logger.warning(f"Standard fitness calculation failed: {e}. Using fallback...")
-        try:
-            # Fallback: manual token replay
-            from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
-            aligned_traces = token_replay.apply(log, net, im, fm)
-            
-            total_fitness = 0
-            count = 0
-            for trace in aligned_traces:
-                if isinstance(trace, dict) and "trace_fitness" in trace:
-                    total_fitness += trace["trace_fitness"]
-                    count += 1
-                elif hasattr(trace, 'get'):
-                    # Try different possible keys
-                    for key in ['fitness', 'trace_fitness', 'conformance']:
-                        if key in trace:
-                            total_fitness += float(trace[key])
-                            count += 1
-                            break
-            
-            metrics["fitness"] = total_fitness / count if count > 0 else 0.0
-            logger.info(f"Fallback fitness calculation completed: {metrics['fitness']:.4f}")
-        except Exception as e2:
-            logger.error(f"All fitness calculations failed: {e2}")
-            metrics["fitness"] = 0.0
+    from src.pm4py_pipeline.alignments import alignment_metrics
+    from src.pm4py_pipeline.metrics import (
+        compress_variants, replay_metrics, etc_precision, simplicity, f_score, model_info,
+    )
 
-    # 2. Precision calculation
-    try:
-        precision_dict = precision_eval.apply(log, net, im, fm, variant=precision_eval.Variants.ETCONFORMANCE_TOKEN)
-        metrics["precision"] = float(precision_dict)
-        logger.info(f"Precision calculated successfully: {metrics['precision']:.4f}")
-    except Exception as e:
-        logger.warning(f"Precision calculation failed: {e}")
-        metrics["precision"] = 0.0
+    vlog = compress_variants(log)
+    logger.info(f"Variants: {vlog.n_variants} for {vlog.n_traces} traces "
+                f"(compression {vlog.compression_ratio:.2f}x)")
 
-    # 3. Generalization
+    # 1. One token replay -> fitness + generalization + activated-transition coverage
     try:
-        generalization = float(generalization_eval.apply(log, net, im, fm))
-        metrics["generalization"] = generalization
-        logger.info(f"Generalization calculated successfully: {metrics['generalization']:.4f}")
+        replay = replay_metrics(vlog, net, im, fm)
+        fitness = replay["average_trace_fitness"]
+        generalization = replay["generalization"]
+        coverage = replay["activated_coverage"]
+        logger.info(f"Fitness calculated successfully: {fitness:.4f}")
+        logger.info(f"Generalization calculated successfully: {generalization:.4f}")
     except Exception as e:
-        logger.warning(f"Generalization calculation failed, using fallback: {e}")
-        # Fallback: ratio of activated transitions
-        try:
-            from pm4py.algo.conformance.tokenreplay import algorithm as token_rep
-            rep = token_rep.apply(log, net, im, fm)
-            activated = set()
-            for tr in rep:
-                if hasattr(tr, 'get') and "activated_transitions" in tr:
-                    activated.update(tr["activated_transitions"])
-                elif hasattr(tr, 'activated_transitions'):
-                    activated.update(tr.activated_transitions)
-            
-            all_tr = {t.label for t in net.transitions if t.label is not None}
-            metrics["generalization"] = float(len(activated) / len(all_tr)) if all_tr else 0.5
-        except Exception as e2:
-            logger.error(f"Generalization fallback also failed: {e2}")
-            metrics["generalization"] = 0.5
+        logger.error(f"Token replay failed: {e}")
+        fitness, generalization, coverage = 0.0, 0.5, 0.0
 
-    # 4. Simplicity
+    # 2. Precision calculation (ETC, prefix replay)
     try:
-        simplicity = float(simplicity_eval.apply(net))
-        metrics["simplicity"] = simplicity
-        logger.info(f"Simplicity calculated successfully: {metrics['simplicity']:.4f}")
+        precision = etc_precision(vlog, net, im, fm, variant="token")
+        logger.info(f"Precision calculated successfully: {precision:.4f}")
     except Exception as e:
-        logger.warning(f"Simplicity calculation failed, using fallback: {e}")
-        # Structural fallback
-        num_arcs = len(net.arcs)
-        denom = (len(net.places) + len(net.transitions))
-        metrics["simplicity"] = 1.0 / (1.0 + (num_arcs / denom)) if denom else 0.5
-
-    # 5. Additional metrics
-    metrics["model_info"] = {
-        "places": len(net.places),
-        "transitions": len(net.transitions),
-        "arcs": len(net.arcs),
-        "visible_transitions": len([t for t in net.transitions if t.label is not None]),
-        "silent_transitions": len([t for t in net.transitions if t.label is None]),
+        logger.warning(f"Precision calculation failed: {e}")
+        precision = 0.0
+
+    metrics = {
+        "fitness": fitness,
+        "precision": precision,
+        "generalization": generalization,
+        "activated_coverage": coverage,
+        # 3. Simplicity (structural fallback inside)
+        "simplicity": simplicity(net),
+        # 4. Additional metrics
+        "model_info": model_info(net),
+        "variants": vlog.info(),
     }
-    
-    # 6. Calculate F-score (harmonic mean of fitness and precision)
-    if metrics["fitness"] > 0 and metrics["precision"] > 0:
-        metrics["f_score"] = 2 * (metrics["fitness"] * metrics["precision"]) / (metrics["fitness"] + metrics["precision"])
-    else:
-        metrics["f_score"] = 0.0
-    
+    logger.info(f"Simplicity calculated successfully: {metrics['simplicity']:.4f}")
+
+    # 5. F-score (harmonic mean of fitness and precision)
+    metrics["f_score"] = f_score(fitness, precision)
+
+    # 6. Optional alignment-based fitness + precision (variants on a worker pool, per-variant time budget)
+    if align is not None:
+        try:
+            metrics["alignment"] = alignment_metrics(vlog, net, im, fm, **align)
+        except Exception as e:
+            logger.warning(f"Alignment evaluation failed: {e}")
     return metrics
 
 
@@ -227,9 +206,11 @@ def debug_token_replay_structure(log: EventLog, net: PetriNet, im: Marking, fm:
         logger.error(f"Debug failed: {e}")
 
 
-def save_visualizations(log: EventLog, net: PetriNet, im: Marking, fm: Marking, 
-                       out_dir: Path, params: Dict[str, float]) -> None:
-    """Save Petri net and Heuristics net visualizations."""
+def save_visualizations(heu_net: HeuristicsNet, net: PetriNet, im: Marking, fm: Marking,
+                       out_dir: Path) -> None:
+    """Save Petri net and Heuristics net visualizations (the already mined heuristics net is reused)."""
+    import pm4py
+
     # Petri net visualization
     try:
         gviz_pn = pm4py.visualization.petri_net.visualizer.apply(net, im, fm)
@@ -240,25 +221,119 @@ def save_visualizations(log: EventLog, net: PetriNet, im: Marking, fm: Marking,
 
     # Heuristics net visualization
     try:
-        hn = pm4py.discover_heuristics_net(
-            log,
-            dependency_threshold=params["dependency"],
-            and_threshold=params["andthr"],
-            loop_two_threshold=params["loop2"],
-        )
-        gviz_hn = pm4py.visualization.heuristics_net.visualizer.apply(hn)
+        gviz_hn = pm4py.visualization.heuristics_net.visualizer.apply(heu_net)
         pm4py.visualization.heuristics_net.visualizer.save(gviz_hn, str(out_dir / "heuristics_net.png"))
         logger.info(f"Heuristics net visualization saved → {out_dir/'heuristics_net.png'}")
     except Exception as e:
         logger.error(f"Heuristics net visualization failed: {e}")
 
 
-def main():
-    """Main execution function."""
-    load_dotenv()
-    p = Paths()
-    p.ensure()
+# Variant logs of the sweep workers, loaded once per process
+_SWEEP_LOGS: Dict[str, Any] = {}
+
+
+def _evaluate_swept_net(xes_path: str, model) -> Dict[str, Any]:
+    """Evaluate one swept Petri net (worker side; the log is compressed once per process)."""
+    from src.pm4py_pipeline.metrics import compress_variants, evaluate_model
 
+    if xes_path not in _SWEEP_LOGS:
+        _SWEEP_LOGS[xes_path] = compress_variants(load_log(Path(xes_path)))
+    net, im, fm = model
+    return evaluate_model(_SWEEP_LOGS[xes_path], net, im, fm)
+
+
+@profiled("heuristics.sweep")
+def run_sweep(xes_path: Path, out_dir: Path, args, cache: ArtifactCache, load=load_log) -> None:
+    """
+    Threshold sweep: log statistics (DFG, window-2 DFG, triples, activity counts) are
+    computed once, every threshold combination re-thresholds them into a heuristics net,
+    and each structurally distinct net is evaluated once. Writes the full table and
+    the Pareto front over fitness/precision/simplicity.
+    """
+    from src.pm4py_pipeline import heuristics_sweep, metrics as metrics_module
+    from src.pm4py_pipeline.heuristics_sweep import heuristics_stats, net_signature, to_petri, pareto_front
+    from src.pm4py_pipeline.metrics import compress_variants
+
+    log = load(xes_path)
+    traces, events = log_stats(log)
+    logger.info(f"Loaded log: {xes_path} | traces={traces} | events={events}")
+
+    t0 = time.perf_counter()
+    stats = heuristics_stats(log)
+    combos = param_grid(dependency_threshold=args.dependency, and_threshold=args.andthr,
+                        loop_two_threshold=args.loop2)
+    models: Dict[str, Any] = {}
+    rows: List[Dict[str, Any]] = []
+    for params in combos:
+        heu_net = stats.heuristics_net(**params)
+        sig = net_signature(heu_net)
+        if sig not in models:
+            models[sig] = to_petri(heu_net)
+        rows.append({**params, "model_id": sig})
+    logger.info(f"Sweep: {len(combos)} threshold combinations -> {len(models)} distinct nets "
+                f"({time.perf_counter() - t0:.2f}s discovery)")
+
+    # Evaluate each distinct net once (cached per net structure)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for sig, model in models.items():
+        key = cache.make_key("heuristics-sweep", inputs=[xes_path],
+                             params={"model_id": sig, "pm4py": package_version("pm4py")},
+                             code=[heuristics_sweep.__file__, metrics_module.__file__])
+        cached = cache.load(key)
+        if cached is not None:
+            results[sig] = cached
+        else:
+            pending.append((sig, key, model))
+
+    t1 = time.perf_counter()
+    if args.workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(pending))) as pool:
+            futures = [(sig, key, pool.submit(_evaluate_swept_net, str(xes_path), model))
+                       for sig, key, model in pending]
+            evaluated = [(sig, key, fut.result()) for sig, key, fut in futures]
+    else:
+        _SWEEP_LOGS[str(xes_path)] = compress_variants(log)
+        evaluated = [(sig, key, _evaluate_swept_net(str(xes_path), model)) for sig, key, model in pending]
+    for sig, key, res in evaluated:
+        cache.save(key, data=res)
+        results[sig] = res
+    logger.info(f"Evaluated {len(pending)} nets in {time.perf_counter() - t1:.1f}s "
+                f"({len(models) - len(pending)} from cache)")
+
+    for row in rows:
+        res = results[row["model_id"]]
+        row.update({k: res[k] for k in ("fitness", "precision", "f_score", "generalization",
+                                        "simplicity", "activated_coverage")})
+        row.update({k: res["model_info"][k] for k in ("places", "transitions", "arcs")})
+    for row, optimal in zip(rows, pareto_front(rows)):
+        row["pareto"] = optimal
+
+    table = pd.DataFrame(rows).sort_values(["pareto", "f_score"], ascending=False)
+    pareto = table[table["pareto"]]
+    table.to_csv(out_dir / "heuristics_sweep.csv", index=False, encoding="utf-8")
+    pareto.to_csv(out_dir / "heuristics_pareto.csv", index=False, encoding="utf-8")
+    with open(out_dir / "heuristics_sweep.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "xes_path": str(xes_path),
+            "log_info": {"traces": traces, "events": events},
+            "grid": {"dependency_threshold": args.dependency, "and_threshold": args.andthr,
+                     "loop_two_threshold": args.loop2},
+            "distinct_nets": len(models),
+            "results": table.to_dict(orient="records"),
+        }, f, indent=2, ensure_ascii=False)
+
+    logger.info(f"Pareto front ({len(pareto)} of {len(rows)} combinations):")
+    for r in pareto.itertuples():
+        logger.info(f"   dep={r.dependency_threshold} and={r.and_threshold} loop2={r.loop_two_threshold} | "
+                    f"fitness={r.fitness:.4f} precision={r.precision:.4f} simplicity={r.simplicity:.4f} "
+                    f"f_score={r.f_score:.4f}")
+    logger.info(f"Results saved: {out_dir / 'heuristics_sweep.csv'}")
+    logger.info(f"Results saved: {out_dir / 'heuristics_pareto.csv'}")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    """Command line arguments (without --sweep the thresholds are scalars)."""
     ap = argparse.ArgumentParser(
         description="Heuristics Miner on an XES log (+optional viz +metrics)."
     )
@@ -266,18 +341,47 @@ def main():
                     help="XES file path (default: data/xes/event_log_remaining_ALL.xes)")
     ap.add_argument("--viz", action="store_true",
                     help="If set, save Petri and heuristics net visualizations (requires Graphviz).")
-    ap.add_argument("--dependency", type=float, default=0.5,
-                    help="Heuristics Miner dependency_threshold (default 0.5)")
-    ap.add_argument("--andthr", type=float, default=0.65,
-                    help="Heuristics Miner and_threshold (default 0.65)")
-    ap.add_argument("--loop2", type=float, default=0.5,
-                    help="Heuristics Miner loop_two_threshold (default 0.5)")
+    ap.add_argument("--dependency", type=float, nargs="+", default=[0.5],
+                    help="Heuristics Miner dependency_threshold (default 0.5; several values with --sweep)")
+    ap.add_argument("--andthr", type=float, nargs="+", default=[0.65],
+                    help="Heuristics Miner and_threshold (default 0.65; several values with --sweep)")
+    ap.add_argument("--loop2", type=float, nargs="+", default=[0.5],
+                    help="Heuristics Miner loop_two_threshold (default 0.5; several values with --sweep)")
+    ap.add_argument("--sweep", action="store_true",
+                    help="Evaluate every threshold combination and write a Pareto table")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Worker processes for evaluating swept nets (default 1)")
     ap.add_argument("--output-dir", type=str, default=None,
                     help="Output directory for results (default: figures/heuristics)")
     ap.add_argument("--debug", action="store_true",
                     help="Enable debug output for token replay structure")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Disable the artifact cache (always rediscover and re-evaluate)")
+    ap.add_argument("--alignments", action="store_true",
+                    help="Also compute alignment-based fitness + precision (variants on a worker pool)")
+    ap.add_argument("--align-workers", type=int, default=None,
+                    help="Alignment worker processes (default: number of cores)")
+    ap.add_argument("--align-timeout", type=float, default=ALIGN_TIMEOUT_S,
+                    help=f"Per-variant alignment time budget in seconds (default {ALIGN_TIMEOUT_S:g}); "
+                         "token replay fallback when exceeded")
     
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
+    if not args.sweep:
+        if max(len(args.dependency), len(args.andthr), len(args.loop2)) > 1:
+            ap.error("multiple threshold values require --sweep")
+        args.dependency, args.andthr, args.loop2 = args.dependency[0], args.andthr[0], args.loop2[0]
+    return args
+
+
+def run(args: argparse.Namespace, load=load_log) -> Dict[str, Any] | None:
+    """
+    Run the Heuristics Miner with parsed arguments. `load` reads an XES log
+    (moodle-pm run passes a loader that shares one loaded log per run).
+    Returns the metrics (None for --sweep).
+    """
+    load_dotenv()
+    p = Paths()
+    p.ensure()
 
     # Resolve paths
     xes_path = Path(args.xes) if args.xes else (p.xes / "event_log_remaining_ALL.xes")
@@ -287,40 +391,62 @@ def main():
     out_dir = Path(args.output_dir) if args.output_dir else (p.figures / "heuristics")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    try:
-        # Load event log
-        log = pm4py.read_xes(str(xes_path))
-        logger.info(f"Loaded log: {xes_path} | traces={len(log)} | events={sum(len(trace) for trace in log)}")
-        
-        # Discover Petri net using Heuristics Miner
-        net, im, fm = discover_heuristics_petri(
-            log,
-            dependency_threshold=args.dependency,
-            and_threshold=args.andthr,
-            loop_two_threshold=args.loop2,
-        )
-
-        # Debug token replay structure if requested
-        if args.debug:
-            debug_token_replay_structure(log, net, im, fm)
-
-        # Generate visualizations if requested
-        if args.viz:
-            save_visualizations(log, net, im, fm, out_dir, vars(args))
-
-        # Compute metrics with fixed calculation
-        metrics = compute_metrics_fixed(log, net, im, fm)
-
-        save_petri_artifacts(net, im, fm, out_dir, basename="heuristics_petri")
+    if args.sweep:
+        run_sweep(xes_path, out_dir, args, ArtifactCache(p.cache, enabled=not args.no_cache), load=load)
+        return None
+
+    # Cache key: log content + thresholds + this module's and the metric modules' code; debug output is never cached
+    cache = ArtifactCache(p.cache, enabled=not (args.no_cache or args.debug))
+    cache_key = cache.make_key(
+        "heuristics",
+        inputs=[xes_path],
+        params={"dependency": args.dependency, "andthr": args.andthr, "loop2": args.loop2,
+                "viz": args.viz, "pm4py": package_version("pm4py"),
+                "alignments": args.alignments, "align_timeout": args.align_timeout},
+        code=[__file__, *EVAL_CODE],
+    )
+    align = ({"workers": args.align_workers, "timeout": args.align_timeout, "cache": cache}
+             if args.alignments else None)
+    artifacts = {name: out_dir / name
+                 for name in ("heuristics_petri.pnml", "heuristics_petri.png", "heuristics_net.png")}
 
+    try:
+        cached = cache.load(cache_key, artifacts)
+        if cached is not None:
+            log_info, metrics = cached["log_info"], cached["metrics"]
+        else:
+            # Load event log
+            log = load(xes_path)
+            traces, events = log_stats(log)
+            log_info = {"traces": traces, "events": events}
+            logger.info(f"Loaded log: {xes_path} | traces={log_info['traces']} | events={log_info['events']}")
+
+            # Discover Petri net using Heuristics Miner
+            net, im, fm, heu_net = discover_heuristics_petri(
+                log,
+                dependency_threshold=args.dependency,
+                and_threshold=args.andthr,
+                loop_two_threshold=args.loop2,
+            )
+
+            # Debug token replay structure if requested
+            if args.debug:
+                debug_token_replay_structure(log, net, im, fm)
+
+            # Generate visualizations if requested
+            if args.viz:
+                save_visualizations(heu_net, net, im, fm, out_dir)
+
+            # Compute metrics with fixed calculation
+            metrics = compute_metrics_fixed(log, net, im, fm, align=align)
+
+            save_petri_artifacts(net, im, fm, out_dir, basename="heuristics_petri")
+            cache.save(cache_key, artifacts, data={"log_info": log_info, "metrics": metrics})
 
         # Save results
         results = {
             "xes_path": str(xes_path),
-            "log_info": {
-                "traces": len(log),
-                "events": sum(len(trace) for trace in log)
-            },
+            "log_info": log_info,
             "parameters": {
                 "dependency_threshold": args.dependency,
                 "and_threshold": args.andthr,
@@ -339,8 +465,10 @@ def main():
         with open(csv_path, "w", encoding="utf-8") as f:
             f.write("metric,value\n")
             for k, v in metrics.items():
-                if k != "model_info":
+                if not isinstance(v, dict):
                     f.write(f"{k},{v}\n")
+            for k, v in metrics.get("alignment", {}).items():
+                f.write(f"alignment_{k},{v}\n")
 
         # Print summary
         logger.info("Heuristics Miner completed successfully")
@@ -351,12 +479,24 @@ def main():
         logger.info(f"   Simplicity:     {metrics['simplicity']:.4f}")
         logger.info(f"   Model: places={metrics['model_info']['places']}, "
                    f"transitions={metrics['model_info']['transitions']}, arcs={metrics['model_info']['arcs']}")
+        if "alignment" in metrics:
+            from src.pm4py_pipeline.alignments import summary_lines
+            for line in summary_lines(metrics["alignment"]):
+                logger.info(f"   {line}")
         logger.info(f"Results saved: {json_path}")
         logger.info(f"Results saved: {csv_path}")
 
     except Exception as e:
         logger.error(f"Heuristics Miner failed: {e}")
         raise
+    return metrics
+
+
+def main():
+    """Main execution function."""
+    # logging is configured by the entry point only (importing this module has no side effects)
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    run(parse_args())
 
 
 if __name__ == "__main__":
@@ -5,22 +5,20 @@ import json
 import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-import pm4py
 
 from src.utils.paths import Paths
+from src.pm4py_pipeline.xes_cache import load_log, log_stats
+from src.cache import ArtifactCache, package_version
+from src.pm4py_pipeline import xes_cache
+from src.pm4py_pipeline.config import ALIGN_TIMEOUT_S
+from src.utils.profiling import profile_stage, profiled
 
-# PM4Py 2.7+ kompatibilis metrikák
-from pm4py.algo.evaluation.replay_fitness import algorithm as fitness_eval
-from pm4py.algo.evaluation.precision import algorithm as precision_eval
-from pm4py.algo.evaluation.generalization import algorithm as generalization_eval
-from pm4py.algo.evaluation.simplicity import algorithm as simplicity_eval
-
-from pm4py.objects.conversion.process_tree import converter as pt_converter
-from pm4py.algo.discovery.inductive import algorithm as inductive_miner
+# A pm4py és a rá épülő modulok (közös kiértékelő, alignment) a használó függvényekben
+# töltődnek be: a --help és a cache-találat pm4py import nélkül fut.
+# A metrikák forrása (közös kiértékelő, alignment, XES olvasó) is a cache-kulcs része.
+EVAL_CODE = [Path(xes_cache.__file__).with_name(name) for name in ("metrics.py", "alignments.py", "xes_cache.py")]
 
 # --- Petri export helper (PNML + PNG) ---
-from pathlib import Path
-import pm4py
 
 def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
     """
@@ -28,6 +26,8 @@ def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
     out_dir/basename.pnml
     out_dir/basename.png
     """
+    import pm4py
+
     out_dir.mkdir(parents=True, exist_ok=True)
     pnml_path = out_dir / f"{basename}.pnml"
     png_path = out_dir / f"{basename}.png"
@@ -57,104 +57,117 @@ def save_petri_artifacts(net, im, fm, out_dir: Path, basename: str):
 
 
 
-def compute_metrics(log, net, im, fm) -> dict:
-    # Fitness (token-based)
-    try:
-        fit = fitness_eval.apply(log, net, im, fm, variant=fitness_eval.Variants.TOKEN_BASED)
-        fitness = float(fit.get("log_fitness", fit.get("average_trace_fitness", 0.0)))
-    except Exception:
-        # Fallback: token replay list átlag
-        from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
-        rep = token_replay.apply(log, net, im, fm)
-        vals = []
-        for r in rep:
-            if isinstance(r, dict):
-                if "trace_fitness" in r and isinstance(r["trace_fitness"], dict):
-                    vals.append(r["trace_fitness"].get("fitness", 0.0))
-                elif "fitness" in r:
-                    vals.append(float(r["fitness"]))
-        fitness = float(sum(vals) / len(vals)) if vals else 0.0
-
-    # Precision (ETConformance-token)
-    try:
-        precision = float(precision_eval.apply(log, net, im, fm, variant=precision_eval.Variants.ETCONFORMANCE_TOKEN))
-    except Exception:
-        precision = 0.0
+@profiled("inductive.metrics")
+def compute_metrics(log, net, im, fm, align: dict | None = None) -> dict:
+    # Közös kiértékelő (egy token replay / log–háló pár)
+    from src.pm4py_pipeline.metrics import (
+        compress_variants, replay_metrics, etc_precision, simplicity, f_score, model_info,
+    )
+    from src.pm4py_pipeline.alignments import alignment_metrics
 
-    # Generalization
+    # Variánsonként egy replay, gyakorisággal súlyozva
+    vlog = compress_variants(log)
+    print(f"   Variánsok: {vlog.n_variants} / {vlog.n_traces} trace (tömörítés {vlog.compression_ratio:.2f}×)")
+
+    # Fitness + generalization + aktivált lefedettség – egyetlen token replay-ből
     try:
-        generalization = float(generalization_eval.apply(log, net, im, fm))
+        rep = replay_metrics(vlog, net, im, fm)
+        fitness = rep["log_fitness"]
+        generalization = rep["generalization"]
+        coverage = rep["activated_coverage"]
     except Exception:
-        # Fallback: aktivált tranzíciók aránya
-        from pm4py.algo.conformance.tokenreplay import algorithm as token_rep
-        rep = token_rep.apply(log, net, im, fm)
-        activated = set()
-        for tr in rep:
-            if isinstance(tr, dict) and "activated_transitions" in tr:
-                activated.update(tr["activated_transitions"])
-        all_tr = {t.label for t in net.transitions if t.label}
-        generalization = float(len(activated) / len(all_tr)) if all_tr else 0.5
-
-    # Simplicity
+        fitness, generalization, coverage = 0.0, 0.5, 0.0
+
+    # Precision (ETConformance-token, saját prefix replay)
     try:
-        simplicity = float(simplicity_eval.apply(net))
+        precision = etc_precision(vlog, net, im, fm, variant="token")
     except Exception:
-        num_arcs = len(net.arcs)
-        denom = len(net.places) + len(net.transitions)
-        simplicity = 1.0 / (1.0 + (num_arcs / denom)) if denom else 0.5
-
-    # F-score (fitness & precision)
-    f_score = (2 * fitness * precision / (fitness + precision)) if (fitness > 0 and precision > 0) else 0.0
+        precision = 0.0
 
-    return {
+    metrics = {
         "fitness": fitness,
         "precision": precision,
         "generalization": generalization,
-        "simplicity": simplicity,
-        "f_score": f_score,
-        "model_info": {
-            "places": len(net.places),
-            "transitions": len(net.transitions),
-            "arcs": len(net.arcs),
-            "visible_transitions": len([t for t in net.transitions if t.label]),
-            "silent_transitions": len([t for t in net.transitions if not t.label]),
-        },
+        "activated_coverage": coverage,
+        "simplicity": simplicity(net),
+        "f_score": f_score(fitness, precision),
+        "model_info": model_info(net),
+        "variants": vlog.info(),
     }
 
+    # Alignment fitness + precision (opcionális; variánsonként, worker poolon, időkerettel)
+    if align is not None:
+        try:
+            metrics["alignment"] = alignment_metrics(vlog, net, im, fm, **align)
+        except Exception as e:
+            print(f"⚠️  Alignment kiértékelés sikertelen: {e}")
+    return metrics
 
-def main():
-    load_dotenv()
-    p = Paths()
-    p.ensure()
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     ap = argparse.ArgumentParser(description="Inductive Miner on an XES log (metrics only, no viz).")
     ap.add_argument("--xes", type=str, default=None,
                     help="XES path (default: data/xes/event_log_remaining_ALL.xes)")
     ap.add_argument("--out", type=str, default=None,
                     help="Output dir for metrics (default: figures/inductive)")
-    args = ap.parse_args()
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Artefaktum-cache kikapcsolása (mindig újrafelfedezés + kiértékelés)")
+    ap.add_argument("--alignments", action="store_true",
+                    help="Alignment alapú fitness + precision is (variánsonként, worker poolon)")
+    ap.add_argument("--align-workers", type=int, default=None,
+                    help="Alignment worker processzek száma (alapértelmezés: magok száma)")
+    ap.add_argument("--align-timeout", type=float, default=ALIGN_TIMEOUT_S,
+                    help=f"Időkeret variánsonként másodpercben (alapértelmezés: {ALIGN_TIMEOUT_S:g}); "
+                         "túllépésnél token replay fallback")
+    return ap.parse_args(argv)
+
+
+def run(args: argparse.Namespace, load=load_log) -> dict:
+    """
+    Felfedezés + metrikák a parser argumentumaival. load: XES → log betöltő
+    (a moodle-pm run futásonként egyszer betöltött, megosztott logot adja át).
+    """
+    load_dotenv()
+    p = Paths()
+    p.ensure()
 
     xes_path = Path(args.xes) if args.xes else (p.xes / "event_log_remaining_ALL.xes")
     if not xes_path.exists():
         raise SystemExit(f"XES not found: {xes_path}. Generate it first (python main_pm4py.py).")
 
-    log = pm4py.read_xes(str(xes_path))
-    print(f"📥 Log: {xes_path} | traces={len(log)} | events={sum(len(tr) for tr in log)}")
-
-    # Inductive Miner → process tree → Petri-net
-    pt = inductive_miner.apply(log)                 # process tree
-    net, im, fm = pt_converter.apply(pt)            # convert to Petri
-
-    # Petri-háló export (PNML + PNG)
     out_dir = Path(args.out) if args.out else (p.figures / "inductive")
     out_dir.mkdir(parents=True, exist_ok=True)
-    save_petri_artifacts(net, im, fm, out_dir, basename="inductive_petri")
-
-    # Metrics
-    metrics = compute_metrics(log, net, im, fm)
 
-    out_dir = Path(args.out) if args.out else (p.figures / "inductive")
-    out_dir.mkdir(parents=True, exist_ok=True)
+    # Cache: ugyanarra a logra + kódra a modell és a metrikák nem változnak
+    cache = ArtifactCache(p.cache, enabled=not args.no_cache)
+    cache_key = cache.make_key("inductive", inputs=[xes_path],
+                               params={"pm4py": package_version("pm4py"), "alignments": args.alignments,
+                                       "align_timeout": args.align_timeout},
+                               code=[__file__, *EVAL_CODE])
+    align = ({"workers": args.align_workers, "timeout": args.align_timeout, "cache": cache}
+             if args.alignments else None)
+    artifacts = {name: out_dir / name for name in ("inductive_petri.pnml", "inductive_petri.png")}
+
+    metrics = cache.load(cache_key, artifacts)
+    if metrics is None:
+        from pm4py.objects.conversion.process_tree import converter as pt_converter
+        from pm4py.algo.discovery.inductive import algorithm as inductive_miner
+
+        log = load(xes_path)
+        traces, events = log_stats(log)
+        print(f"📥 Log: {xes_path} | traces={traces} | events={events}")
+
+        # Inductive Miner → process tree → Petri-net
+        with profile_stage("inductive.discover", rows_in=events):
+            pt = inductive_miner.apply(log)             # process tree
+            net, im, fm = pt_converter.apply(pt)        # convert to Petri
+
+        # Petri-háló export (PNML + PNG)
+        save_petri_artifacts(net, im, fm, out_dir, basename="inductive_petri")
+
+        # Metrics
+        metrics = compute_metrics(log, net, im, fm, align=align)
+        cache.save(cache_key, artifacts, data=metrics)
 
     # Save JSON + CSV
     json_path = out_dir / "inductive_metrics.json"
@@ -166,9 +179,11 @@ def main():
     with open(csv_path, "w", encoding="utf-8") as f:
         f.write("metric,value\n")
         for k, v in metrics.items():
-            if k == "model_info":
+            if isinstance(v, dict):
                 continue
             f.write(f"{k},{v}\n")
+        for k, v in metrics.get("alignment", {}).items():
+            f.write(f"alignment_{k},{v}\n")
 
     print(" Inductive Miner done.")
     print(f"   Fitness:        {metrics['fitness']:.4f}")
@@ -178,7 +193,16 @@ def main():
     print(f"   Simplicity:     {metrics['simplicity']:.4f}")
     print(f"   Model: places={metrics['model_info']['places']}, "
           f"transitions={metrics['model_info']['transitions']}, arcs={metrics['model_info']['arcs']}")
+    if "alignment" in metrics:
+        from src.pm4py_pipeline.alignments import summary_lines
+        for line in summary_lines(metrics["alignment"]):
+            print(f"   {line}")
     print(f"💾 Saved: {json_path}\n💾 Saved: {csv_path}")
+    return metrics
+
+
+def main():
+    run(parse_args())
 
 
 if __name__ == "__main__":
@@ -1,82 +1,120 @@
+import argparse
+import json
+import pandas as pd
 from dotenv import load_dotenv
 from src.utils.paths import Paths
+from src.pm4py_pipeline import eventlog, weekly, abstraction, sessions
+from src.pm4py_pipeline.abstraction import GRANULARITIES, LABELS
+from src.pm4py_pipeline.sessions import SESSION_GAP, summarize_sessions
 from src.pm4py_pipeline.eventlog import (
     export_xes,
     export_weekly_xes,
-    weekly_counts_dataframe,
+    export_abstract_xes,
+    export_session_xes,
 )
-import pandas as pd
-
-
-def main():
+from src.pm4py_pipeline.weekly import weekly_aggregate
+from src.data_loading import read_store
+from src import slicing
+from src.slicing import RUN_COLS, collapse_runs
+from src.cache import ArtifactCache, package_version
+
+# az XES-ekhez szükséges tár-oszlopok
+XES_COLUMNS = ["user_id", "Uj_oszlop", "Idő_dt", "Tantervi_hét"]
+
+
+def cached_export(cache: ArtifactCache, stage: str, df, outputs: dict, build, **params):
+    """
+    Egy export lépés cache-elve: a kulcs a bemeneti DataFrame tartalma + paraméterek
+    + az eventlog modul forrása. Találatnál a kimeneti fájlok a cache-ből jönnek.
+    """
+    key = cache.make_key(stage, inputs=[df], params={"pm4py": package_version("pm4py"), **params},
+                         code=[eventlog.__file__, weekly.__file__, abstraction.__file__, sessions.__file__,
+                               slicing.__file__])
+    files = {path.name: path for path in outputs.values()}
+    if cache.load(key, files) is not None:
+        return
+    build()
+    cache.save(key, files, data={name: str(path) for name, path in outputs.items()})
+
+
+def main(use_cache: bool = True, granularities: tuple[str, ...] = (), label: str = "set",
+         window: str | None = None, gap: str = SESSION_GAP, with_sessions: bool = False,
+         df_store: pd.DataFrame | None = None):
+    """
+    df_store: a main_preprocess által már memóriában tartott köztes tár (moodle-pm run);
+    ha nincs megadva, a Parquet tárból olvasunk.
+    """
     load_dotenv()
     p = Paths()
     p.ensure()
+    cache = ArtifactCache(p.cache, enabled=use_cache)
 
     # A main_preprocess.py által előállított, már tisztított adat
-    df = pd.read_csv(p.processed / "df_remaining_export.csv")
+    # (típusos Parquet store, csak az XES-ekhez szükséges oszlopokkal)
+    if df_store is not None:
+        df = df_store[XES_COLUMNS]
+    else:
+        df = read_store(p.processed / "df_remaining_export.parquet", columns=XES_COLUMNS)
 
     # =====================================================================
     # 1) NAPI ESEMÉNYSZINTŰ XES – TELJES ADATBÁZIS
     # =====================================================================
-    export_xes(df, p.xes / "event_log_remaining_ALL.xes")
+    out = p.xes / "event_log_remaining_ALL.xes"
+    cached_export(cache, "xes_all", df, {"xes": out}, lambda: export_xes(df, out))
 
     # =====================================================================
     # 2) NAPI XES – SZÁMONKÉRÉS NÉLKÜLI ESEMÉNYEK
     # =====================================================================
     if "Uj_oszlop" in df.columns:
         df_no_exam = df[df["Uj_oszlop"] != "Szamonkeres"].copy()
-        export_xes(df_no_exam, p.xes / "event_log_remaining_NO_EXAM.xes")
+        out = p.xes / "event_log_remaining_NO_EXAM.xes"
+        cached_export(cache, "xes_no_exam", df_no_exam, {"xes": out}, lambda: export_xes(df_no_exam, out))
 
     # =====================================================================
     # 3) HETI BONTÁSÚ XES + HOZZÁ TARTOZÓ CSV-K (időbeli dinamika)
+    #    Mindhárom kimenet ugyanabból a heti aggregátumból jön; az aggregálás
+    #    csak az első cache-tévesztésnél fut le (egyetlen menet az adaton).
     # =====================================================================
+    weekly_agg = {}
+
+    def _agg():
+        if "agg" not in weekly_agg:
+            weekly_agg["agg"] = weekly_aggregate(df)
+        return weekly_agg["agg"]
+
+    def _weekly(out_xes, out_csv, include_category):
+        weekly_ev_df = export_weekly_xes(
+            df_src=df,
+            out_path=out_xes,
+            include_category=include_category,
+            weekly=_agg(),
+        )
+        weekly_ev_df.to_csv(out_csv, index=False, encoding="utf-8")
 
     # 3/a) Heti + kategória XES
-    weekly_log_cat, weekly_ev_cat_df = export_weekly_xes(
-        df_src=df,
-        out_path=p.xes / "event_log_weekly_with_category.xes",
-        include_category=True,
-    )
-    weekly_ev_cat_df.to_csv(
-        p.processed / "weekly_events_with_category.csv",
-        index=False,
-        encoding="utf-8",
-    )
+    outputs = {"xes": p.xes / "event_log_weekly_with_category.xes",
+               "csv": p.processed / "weekly_events_with_category.csv"}
+    cached_export(cache, "xes_weekly", df, outputs,
+                  lambda: _weekly(outputs["xes"], outputs["csv"], True), include_category=True)
 
     # 3/b) Tiszta heti XES (kategória nélkül)
-    weekly_log, weekly_ev_df = export_weekly_xes(
-        df_src=df,
-        out_path=p.xes / "event_log_weekly.xes",
-        include_category=False,
-    )
-    weekly_ev_df.to_csv(
-        p.processed / "weekly_events.csv",
-        index=False,
-        encoding="utf-8",
-    )
+    outputs = {"xes": p.xes / "event_log_weekly.xes",
+               "csv": p.processed / "weekly_events.csv"}
+    cached_export(cache, "xes_weekly", df, outputs,
+                  lambda: _weekly(outputs["xes"], outputs["csv"], False), include_category=False)
 
     # 3/c) Elemző tábla: user × év × hét × kategória → esemény darabszám
-    wk_counts = weekly_counts_dataframe(df)
-    wk_counts.to_csv(
-        p.processed / "weekly_counts_user_week_category.csv",
-        index=False,
-        encoding="utf-8",
-    )
-
-        # --- 4) NAPI XES – LOOP-MENTES LOG ---
-    # A main_preprocess.py által elmentett loop-mentes DF-ből (Idő_dt, Uj_oszlop, user_id)
-    no_loops_csv = p.processed / "df_remaining_no_loops.csv"
-    if no_loops_csv.exists():
-        df_no_loops = pd.read_csv(no_loops_csv)
-        # (opcionális, ha kell biztosan datetime)
-        if "Idő_dt" in df_no_loops.columns:
-            df_no_loops["Idő_dt"] = pd.to_datetime(df_no_loops["Idő_dt"], errors="coerce")
-        export_xes(df_no_loops, p.xes / "event_log_remaining_NO_LOOPS.xes")
-        print("✅ XES (loop-mentes) mentve: data/xes/event_log_remaining_NO_LOOPS.xes")
-    else:
-        print("⚠️ Nem található a loop-mentes CSV (data/processed/df_remaining_no_loops.csv). "
-            "Futtasd előbb a main_preprocess.py-t.")
+    out = p.processed / "weekly_counts_user_week_category.csv"
+    cached_export(cache, "weekly_counts", df, {"csv": out},
+                  lambda: _agg().counts_frame().to_csv(out, index=False, encoding="utf-8"))
+
+    # --- 4) NAPI XES – LOOP-MENTES LOG ---
+    # Közvetlenül a már betöltött tárból (run-length összevonás, CSV kerülő nélkül);
+    # a run hossza, utolsó ideje és a tartózkodási idő eseményattribútumként kerül a XES-be
+    out = p.xes / "event_log_remaining_NO_LOOPS.xes"
+    cached_export(cache, "xes_no_loops", df, {"xes": out},
+                  lambda: export_xes(collapse_runs(df), out, attrs=RUN_COLS))
+    print("✅ XES (loop-mentes) mentve: data/xes/event_log_remaining_NO_LOOPS.xes")
 
 
     # =====================================================================
@@ -94,10 +132,37 @@ def main():
     df_known_for_xes["Uj_oszlop"] = df_known_for_xes["Tantervi_hét"].astype(str)
 
     # 4/c) Export
-    export_xes(
-        df_known_for_xes,
-        p.xes / "event_log_TANTERVIHET_KNOWN_ONLY.xes",
-    )
+    out = p.xes / "event_log_TANTERVIHET_KNOWN_ONLY.xes"
+    cached_export(cache, "xes_known_weeks", df_known_for_xes, {"xes": out},
+                  lambda: export_xes(df_known_for_xes, out))
+
+    # =====================================================================
+    # 5) ABSZTRAHÁLT XES-EK (óra / nap / ablak / munkamenet) – kisebb logok a bányászathoz
+    # =====================================================================
+    for gran in granularities:
+        suffix = {"window": f"window_{window}", "session": f"session_{gap}"}.get(gran, gran)
+        out = p.xes / f"event_log_{suffix}_{label}.xes"
+        cached_export(cache, "xes_abstract", df, {"xes": out},
+                      lambda: export_abstract_xes(df, out, granularity=gran, label=label,
+                                                  window=window, gap=gap),
+                      granularity=gran, label=label, window=window, gap=gap)
+
+    # =====================================================================
+    # 6) MUNKAMENET-SZINTŰ XES (eset = felhasználó + munkamenet) + statisztika
+    # =====================================================================
+    if with_sessions:
+        def _sessions(out_xes, out_csv, out_json):
+            _, stats = export_session_xes(df, out_xes, gap=gap)
+            stats.to_csv(out_csv, index=False, encoding="utf-8")
+            out_json.write_text(json.dumps({"gap": gap, **summarize_sessions(stats)}, indent=2),
+                                encoding="utf-8")
+
+        outputs = {"xes": p.xes / f"event_log_sessions_{gap}.xes",
+                   "csv": p.processed / f"session_stats_{gap}.csv",
+                   "json": p.processed / f"session_summary_{gap}.json"}
+        cached_export(cache, "xes_sessions", df, outputs,
+                      lambda: _sessions(outputs["xes"], outputs["csv"], outputs["json"]), gap=gap)
+        print(f"   Munkamenetek: {outputs['json'].read_text(encoding='utf-8')}")
 
     # =====================================================================
 
@@ -105,4 +170,21 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="XES exportok + heti elemző CSV-k a feldolgozott tárból.")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Artefaktum-cache kikapcsolása (minden export újraszámolódik)")
+    ap.add_argument("--abstract", nargs="+", default=[], choices=GRANULARITIES, metavar="GRAN",
+                    help=f"Absztrahált XES-ek is készüljenek ezekkel a granularitásokkal: {', '.join(GRANULARITIES)}")
+    ap.add_argument("--label", choices=LABELS, default="set",
+                    help="Absztrakt esemény neve: kategória-halmaz / domináns kategória / kategóriánként (alap: set)")
+    ap.add_argument("--window", type=str, default=None,
+                    help='Ablakszélesség a "window" granularitáshoz (pl. 6h, 3D)')
+    ap.add_argument("--sessions", action="store_true",
+                    help="Munkamenet-szintű XES (eset = felhasználó + munkamenet) + munkamenet-statisztika")
+    ap.add_argument("--session-gap", type=str, default=SESSION_GAP,
+                    help=f"Inaktivitási rés a munkamenetekhez (alap: {SESSION_GAP})")
+    args = ap.parse_args()
+    if "window" in args.abstract and not args.window:
+        ap.error('a "window" granularitáshoz --window kell (pl. --window 6h)')
+    main(use_cache=not args.no_cache, granularities=tuple(args.abstract), label=args.label,
+         window=args.window, gap=args.session_gap, with_sessions=args.sessions)
@@ -3,27 +3,195 @@ import argparse
 from dotenv import load_dotenv
 import os
 import pandas as pd
+from functools import partial
 
 from src.utils.paths import Paths
-from src.data_loading import read_input_excel, parse_hu_datetime_series
+from src.data_loading import read_input, iter_input_chunks, parse_hu_datetime_series
 from src.cleaning import (
     add_extracted_ids,
     apply_time_window,
     apply_exclusions,
 )
-from src.categories import build_mapping
+from src.categories import build_mapping, add_category_column
 from src.slicing import (
     split_users,
     add_time_parts,
     label_orai_otthoni,
     build_slices,
+    collapse_runs,
+    extend_runs,
+    last_category_by_user,
 )
 from src.weekly_plan import attach_week_plan_columns
-from src.exports import save_csv, save_xlsx
+from src.exports import save_csv, save_xlsx, save_parquet, to_store_dtypes
+from src.data_loading import read_store
+from src.incremental import (
+    IngestState, RawRowFilter, STATE_FILE, load_state, save_state, select_new_rows, advance_state,
+)
 from src.transformations import reclassify_exam_to_admin_if_otthoni
+from src.pipeline import Stage, run_pipeline
+from src.utils.profiling import profiled
+
+# Felhasználók, akiket kiveszünk az elemzésből (oktatók, tesztfiókok)
+IDS_EXCLUDE = [96499, 605, 125110, 70866, 60896, 124612, 576]
+
+
+def clean_raw(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp,
+              exclusion_counts: dict[str, int] | None = None,
+              state: IngestState | None = None) -> pd.DataFrame:
+    """
+    Nyers (rész)tábla: dátum parse → (inkrementális: csak az új sorok) → időablak → ID-k →
+    kizárások. Soronként független.
+    """
+    df["Idő_dt"] = parse_hu_datetime_series(df["Idő"])  # robusztus HU datetime
+    df = select_new_rows(df, state)
+    df = apply_time_window(df, start, end)
+    df = add_extracted_ids(df, copy=False)
+    return apply_exclusions(df, counts=exclusion_counts)
+
+
+@profiled("preprocess.load_and_clean")
+def load_and_clean(src: Path, start: pd.Timestamp, end: pd.Timestamp, chunksize: int | None = None,
+                   exclusion_counts: dict[str, int] | None = None,
+                   state: IngestState | None = None, raw_filter: RawRowFilter | None = None) -> pd.DataFrame:
+    """
+    Beolvasás + tisztítás. chunksize megadásakor streaming mód: a bemenetet darabonként
+    olvassuk és tisztítjuk, így a csúcsmemória a chunk méretével arányos, nem a fájléval.
+
+    Inkrementális módban (state) a már feldolgozott sorok a tisztítás előtt kiesnek:
+    raw_filter a nyers sorokat az előző export fej-blokkjáig engedi át (utána a
+    streaming beolvasás leáll), a vízjel-szűrés pedig közvetlenül a dátum parse után jön.
+    """
+    if not chunksize:
+        raw = read_input(src)
+        n_raw = len(raw)
+        if raw_filter is not None:
+            raw = raw_filter(raw)
+        df = clean_raw(raw, start, end, exclusion_counts, state=state)
+        _report_new_rows(state, raw_filter, n_raw, df)
+        return df
+
+    parts = []
+    n_raw = 0
+    for chunk in iter_input_chunks(src, chunksize=chunksize):
+        n_raw += len(chunk)
+        if raw_filter is not None:
+            chunk = raw_filter(chunk)
+        parts.append(clean_raw(chunk, start, end, exclusion_counts, state=state))
+        if raw_filter is not None and raw_filter.done:
+            break
+    print(f"Streaming beolvasás: {n_raw} nyers sor, {len(parts)} chunk")
+    if not parts:
+        raise SystemExit(f"Üres bemenet: {src}")
+    df = pd.concat(parts)
+    _report_new_rows(state, raw_filter, n_raw, df)
+    return df
+
+
+def _report_new_rows(state: IngestState | None, raw_filter: RawRowFilter | None,
+                     n_raw: int, df: pd.DataFrame) -> None:
+    if state is None:
+        return
+    where = (f"az előző export kezdete a(z) {raw_filter.skipped_from}. nyers sornál"
+             if raw_filter is not None and raw_filter.skipped_from is not None
+             else "az előző export kezdete nem található, vízjel-szűrés")
+    print(f"Inkrementális mód: {len(df)} új sor a tisztítás után ({n_raw} nyers sor beolvasva, "
+          f"{where}, vízjel: {state.watermark})")
 
 
-def main(input_path: str | None = None):
+def _week_catalog(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df[["Eseménykörnyezet", "Tantervi_hét", "Tantervi_hét_szám"]]
+        .drop_duplicates()
+        .sort_values(["Tantervi_hét_szám", "Tantervi_hét", "Eseménykörnyezet"], na_position="last")
+    )
+
+
+def preprocess_stages(mapping: dict[str, str], ids_exclude: list[int],
+                      state: IngestState | None = None) -> list[Stage]:
+    """
+    A tisztított eseménytábla feldolgozási lépései (olvasott/írt oszlopokkal).
+    state megadásakor (inkrementális mód) csak a még fel nem dolgozott sorok mennek tovább.
+    """
+    # az IP-cím opcionális (hiányában minden sor "Egyéb helyen"), ezért nem kötelező bemenet
+    label = Stage("label_orai_otthoni", partial(label_orai_otthoni, copy=False),
+                  reads=("Idő_dt", "Uj_oszlop"), writes=("Munka_típus", "lokacio", "Munka_3utas"))
+    last_seen = state.last_category if state is not None else None
+    return [
+        # --- Inkrementális mód: az új vízjel (az új sorokat már a load_and_clean választja ki) ---
+        Stage("ingest_state", partial(advance_state, state), reads=("Idő_dt",), output="ingest_state"),
+        Stage("kategoriak", partial(add_category_column, mapping=mapping, copy=False),
+              reads=("Eseménykörnyezet",), writes=("Uj_oszlop",)),
+        # --- Felhasználó szeletek (sorszűrés) ---
+        Stage("split_users", lambda d: split_users(d, ids_exclude)[1], reads=("user_id",)),
+        # --- Időrészek (hónap/hét/nap/óra) ---
+        Stage("add_time_parts", partial(add_time_parts, copy=False),
+              reads=("Idő_dt",), writes=("Idő_dt", "hónap", "hét", "nap", "óra")),
+        # --- Órai vs Otthoni címke + keresztmetszet ---
+        label,
+        # --- Tantervi hét hozzárendelése ---
+        Stage("tantervi_het", partial(attach_week_plan_columns, src_col="Eseménykörnyezet",
+                                      label_col="Tantervi_hét", num_col="Tantervi_hét_szám", copy=False),
+              reads=("Eseménykörnyezet",), writes=("Tantervi_hét", "Tantervi_hét_szám")),
+        Stage("katalogus", _week_catalog, reads=("Eseménykörnyezet", "Tantervi_hét", "Tantervi_hét_szám"),
+              output="catalog"),
+        # --- Szeletek előállítása (a reclassify előtti állapotból) ---
+        Stage("build_slices", build_slices, reads=("user_id", "Uj_oszlop"), output="slices"),
+        # a korábbi main ismételt címkézése – a futtató redundánsként kihagyja
+        label,
+        # --- Számonkérés → Admin, ha Otthoni lenne ---
+        Stage("reclassify_exam", partial(reclassify_exam_to_admin_if_otthoni, exam_label="Szamonkeres",
+                                         admin_label="Admin", copy=False),
+              reads=("Uj_oszlop", "Munka_típus"), writes=("Uj_oszlop",)),
+        # loop-mentes szelet run-length kódolással (run hossz, utolsó idő, tartózkodási idő)
+        # (inkrementális módban: (új runok, az előző futás runjainak folytatásai))
+        Stage("no_loops", partial(collapse_runs, last_seen=last_seen, return_continued=state is not None),
+              reads=("Idő_dt", "Uj_oszlop", "user_id"), output="no_loops"),
+    ]
+
+
+def _append_incremental(p: Paths, df_new: pd.DataFrame, no_loops_new: pd.DataFrame,
+                        no_loops_continued: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
+    """
+    Új sorok hozzáfűzése a köztes tárhoz és a CSV-khez. A szeleteket és a katalógust
+    az összefűzött tárból építjük újra: egy új Extra esemény a hallgató teljes
+    korábbi történetét átsorolja az extra szeletekbe. A határon átnyúló runok
+    (no_loops_continued) a tárolt runt hosszabbítják meg.
+
+    Az összefűzött tár sorrendje a teljes futásé: az export a legfrissebb sorokkal kezdődik,
+    ezért az új sorok a tár elejére kerülnek; a loop-mentes runok felhasználó, majd idő
+    szerint rendezettek (mint a collapse_runs kimenete). A CSV-k ezért teljesen újraíródnak.
+    Visszatér: az összefűzött köztes tár (df_remaining_export).
+    """
+    store = p.processed / "df_remaining_export.parquet"
+    df_all = pd.concat([to_store_dtypes(df_new), read_store(store)], ignore_index=True)
+    save_parquet(df_all, store)
+    save_csv(df_all, p.processed / "df_remaining_export.csv")
+
+    store = p.processed / "df_remaining_no_loops.parquet"
+    runs = extend_runs(read_store(store), no_loops_continued)
+    runs = (
+        pd.concat([runs, to_store_dtypes(no_loops_new)], ignore_index=True)
+        .sort_values(["user_id", "Idő_dt"], kind="stable", na_position="last", ignore_index=True)
+    )
+    save_parquet(runs, store)
+    save_csv(runs, p.processed / "df_remaining_no_loops.csv")
+    print("XLSX exportok inkrementális módban nem frissülnek (teljes futás frissíti őket).")
+
+    save_csv(_week_catalog(df_all), p.processed / "event_week_catalog.csv")
+    # a szeletek a reclassify előtti kategóriákból készülnek (mint a teljes futásban)
+    for name, dfx in build_slices(add_category_column(df_all, mapping)).items():
+        save_csv(dfx, p.processed / f"{name}.csv")
+    return df_all
+
+
+def main(input_path: str | None = None, chunksize: int | None = None,
+         incremental: bool = False) -> pd.DataFrame | None:
+    """
+    Visszatér: a típusos köztes tár (df_remaining_export, ugyanaz, mint a read_store kimenete),
+    hogy a downstream lépések (moodle-pm run) újraolvasás nélkül folytathassák;
+    inkrementális módban None, ha nem volt új sor.
+    """
     load_dotenv()
 
     # --- Paths ---
@@ -36,81 +204,74 @@ def main(input_path: str | None = None):
         raise SystemExit("Nincs megadva INPUT_XLSX sem argumentumban, sem .env fájlban.")
     src = Path(src)
 
-    print(f"Beolvasás: {src}")
-    df = read_input_excel(src)
-
-    # --- Dátum + szűrés ---
-    df["Idő_dt"] = parse_hu_datetime_series(df["Idő"])  # robusztus HU datetime
-
     start = pd.to_datetime(os.getenv("START_DATE", "2025-02-17 00:00:00"))
     end   = pd.to_datetime(os.getenv("END_DATE",   "2025-06-23 23:59:59"))
-    df = apply_time_window(df, start, end)
 
-    # --- ID-k + kizárások ---
-    df = add_extracted_ids(df)
-    df = apply_exclusions(df)
+    # --- Inkrementális állapot (vízjel + határ-hashek + utolsó kategóriák) ---
+    state_path = p.processed / STATE_FILE
+    state = load_state(state_path) if incremental else None
+    if incremental and state is None:
+        print("Inkrementális mód: nincs korábbi állapot, teljes feldolgozás.")
 
-    # --- Kategóriák ---
+    # --- Beolvasás + dátum + szűrés + ID-k + kizárások ---
+    print(f"Beolvasás: {src}")
+    exclusion_counts: dict[str, int] = {}
     mapping = build_mapping()
-    df["Uj_oszlop"] = df["Eseménykörnyezet"].map(mapping).fillna("Egyéb")
-
-    # --- Felhasználó szeletek ---
-    ids_exclude = [96499, 605, 125110, 70866, 60896, 124612, 576]
-    df_masik_users, df_remaining = split_users(df, ids_exclude)
-
-    # --- Időrészek (hónap/hét/nap/óra) ---
-    df_remaining = add_time_parts(df_remaining)
+    # a mostani export fej-blokkja (következő inkrementális futáshoz) + a már feldolgozott rész levágása
+    raw_filter = RawRowFilter(state)
 
-    # --- Órai vs Otthoni címke + keresztmetszet ---
-    df_remaining = label_orai_otthoni(df_remaining)
-
-    # === ÚJ: Tantervi hét hozzárendelése ===
-    df_remaining = attach_week_plan_columns(
-        df_remaining,
-        src_col="Eseménykörnyezet",      # innen olvassuk a mapping kulcsot
-        label_col="Tantervi_hét",        # új oszlop (string)
-        num_col="Tantervi_hét_szám"      # új oszlop (int/NA)
+    # --- Kategóriák → szeletek → címkék (egy frame-en, helyben bővítve) ---
+    # a betöltött frame-re csak a pipeline tart referenciát, így a sorszűrés után felszabadul
+    df_remaining, outputs = run_pipeline(
+        load_and_clean(src, start, end, chunksize=chunksize, exclusion_counts=exclusion_counts,
+                       state=state, raw_filter=raw_filter),
+        preprocess_stages(mapping, IDS_EXCLUDE, state=state),
     )
+    new_state = outputs["ingest_state"]
+    new_state.last_category.update(last_category_by_user(df_remaining))
+    if raw_filter.head:
+        new_state.head = raw_filter.head
 
-    # opcionális: exportálunk egy katalógust is, hogy lásd a fedettséget
-    catalog = (
-        df_remaining[["Eseménykörnyezet", "Tantervi_hét", "Tantervi_hét_szám"]]
-        .drop_duplicates()
-        .sort_values(["Tantervi_hét_szám", "Tantervi_hét", "Eseménykörnyezet"], na_position="last")
-    )
-    save_csv(catalog, p.processed / "event_week_catalog.csv")
-
-    # --- Szeletek előállítása ---
-    slices = build_slices(df_remaining)
-
-    # --- Órai vs Otthoni címke + keresztmetszet ---
-    df_remaining = label_orai_otthoni(df_remaining)
-
-    # --- Számonkérés → Admin, ha Otthoni lenne ---
-    df_remaining = reclassify_exam_to_admin_if_otthoni(
-        df_remaining,
-        exam_label="Szamonkeres",   # ha más a pontos címke, itt módosítsd
-        admin_label="Admin"
-        )
-    
-    # Loop-mentes változat: egymást közvetlenül követő azonos Uj_oszlop értékek eldobása
-    mask_no_loops = df_remaining["Uj_oszlop"].ne(
-        df_remaining.groupby("user_id")["Uj_oszlop"].shift()
+    # kizárási riport (auditáláshoz): szabályonként eltávolított sorok – az állapotban
+    # összesítve, hogy inkrementális módban is a tár teljes történetét fedje, ne csak ezt a futást
+    for rule, n in exclusion_counts.items():
+        new_state.exclusions[rule] = new_state.exclusions.get(rule, 0) + n
+    excl_report = (
+        pd.DataFrame(list(new_state.exclusions.items()), columns=["szabaly", "eltavolitott_sorok"])
+        .query("eltavolitott_sorok > 0")
+        .sort_values("eltavolitott_sorok", ascending=False)
     )
+    print(f"Kizárások: {int(excl_report['eltavolitott_sorok'].sum())} sor eltávolítva "
+          f"(ebből ebben a futásban {sum(exclusion_counts.values())}), "
+          f"{len(excl_report)} szabály érintett")
+    save_csv(excl_report, p.processed / "exclusion_report.csv")
 
-    df_no_loops = (
-        df_remaining.loc[mask_no_loops, ["Idő_dt", "Uj_oszlop", "user_id"]]
-        .reset_index(drop=True)
-    )
+    if state is not None:
+        store = None
+        if df_remaining.empty:
+            print("Nincs új feldolgozandó sor.")
+        else:
+            store = _append_incremental(p, df_remaining, *outputs["no_loops"], mapping)
+        save_state(new_state, state_path)
+        print("Inkrementális előfeldolgozás kész. Kimenetek a data/processed mappában.")
+        return store
+
+    # opcionális: exportálunk egy katalógust is, hogy lásd a fedettséget
+    save_csv(outputs["catalog"], p.processed / "event_week_catalog.csv")
+    slices = outputs["slices"]
+    df_no_loops = outputs["no_loops"]
 
     # Külön elmentjük
-    p = Paths()
+    save_parquet(df_no_loops, p.processed / "df_remaining_no_loops.parquet")
     save_csv(df_no_loops, p.processed / "df_remaining_no_loops.csv")
     save_xlsx(df_no_loops, p.processed / "df_remaining_no_loops.xlsx")
 
     print("▶ Loop-mentes dataframe előállítva: df_remaining_no_loops.*")
 
     # --- Exportok ---
+    # típusos köztes tár: ezt olvassa a main_analysis.py és a main_pm4py.py
+    store = to_store_dtypes(df_remaining).reset_index(drop=True)
+    save_parquet(store, p.processed / "df_remaining_export.parquet")
     save_csv(df_remaining, p.processed / "df_remaining_export.csv")
     try:
         save_xlsx(df_remaining, p.processed / "df_remaining_export.xlsx")
@@ -122,15 +283,18 @@ def main(input_path: str | None = None):
     for name, dfx in slices.items():
         save_csv(dfx, p.processed / f"{name}.csv")
 
-    df_known_weeks = df_remaining[df_remaining["Tantervi_hét"] != "Ismeretlen"].copy()
-
-
+    save_state(new_state, state_path)
     print("Előfeldolgozás kész. Kimenetek a data/processed mappában.")
+    return store
 
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
-    ap.add_argument("--input", type=str, default=None, help="Bemeneti Excel útvonala")
+    ap.add_argument("--input", type=str, default=None, help="Bemeneti Moodle export (.xlsx vagy .csv) útvonala")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help="Streaming beolvasás ennyi soros darabokban (XLSX vagy Moodle CSV export)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Csak az előző futás óta hozzáadott sorok feldolgozása és hozzáfűzése")
     args = ap.parse_args()
-    main(args.input)
+    main(args.input, chunksize=args.chunksize, incremental=args.incremental)
 
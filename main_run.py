@@ -0,0 +1,183 @@
+# main_run.py – a teljes pipeline egy parancsként: moodle-pm run
+"""
+A main_*.py lépések függőségi gráfként (src.dag):
+
+    preprocess ─┬─ analysis
+                └─ xes ─┬─ alpha
+                        ├─ alpha-metrics
+                        ├─ heuristics
+                        ├─ inductive
+                        └─ fuzzy
+
+- a köztes tár (df_remaining_export) a preprocess után memóriában megy tovább az
+  analysis és az xes lépésnek; a bányászok bemeneti XES-ét (alap: ALL) egyszer töltjük be, közösen kapják,
+- a független ágak párhuzamosan futnak (--jobs),
+- csak azok a lépések futnak újra, amelyek bemenete, kódja vagy valamely felmenője változott
+  (a lépéseken belüli artefaktum-cache ezen felül is érvényes).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+import main_alpha
+import main_alpha_metrics
+import main_analysis
+import main_fuzzy
+import main_heuristics
+import main_inductive
+import main_pm4py
+import main_preprocess
+from src.cache import ArtifactCache, package_version
+from src.dag import Task, run_dag, select
+from src.data_loading import read_store
+from src.pm4py_pipeline.xes_cache import load_log
+from src.utils.paths import Paths
+
+ROOT = Path(__file__).resolve().parent
+
+# az xes lépés állandó kimenetei (a kihagyáshoz ezeknek létezniük kell)
+XES_OUTPUTS = (
+    "event_log_remaining_ALL.xes",
+    "event_log_remaining_NO_EXAM.xes",
+    "event_log_weekly_with_category.xes",
+    "event_log_weekly.xes",
+    "event_log_remaining_NO_LOOPS.xes",
+    "event_log_TANTERVIHET_KNOWN_ONLY.xes",
+)
+
+# bányász task → (modul, fő kimenet a figures/ alatt, támogatja-e a --no-cache kapcsolót)
+MINERS = {
+    "alpha": (main_alpha, "alpha/alpha_miner_petri.png", False),
+    "alpha-metrics": (main_alpha_metrics, "alpha/alpha_metrics.json", True),
+    "heuristics": (main_heuristics, "heuristics/heuristics_metrics.json", True),
+    "inductive": (main_inductive, "inductive/inductive_metrics.json", True),
+    "fuzzy": (main_fuzzy, "fuzzy/fuzzy_nodes.csv", False),
+}
+
+TASK_NAMES = ("preprocess", "analysis", "xes", *MINERS)
+
+
+class SharedLogs:
+    """XES → betöltött log, futásonként egyszer; a bányász-ágak közösen használják."""
+
+    def __init__(self):
+        self._logs = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, xes_path):
+        key = str(Path(xes_path).resolve())
+        with self._lock:
+            if key not in self._logs:
+                self._logs[key] = load_log(Path(xes_path))
+        # sekély másolat: ha egy bányász oszlopot ad a loghoz, az a közös példányt nem érinti
+        return self._logs[key].copy(deep=False)
+
+
+def _code(*patterns: str) -> tuple[Path, ...]:
+    return tuple(sorted(f for pat in patterns for f in ROOT.glob(pat)))
+
+
+def build_tasks(p: Paths, args: argparse.Namespace) -> list[Task]:
+    use_cache = not args.no_cache
+    store_path = p.processed / "df_remaining_export.parquet"
+    miner_xes = p.xes / args.xes
+
+    src = args.input or os.getenv("INPUT_XLSX")
+    if src:
+        def preprocess(_):
+            store = main_preprocess.main(src, chunksize=args.chunksize)
+            return store if store is not None else read_store(store_path)
+
+        pre = Task("preprocess", preprocess, restore=lambda: read_store(store_path),
+                   inputs=(Path(src),),
+                   params={"start": os.getenv("START_DATE"), "end": os.getenv("END_DATE")},
+                   code=_code("main_preprocess.py", "src/*.py"), outputs=(store_path,))
+    else:
+        # nyers bemenet nélkül a meglévő köztes tár a gráf forrása
+        print(f"ℹ️  Nincs INPUT_XLSX / --input: a meglévő köztes tárból indulunk ({store_path})")
+        pre = Task("preprocess", lambda _: read_store(store_path), restore=lambda: read_store(store_path),
+                   inputs=(store_path,), outputs=(store_path,))
+
+    tasks = [
+        pre,
+        Task("analysis",
+             lambda r: main_analysis.main(workers=args.workers, use_cache=use_cache, df_remaining=r["preprocess"]),
+             deps=("preprocess",), code=_code("main_analysis.py", "src/analysis/*.py"),
+             outputs=(p.figures / "render_report.json",)),
+        Task("xes",
+             lambda r: main_pm4py.main(use_cache=use_cache, df_store=r["preprocess"]),
+             deps=("preprocess",),
+             code=_code("main_pm4py.py", "src/slicing.py", "src/pm4py_pipeline/*.py"),
+             outputs=tuple(p.xes / name for name in XES_OUTPUTS), imports=("pm4py",)),
+    ]
+
+    logs = SharedLogs()
+    for name, (module, output, has_no_cache) in MINERS.items():
+        argv = ["--xes", str(miner_xes)] + (["--no-cache"] if has_no_cache and args.no_cache else [])
+
+        def mine(_, module=module, argv=argv):
+            return module.run(module.parse_args(argv), load=logs)
+
+        tasks.append(Task(name, mine, deps=("xes",),
+                          params={"pm4py": package_version("pm4py"), "xes": args.xes},
+                          code=_code(Path(module.__file__).name, "src/pm4py_pipeline/*.py"),
+                          outputs=(p.figures / output,), imports=("pm4py",)))
+    return tasks
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(
+        description="A teljes pipeline függőségi gráfként: párhuzamos ágak, csak a változott lépések futnak.")
+    ap.add_argument("--stages", nargs="+", choices=TASK_NAMES, default=None, metavar="LÉPÉS",
+                    help=f"Csak ezek (+ a felmenőik): {', '.join(TASK_NAMES)}")
+    ap.add_argument("--jobs", type=int, default=4, help="Párhuzamosan futó lépések száma (alap: 4)")
+    ap.add_argument("--force", action="store_true",
+                    help="Minden kiválasztott lépés fusson (a lépéseken belüli cache marad)")
+    ap.add_argument("--dry-run", action="store_true", help="Csak a terv: mely lépések futnának")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Cache kikapcsolása a gráf szintjén és a lépéseken belül is")
+    ap.add_argument("--input", type=str, default=None, help="Nyers bemenet (alap: INPUT_XLSX)")
+    ap.add_argument("--chunksize", type=int, default=None, help="Streaming beolvasás darabmérete")
+    ap.add_argument("--xes", type=str, default=XES_OUTPUTS[0],
+                    help=f"A bányászok bemenete a data/xes alól (alap: {XES_OUTPUTS[0]})")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Ábra-renderelő processzek száma (alap: magok száma)")
+    args = ap.parse_args(argv)
+
+    load_dotenv()
+    # a bányászok (heuristics) logging-kimenete: a belépési pont konfigurál, nem az import
+    logging.basicConfig(level=logging.INFO, format=main_heuristics.LOG_FORMAT)
+    p = Paths()
+    p.ensure()
+
+    if args.jobs > 1 and "forkserver" in multiprocessing.get_all_start_methods():
+        # a szálakból indított process poolok (ábrák, alignment) ne a többszálú processzt forkolják
+        multiprocessing.set_start_method("forkserver", force=True)
+
+    cache = ArtifactCache(p.cache, enabled=not args.no_cache)
+    tasks = select(build_tasks(p, args), args.stages)
+    report = run_dag(tasks, cache, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    if args.dry_run:
+        return
+
+    report_path = p.figures / "run_report.json"
+    report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    failed = [r["task"] for r in report if r["status"] in ("error", "blocked")]
+    ran = [r for r in report if r["status"] == "ok"]
+    print(f"Futás: {len(ran)} lépés lefutott ({sum(r['seconds'] for r in ran):.1f}s), "
+          f"{sum(r['status'] == 'skip' for r in report)} változatlan, {len(failed)} hibás/kimaradt "
+          f"| riport: {report_path}")
+    if failed:
+        raise SystemExit(f"❌ Sikertelen lépések: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
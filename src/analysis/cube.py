@@ -0,0 +1,88 @@
+"""
+Közös előaggregált kocka az elemző ábrákhoz.
+
+Az ábrák mind (időrész × címke) → eseményszám táblákat rajzolnak; ezeket korábban minden
+függvény külön dropna().groupby().size().unstack() menettel számolta a teljes eseménytáblán.
+A kocka egyetlen groupby-jal készül:
+
+    hónap × hét × óra × év-hónap × Uj_oszlop × Munka_típus × Munka_3utas → darabszám
+
+(hiányzó értékek is külön cellát kapnak), és minden ábra ebből marginalizál; az ábrázolás
+költsége így a cellák számától függ, nem az eseményekétől.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.data_loading import as_datetime
+
+TIME_PARTS = ("hónap", "hét", "óra")
+LABELS = ("Uj_oszlop", "Munka_típus", "Munka_3utas")
+
+# év-hónap dimenzió (yyyymm egész; a havi ábrához)
+YEAR_MONTH = "_ym"
+
+
+@dataclass
+class AggCube:
+    counts: pd.DataFrame                  # a dimenzió-oszlopok + "n"
+    dims: tuple[str, ...]
+    t_min: pd.Timestamp | None = None     # az Idő_dt tartománya (a havi ábra hónaplistájához)
+    t_max: pd.Timestamp | None = None
+
+    def __contains__(self, col: str) -> bool:
+        return col in self.dims
+
+    def table(self, part: str, label: str) -> pd.DataFrame:
+        """
+        part × label eseményszám-tábla (sorok: part, oszlopok: label), ugyanaz, mint
+        df.dropna(subset=[part, label]).groupby([part, label]).size().unstack(fill_value=0).sort_index().
+        """
+        c = self.counts.dropna(subset=[part, label])
+        return (c.groupby([part, label], observed=True)["n"].sum()
+                 .unstack(fill_value=0)
+                 .sort_index())
+
+    def monthly(self, label: str) -> pd.DataFrame:
+        """Év-hónap ('YYYY-MM') × label tábla, a teljes Idő_dt tartomány minden hónapjával."""
+        if self.t_min is None:
+            return pd.DataFrame()
+        t = self.table(YEAR_MONTH, label)
+        t.index = [f"{ym // 100:04d}-{ym % 100:02d}" for ym in t.index.astype(int)]
+        all_months = pd.date_range(start=self.t_min.replace(day=1), end=self.t_max.replace(day=1),
+                                   freq="MS").strftime("%Y-%m").tolist()
+        return t.reindex(all_months, fill_value=0)
+
+
+def build_cube(df: pd.DataFrame, parts: tuple[str, ...] = TIME_PARTS,
+               labels: tuple[str, ...] = LABELS) -> AggCube:
+    """Az eseménytábla → AggCube, egyetlen groupby-jal (csak a meglévő oszlopokra)."""
+    keys = pd.DataFrame(index=df.index)
+    for col in (*parts, *labels):
+        if col in df.columns:
+            keys[col] = df[col]
+
+    t_min = t_max = None
+    if "Idő_dt" in df.columns:
+        ts = as_datetime(df["Idő_dt"])
+        ym = ts.dt.year * 100 + ts.dt.month
+        keys[YEAR_MONTH] = ym.astype("Int64") if ym.isna().any() else ym.astype(np.int64)
+        if ts.notna().any():
+            t_min, t_max = ts.min(), ts.max()
+
+    dims = tuple(keys.columns)
+    if not dims:
+        return AggCube(pd.DataFrame({"n": [len(df)]}), dims, t_min, t_max)
+    counts = (keys.groupby(list(dims), observed=True, dropna=False, sort=False)
+                  .size()
+                  .rename("n")
+                  .reset_index())
+    return AggCube(counts, dims, t_min, t_max)
+
+
+def as_cube(data: pd.DataFrame | AggCube) -> AggCube:
+    """A plot függvények bemenete: kész kocka, vagy eseménytábla (ekkor itt épül fel)."""
+    return data if isinstance(data, AggCube) else build_cube(data)
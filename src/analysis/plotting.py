@@ -5,6 +5,9 @@ from datetime import time
 from pathlib import Path
 import matplotlib.dates as mdates
 
+from src.analysis.cube import AggCube, as_cube
+from src.utils.profiling import profiled
+
 # =============================================================================
 # STYLUS BEÁLLÍTÁSOK
 # =============================================================================
@@ -95,9 +98,11 @@ def _create_legend_plot(colors_dict, title, ax):
 # FŐ PLOTTING FUNKCIÓK - LEGENDÁVAL
 # =============================================================================
 
-def save_four_subplots_category(df: pd.DataFrame, out_dir: Path):
+@profiled("plot.save_four_subplots_category")
+def save_four_subplots_category(data: pd.DataFrame | AggCube, out_dir: Path):
     """4 alminta kategóriák szerint - 4. helyén legenda"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     axes = axes.flatten()
@@ -106,18 +111,14 @@ def save_four_subplots_category(df: pd.DataFrame, out_dir: Path):
     
     # Első 3 ábra - adatok
     for i, col in enumerate(parts):
-        if col not in df.columns:
+        if col not in cube:
             axes[i].axis("off")
             axes[i].text(0.5, 0.5, f"Hiányzik: {col}", 
                         ha="center", va="center", transform=axes[i].transAxes)
             continue
             
         # Adatok előkészítése
-        grouped = (df.dropna(subset=[col, "Uj_oszlop"])
-                  .groupby([col, "Uj_oszlop"])
-                  .size()
-                  .unstack(fill_value=0)
-                  .sort_index())
+        grouped = cube.table(col, "Uj_oszlop")
         
         if grouped.empty:
             axes[i].text(0.5, 0.5, f"Nincs adat: {col}", 
@@ -143,9 +144,11 @@ def save_four_subplots_category(df: pd.DataFrame, out_dir: Path):
     plt.savefig(out_path, dpi=300, bbox_inches='tight')
     plt.close()
 
-def save_four_subplots_orai(df: pd.DataFrame, out_dir: Path):
+@profiled("plot.save_four_subplots_orai")
+def save_four_subplots_orai(data: pd.DataFrame | AggCube, out_dir: Path):
     """4 alminta órai vs otthoni szerint - 4. helyén legenda"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     axes = axes.flatten()
@@ -154,18 +157,14 @@ def save_four_subplots_orai(df: pd.DataFrame, out_dir: Path):
     
     # Első 3 ábra - adatok
     for i, col in enumerate(parts):
-        if col not in df.columns:
+        if col not in cube:
             axes[i].axis("off")
             axes[i].text(0.5, 0.5, f"Hiányzik: {col}", 
                         ha="center", va="center", transform=axes[i].transAxes)
             continue
             
         # Adatok előkészítése
-        grouped = (df.dropna(subset=[col, "Munka_típus"])
-                  .groupby([col, "Munka_típus"])
-                  .size()
-                  .unstack(fill_value=0)
-                  .sort_index())
+        grouped = cube.table(col, "Munka_típus")
         
         if grouped.empty:
             axes[i].text(0.5, 0.5, f"Nincs adat: {col}", 
@@ -191,11 +190,13 @@ def save_four_subplots_orai(df: pd.DataFrame, out_dir: Path):
     plt.savefig(out_path, dpi=300, bbox_inches='tight')
     plt.close()
 
-def save_four_subplots_3way(df: pd.DataFrame, out_dir: Path):
+@profiled("plot.save_four_subplots_3way")
+def save_four_subplots_3way(data: pd.DataFrame | AggCube, out_dir: Path):
     """4 alminta 3 kategóriás megjelenítéssel - 4. helyén legenda"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
-    if "Munka_3utas" not in df.columns:
+    if "Munka_3utas" not in cube:
         return
         
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
@@ -205,18 +206,14 @@ def save_four_subplots_3way(df: pd.DataFrame, out_dir: Path):
     
     # Első 3 ábra - adatok
     for i, col in enumerate(parts):
-        if col not in df.columns:
+        if col not in cube:
             axes[i].axis("off")
             axes[i].text(0.5, 0.5, f"Hiányzik: {col}", 
                         ha="center", va="center", transform=axes[i].transAxes)
             continue
             
         # Adatok előkészítése
-        grouped = (df.dropna(subset=[col, "Munka_3utas"])
-                  .groupby([col, "Munka_3utas"])
-                  .size()
-                  .unstack(fill_value=0)
-                  .sort_index())
+        grouped = cube.table(col, "Munka_3utas")
         
         if grouped.empty:
             axes[i].text(0.5, 0.5, f"Nincs adat: {col}", 
@@ -250,19 +247,17 @@ def save_four_subplots_3way(df: pd.DataFrame, out_dir: Path):
 # EGYÉB PLOTTING FUNKCIÓK (LEGENDA ELTÁVOLÍTÁSÁVAL)
 # =============================================================================
 
-def plot_timeparts_stacked_by_category(df: pd.DataFrame, out_dir: Path, cols=("hónap","hét","óra")):
+@profiled("plot.plot_timeparts_stacked_by_category")
+def plot_timeparts_stacked_by_category(data: pd.DataFrame | AggCube, out_dir: Path, cols=("hónap","hét","óra")):
     """Időrészek szerinti halmozott oszlopdiagramok kategóriánként"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
     for col in cols:
-        if col not in df.columns:
+        if col not in cube:
             continue
             
-        grouped = (df.dropna(subset=[col, "Uj_oszlop"])
-                  .groupby([col, "Uj_oszlop"])
-                  .size()
-                  .unstack(fill_value=0)
-                  .sort_index())
+        grouped = cube.table(col, "Uj_oszlop")
         
         if grouped.empty:
             continue
@@ -284,19 +279,17 @@ def plot_timeparts_stacked_by_category(df: pd.DataFrame, out_dir: Path, cols=("h
         plt.savefig(out_path, dpi=300, bbox_inches='tight')
         plt.close()
 
-def plot_timeparts_stacked_by_orai_otthoni(df: pd.DataFrame, out_dir: Path, cols=("hónap","hét","óra")):
+@profiled("plot.plot_timeparts_stacked_by_orai_otthoni")
+def plot_timeparts_stacked_by_orai_otthoni(data: pd.DataFrame | AggCube, out_dir: Path, cols=("hónap","hét","óra")):
     """Órai vs otthoni munka időrészek szerint"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
     for col in cols:
-        if col not in df.columns:
+        if col not in cube:
             continue
             
-        grouped = (df.dropna(subset=[col, "Munka_típus"])
-                  .groupby([col, "Munka_típus"])
-                  .size()
-                  .unstack(fill_value=0)
-                  .sort_index())
+        grouped = cube.table(col, "Munka_típus")
         
         if grouped.empty:
             continue
@@ -318,25 +311,16 @@ def plot_timeparts_stacked_by_orai_otthoni(df: pd.DataFrame, out_dir: Path, cols
         plt.savefig(out_path, dpi=300, bbox_inches='tight')
         plt.close()
 
-def plot_monthly_bars_orai_otthoni(df: pd.DataFrame, out_dir: Path):
+@profiled("plot.plot_monthly_bars_orai_otthoni")
+def plot_monthly_bars_orai_otthoni(data: pd.DataFrame | AggCube, out_dir: Path):
     """Havi bontás - Órai vs Otthoni"""
     _ensure_out(out_dir)
+    cube = as_cube(data)
     
-    df_copy = df.copy()
-    df_copy["Idő_dt"] = pd.to_datetime(df_copy["Idő_dt"], errors="coerce")
-    df_copy = df_copy.dropna(subset=["Idő_dt"])
-    
-    if df_copy.empty:
+    if cube.t_min is None:
         return
     
-    monthly = (df_copy.groupby([df_copy["Idő_dt"].dt.strftime('%Y-%m'), "Munka_típus"])
-               .size()
-               .unstack(fill_value=0))
-    
-    start_date = df_copy["Idő_dt"].min().replace(day=1)
-    end_date = df_copy["Idő_dt"].max().replace(day=1)
-    all_months = pd.date_range(start=start_date, end=end_date, freq='MS').strftime('%Y-%m').tolist()
-    monthly = monthly.reindex(all_months, fill_value=0)
+    monthly = cube.monthly("Munka_típus")
     
     fig, ax = plt.subplots(figsize=(12, 7))
     colors = [ORAI_COLORS.get(c, "#708090") for c in monthly.columns]
@@ -0,0 +1,165 @@
+"""
+Párhuzamos ábra-renderelés a közös aggregált kockából.
+
+Minden ábra egy független FigureJob (egy plotting függvényhívás, a kimeneti PNG-kkel).
+A jobok process poolon futnak; minden worker egyszer állítja be az Agg backendet és
+egyszer importálja a plotting modult (rcParams), utána csak renderel.
+
+Kihagyás: egy ábra cache-kulcsa a bemeneti táblái (a kockából marginalizált
+időrész × címke táblák) tartalom-hash-e + a plotting / cube modul forrása (stílus:
+rcParams, színek) + a matplotlib verzió. Változatlan kulcsnál a PNG-k az
+ArtifactCache-ből jönnek, renderelés nélkül.
+"""
+from __future__ import annotations
+
+import importlib.metadata
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.cache import ArtifactCache
+from src.analysis import cube as cube_module
+from src.analysis.cube import TIME_PARTS, AggCube
+from src.utils import profiling
+
+_PLOTTING_FILE = Path(cube_module.__file__).with_name("plotting.py")
+
+
+@dataclass(frozen=True)
+class FigureJob:
+    name: str
+    func: str                                  # src.analysis.plotting függvény neve
+    out_dir: Path
+    outputs: tuple[str, ...]                   # a függvény által írt fájlnevek (out_dir alatt)
+    tables: tuple[tuple[str, str], ...]        # felhasznált (időrész, címke) táblák; "monthly" = havi
+    kwargs: dict[str, Any] = field(default_factory=dict, hash=False)
+
+    def files(self) -> dict[str, Path]:
+        return {name: self.out_dir / name for name in self.outputs}
+
+
+def analysis_jobs(figures: Path, parts: tuple[str, ...] = TIME_PARTS) -> list[FigureJob]:
+    """A main_analysis ábrái jobokra bontva (az időrészenkénti ábrák külön jobok)."""
+    osszesitett, reszletes = figures / "osszesitett", figures / "reszletes"
+    jobs = [
+        FigureJob("osszegzo_kategoriak", "save_four_subplots_category", osszesitett,
+                  ("osszegzo_kategoriak_legenda.png",), tuple((p, "Uj_oszlop") for p in parts)),
+        FigureJob("osszegzo_orai_otthoni", "save_four_subplots_orai", osszesitett,
+                  ("osszegzo_orai_otthoni_legenda.png",), tuple((p, "Munka_típus") for p in parts)),
+        FigureJob("osszegzo_3kategoria", "save_four_subplots_3way", osszesitett,
+                  ("osszegzo_3kategoria_legenda.png",), tuple((p, "Munka_3utas") for p in parts)),
+    ]
+    for col in parts:
+        jobs.append(FigureJob(f"esemenyek_{col}_kategoriak", "plot_timeparts_stacked_by_category", reszletes,
+                              (f"esemenyek_{col}_kategoriak.png",), ((col, "Uj_oszlop"),), {"cols": (col,)}))
+        jobs.append(FigureJob(f"orai_otthoni_{col}", "plot_timeparts_stacked_by_orai_otthoni", reszletes,
+                              (f"orai_otthoni_{col}.png",), ((col, "Munka_típus"),), {"cols": (col,)}))
+    jobs.append(FigureJob("havi_orai_otthoni", "plot_monthly_bars_orai_otthoni", figures,
+                          ("havi_orai_otthoni.png",), (("monthly", "Munka_típus"),)))
+    return jobs
+
+
+def job_inputs(cube: AggCube, job: FigureJob) -> list[pd.DataFrame]:
+    """A job bemeneti táblái (index nélkül hash-elhető formában); hiányzó oszlop → üres tábla."""
+    out = []
+    for part, label in job.tables:
+        if label not in cube or (part != "monthly" and part not in cube):
+            out.append(pd.DataFrame({"hianyzik": [f"{part}×{label}"]}))
+            continue
+        t = cube.monthly(label) if part == "monthly" else cube.table(part, label)
+        t = t.copy()
+        t.columns = [str(c) for c in t.columns]
+        out.append(t.reset_index(names="_index").astype({"_index": str}))
+    return out
+
+
+# --- worker oldal ---
+
+_PLOTTING = None
+
+
+def _init_worker() -> None:
+    """Worker indítás: nem interaktív backend + a plotting modul (rcParams) egyszeri importja."""
+    global _PLOTTING
+    import matplotlib
+    matplotlib.use("Agg")
+    from src.analysis import plotting
+    _PLOTTING = plotting
+
+
+def render_job(cube: AggCube, job: FigureJob) -> float:
+    """Egy ábra renderelése; visszatér a renderelési idővel (s)."""
+    if _PLOTTING is None:
+        _init_worker()
+    t0 = time.perf_counter()
+    getattr(_PLOTTING, job.func)(cube, out_dir=job.out_dir, **job.kwargs)
+    return time.perf_counter() - t0
+
+
+def _render_in_worker(cube: AggCube, job: FigureJob) -> tuple[float, list[dict[str, Any]]]:
+    """render_job a poolban: a worker stage-mérései a szülő profil-riportjába kerülnek."""
+    seconds = render_job(cube, job)
+    return seconds, profiling.drain()
+
+
+# --- ütemező ---
+
+def render_figures(cube: AggCube, jobs: list[FigureJob], cache: ArtifactCache,
+                   workers: int | None = None) -> list[dict[str, Any]]:
+    """
+    Jobok renderelése process poolon (workers <= 1: ugyanebben a processzben),
+    a változatlan ábrák kihagyásával. Visszatér: ábránkénti riport (név, státusz, idő).
+    """
+    workers = workers or os.cpu_count() or 1
+    style = {"matplotlib": importlib.metadata.version("matplotlib")}
+    code = [_PLOTTING_FILE, cube_module.__file__]
+
+    report: list[dict[str, Any]] = []
+    pending: list[tuple[str, FigureJob]] = []
+    for job in jobs:
+        key = cache.make_key("figure", inputs=job_inputs(cube, job),
+                             params={"job": job.name, "func": job.func, "kwargs": job.kwargs,
+                                     "outputs": job.outputs, **style},
+                             code=code)
+        if cache.load(key, job.files()) is not None:
+            report.append({"figure": job.name, "status": "cache", "seconds": 0.0})
+        else:
+            pending.append((key, job))
+
+    def _done(key: str, job: FigureJob, seconds: float) -> None:
+        cache.save(key, job.files(), data={"seconds": round(seconds, 3)})
+        report.append({"figure": job.name, "status": "rendered", "seconds": round(seconds, 3)})
+        print(f"🖼  {job.name}: {seconds:.2f}s")
+
+    def _failed(job: FigureJob, e: Exception) -> None:
+        print(f"⚠️ Ábra sikertelen: {job.name}: {e}")
+        report.append({"figure": job.name, "status": "error", "error": str(e)})
+
+    if pending and (workers <= 1 or len(pending) == 1):
+        for key, job in pending:
+            try:
+                seconds = render_job(cube, job)
+            except Exception as e:
+                _failed(job, e)
+                continue
+            _done(key, job, seconds)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker) as pool:
+            futures = {pool.submit(_render_in_worker, cube, job): (key, job) for key, job in pending}
+            for fut in as_completed(futures):
+                key, job = futures[fut]
+                try:
+                    seconds, records = fut.result()
+                except Exception as e:
+                    _failed(job, e)
+                    continue
+                profiling.extend(records)
+                _done(key, job, seconds)
+
+    order = {job.name: i for i, job in enumerate(jobs)}
+    return sorted(report, key=lambda r: order[r["figure"]])
@@ -0,0 +1,158 @@
+"""
+Tartalom-hash alapú artefaktum-cache (data/cache).
+
+Egy bejegyzés kulcsa a bemenetek (fájl vagy DataFrame tartalma), a paraméterek
+(CLI argumentumok, küszöbök) és a kódverzió (a számoló modulok forrása) hash-éből áll.
+Ha egyik sem változott, a korábbi kimeneti fájlok/eredmények visszamásolhatók,
+így a stage újraszámolás nélkül „lefut”.
+
+A cache méretkorlátos: a legrégebben használt bejegyzések törlődnek (LRU),
+ha az összméret átlépi a CACHE_MAX_MB értéket (alapértelmezés: 2048 MB).
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+import pandas as pd
+
+META_FILE = "meta.json"
+DEFAULT_MAX_MB = 2048
+
+# a moodle-pm run párhuzamos ágai (szálak) ugyanazt a cache-könyvtárat használják:
+# a bejegyzés visszamásolása, cseréje és az LRU takarítás egymást kizárja
+_LOCK = threading.RLock()
+
+
+def fingerprint_file(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """DataFrame tartalom-hash (oszlopnevek + dtype-ok + értékek, index nélkül)."""
+    h = hashlib.sha256()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def fingerprint(obj: Any) -> str:
+    if isinstance(obj, pd.DataFrame):
+        return fingerprint_frame(obj)
+    if isinstance(obj, (str, Path)) and Path(obj).is_file():
+        return fingerprint_file(Path(obj))
+    raise TypeError(f"Nem ujjlenyomatolható bemenet: {obj!r}")
+
+
+def package_version(name: str) -> str:
+    """
+    Telepített csomag verziója a csomag importálása nélkül (cache-kulcsokhoz);
+    a pm4py / matplotlib importja így csak a ténylegesen számoló ágon fut le.
+    """
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return "n/a"
+
+
+def code_version(files: Iterable[str | Path]) -> list[str]:
+    """A számolást végző forrásfájlok hash-e – kódmódosítás után a régi bejegyzés érvénytelen."""
+    return [f"{Path(f).name}:{fingerprint_file(Path(f))[:16]}" for f in files]
+
+
+class ArtifactCache:
+    def __init__(self, root: Path, max_bytes: int | None = None, enabled: bool = True):
+        self.root = Path(root)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("CACHE_MAX_MB", DEFAULT_MAX_MB)) * 2**20)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def make_key(self, stage: str, inputs: Iterable[Any] = (), params: Mapping[str, Any] | None = None,
+                 code: Iterable[str | Path] = ()) -> str:
+        payload = {
+            "stage": stage,
+            "inputs": [fingerprint(x) for x in inputs],
+            "params": dict(params or {}),
+            "code": code_version(code),
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+        return f"{stage}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]}"
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def load(self, key: str, files: Mapping[str, Path] | None = None) -> dict | None:
+        """
+        Találatnál a tárolt fájlokat a megadott helyekre másolja, és a mentett
+        meta-adatot (pl. metrikák) adja vissza; hiánynál None.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entry(key)
+        meta_path = entry / META_FILE
+        with _LOCK:
+            if not meta_path.exists():
+                return None
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            for name, dst in (files or {}).items():
+                if name not in meta["files"]:
+                    continue
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(entry / name, dst)
+            os.utime(meta_path)                  # LRU: utolsó használat ideje
+        print(f"♻️  Cache találat: {key}")
+        return meta["data"]
+
+    def save(self, key: str, files: Mapping[str, Path] | None = None, data: Any = None) -> None:
+        """Kimeneti fájlok (a ténylegesen létezők) + meta-adat mentése, majd LRU takarítás."""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        tmp = entry.with_name(f"{entry.name}.tmp{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        stored = []
+        for name, src in (files or {}).items():
+            if Path(src).exists():
+                shutil.copy2(src, tmp / name)
+                stored.append(name)
+        meta = {"key": key, "created": time.time(), "files": stored, "data": data}
+        (tmp / META_FILE).write_text(json.dumps(meta, ensure_ascii=False, default=str), encoding="utf-8")
+        with _LOCK:
+            shutil.rmtree(entry, ignore_errors=True)
+            tmp.rename(entry)
+            self.evict()
+
+    def evict(self) -> None:
+        with _LOCK:
+            self._evict()
+
+    def _evict(self) -> None:
+        if not self.root.exists():
+            return
+        entries = []
+        for e in self.root.iterdir():
+            meta_path = e / META_FILE
+            if ".tmp" in e.name or not meta_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in e.iterdir())
+            entries.append((meta_path.stat().st_mtime, size, e))
+        total = sum(s for _, s, _ in entries)
+        for _, size, e in sorted(entries, key=lambda t: t[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(e, ignore_errors=True)
+            total -= size
+            print(f"🧹 Cache bejegyzés törölve (LRU): {e.name}")
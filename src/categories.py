@@ -90,6 +90,14 @@ Admin = [
 ]
 
 
+def add_category_column(df, mapping: dict[str, str], src_col: str = "Eseménykörnyezet",
+                        out_col: str = "Uj_oszlop", default: str = "Egyéb", copy: bool = True):
+    """Eseménykörnyezet → kategória (Uj_oszlop); ismeretlen elem → default."""
+    out = df.copy() if copy else df
+    out[out_col] = out[src_col].map(mapping).fillna(default)
+    return out
+
+
 def build_mapping() -> dict[str, str]:
     mapping: dict[str, str] = {}
     mapping.update({k: "Hazi" for k in Hazi})
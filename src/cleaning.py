@@ -1,3 +1,7 @@
+import re
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
 ID_PATTERNS = {
@@ -7,11 +11,48 @@ ID_PATTERNS = {
     "tetel_id":   r"Tétel (\d+) azonosítóval",
 }
 
+# alapból csak ezeket tartjuk meg (attempt_id / quiz_id nem kell a további lépésekhez)
+KEEP_IDS = ("user_id", "tetel_id")
+
+
+@lru_cache(maxsize=None)
+def _combined_id_regex(names: tuple[str, ...]) -> re.Pattern:
+    """Egyetlen alternációs regex a kért ID-mintákból, névvel ellátott csoportokkal."""
+    return re.compile("|".join(ID_PATTERNS[n].replace(r"(\d+)", rf"(?P<{n}>\d+)") for n in names))
+
+
+def _extract_ids(text, rx: re.Pattern, n_names: int) -> dict[str, str]:
+    """Mintánként az első találat (mint a str.extract), egyetlen végigolvasással."""
+    found: dict[str, str] = {}
+    if isinstance(text, str):
+        for m in rx.finditer(text):
+            found.setdefault(m.lastgroup, m.group(m.lastgroup))
+            if len(found) == n_names:
+                break
+    return found
+
 
-def add_extracted_ids(df: pd.DataFrame) -> pd.DataFrame:
-    extracts = {name: df["Leírás"].str.extract(pat, expand=False).astype("Int64") for name, pat in ID_PATTERNS.items()}
-    out = df.assign(**extracts)
-    return out.drop(columns=[c for c in ["attempt_id", "quiz_id"] if c in out.columns])
+def add_extracted_ids(df: pd.DataFrame, keep: tuple[str, ...] = KEEP_IDS, copy: bool = True) -> pd.DataFrame:
+    """
+    ID-k kinyerése a Leírás oszlopból. A leírások erősen ismétlődnek, ezért csak az
+    egyedi szövegeket illesztjük (egy kombinált regexszel, egyszeri végigolvasással),
+    az eredményt a factorize-kódokkal terjesztjük vissza a sorokra.
+    copy=False esetén az oszlopokat helyben adja hozzá.
+    """
+    names = tuple(n for n in ID_PATTERNS if n in keep)
+    codes, uniques = pd.factorize(df["Leírás"])
+    rx = _combined_id_regex(names)
+    found = [_extract_ids(text, rx, len(names)) for text in uniques]
+
+    extracts = {}
+    for name in names:
+        vals = pd.array([f.get(name) for f in found], dtype="Int64")
+        extracts[name] = vals.take(codes, allow_fill=True)
+    if not copy:
+        for name, vals in extracts.items():
+            df[name] = vals
+        return df
+    return df.assign(**extracts)
 
 
 def apply_time_window(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
@@ -64,17 +105,45 @@ _EXACT_EXCLUSIONS = {
 }
 
 
-def apply_exclusions(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    # prefix alapú kizárások
+def _exclusion_rules() -> list[tuple[str, str, str, str]]:
+    """(oszlop, típus, minta, szabálynév) a kiértékelés sorrendjében: előbb prefixek, aztán exact."""
+    rules = []
     for col, prefixes in _EXCLUDE_PREFIX.items():
-        if col in out.columns:
-            mask = False
-            for px in prefixes:
-                mask |= out[col].astype(str).str.startswith(px, na=False)
-            out = out[~mask]
-    # exact kizárások
+        rules += [(col, "prefix", px, f"{col} prefix: {px}") for px in prefixes]
     for col, values in _EXACT_EXCLUSIONS.items():
-        if col in out.columns:
-            out = out[~out[col].isin(values)]
-    return out
+        rules += [(col, "exact", v, f"{col} = {v}") for v in values]
+    return rules
+
+
+def apply_exclusions(df: pd.DataFrame, counts: dict[str, int] | None = None) -> pd.DataFrame:
+    """
+    Prefix és exact kizárások egyetlen összevont maszkkal, egyetlen szűréssel a végén.
+    Oszloponként csak az egyedi értékeket (factorize) vizsgáljuk a szabályokkal.
+
+    Ha counts meg van adva, szabályonként hozzáadja, hány sort távolított el
+    (egy sort az első illeszkedő szabály kap meg, mint a korábbi lépésenkénti szűrésnél).
+    """
+    rules = [r for r in _exclusion_rules() if r[0] in df.columns]
+    removed = np.zeros(len(df), dtype=bool)
+    n_removed = np.zeros(len(rules), dtype=np.int64)
+
+    for col in dict.fromkeys(r[0] for r in rules):
+        codes, uniques = pd.factorize(df[col])
+        col_rules = [(i, kind, pat) for i, (c, kind, pat, _) in enumerate(rules) if c == col]
+        # egyedi értékenként az első illeszkedő szabály indexe (-1: nincs)
+        rule_of_uniq = np.full(len(uniques) + 1, -1, dtype=np.int64)
+        for k, u in enumerate(uniques):
+            text = str(u)
+            for i, kind, pat in col_rules:
+                if (text.startswith(pat) if kind == "prefix" else u == pat):
+                    rule_of_uniq[k] = i
+                    break
+        row_rule = rule_of_uniq[codes]      # codes == -1 (NaN) → utolsó elem = -1
+        newly = (row_rule >= 0) & ~removed
+        n_removed += np.bincount(row_rule[newly], minlength=len(rules))
+        removed |= newly
+
+    if counts is not None:
+        for (_, _, _, name), n in zip(rules, n_removed):
+            counts[name] = counts.get(name, 0) + int(n)
+    return df[~removed]
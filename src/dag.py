@@ -0,0 +1,182 @@
+"""
+Függőségi gráf (DAG) ütemező a teljes pipeline-hoz (moodle-pm run).
+
+Minden Task megadja a függőségeit és a futtató függvényét, amely a függőségek
+memóriában tartott eredményeit kapja (név → érték) – a köztes frame-eket és logokat
+így nem kell lemezről újraolvasni egy futáson belül.
+
+Kihagyás: egy task kulcsa a külső bemeneti fájljai (tartalom-hash), paraméterei, kódja
+és a függőségei kulcsának hash-e (Merkle-lánc). Ha a kulcs a cache-ben megvan és a
+kimeneti fájljai léteznek, a task nem fut; az eredményét csak akkor állítjuk vissza
+lemezről (restore), ha egy futó leszármazottjának kell.
+
+A futtatandó taskok szálpoolon mennek: egy task akkor indul, amikor minden futó
+függősége végzett, így a független ágak (ábrák / XES export / bányászok) átfednek.
+A nehéz számítások a saját process poolukat használják (ábrák, alignment), a szálak
+az ezekre való várakozást és az I/O-t fedik át.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from src.cache import ArtifactCache
+from src.utils.profiling import profile_stage
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable[[dict[str, Any]], Any]      # függőség neve → eredménye; visszatér: a task eredménye
+    deps: tuple[str, ...] = ()
+    restore: Callable[[], Any] | None = None    # kihagyott task eredménye lemezről (ha kell valakinek)
+    inputs: tuple[Path, ...] = ()               # külső bemeneti fájlok (tartalom-hash a kulcsban)
+    params: dict[str, Any] = field(default_factory=dict, hash=False)
+    code: tuple[Path, ...] = ()                 # a task kódja (forrás-hash a kulcsban)
+    outputs: tuple[Path, ...] = ()              # kihagyáskor ezeknek létezniük kell
+    # indulás előtt a főszálon importált modulok (a szálak ne egyszerre töltsenek be nagy csomagot)
+    imports: tuple[str, ...] = ()
+
+
+def toposort(tasks: list[Task]) -> list[Task]:
+    """Taskok függőségi sorrendben (a megadott sorrendet a lehető legjobban megtartva)."""
+    by_name = {t.name: t for t in tasks}
+    order: list[Task] = []
+    state: dict[str, int] = {}                  # 1: feldolgozás alatt, 2: kész
+
+    def visit(t: Task) -> None:
+        if state.get(t.name) == 2:
+            return
+        if state.get(t.name) == 1:
+            raise ValueError(f"Körkörös függőség: {t.name}")
+        state[t.name] = 1
+        for d in t.deps:
+            if d not in by_name:
+                raise KeyError(f"'{t.name}' ismeretlen függősége: {d}")
+            visit(by_name[d])
+        state[t.name] = 2
+        order.append(t)
+
+    for t in tasks:
+        visit(t)
+    return order
+
+
+def select(tasks: list[Task], names: list[str] | None) -> list[Task]:
+    """A kért taskok és (tranzitív) függőségeik; names=None → mind."""
+    if not names:
+        return toposort(tasks)
+    by_name = {t.name: t for t in tasks}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise KeyError(f"Ismeretlen task(ok): {unknown} (választható: {', '.join(by_name)})")
+    keep: set[str] = set()
+    stack = list(names)
+    while stack:
+        n = stack.pop()
+        if n not in keep:
+            keep.add(n)
+            stack.extend(by_name[n].deps)
+    return [t for t in toposort(tasks) if t.name in keep]
+
+
+def task_keys(tasks: list[Task], cache: ArtifactCache) -> dict[str, str]:
+    """Task → kulcs; a függőségek kulcsa is benne van, így egy változás lefelé továbbterjed."""
+    keys: dict[str, str] = {}
+    for t in toposort(tasks):
+        keys[t.name] = cache.make_key(
+            f"run-{t.name}",
+            inputs=[x for x in t.inputs if Path(x).is_file()],
+            params={**t.params, "_deps": {d: keys[d] for d in t.deps},
+                    "_missing_inputs": [str(x) for x in t.inputs if not Path(x).is_file()]},
+            code=t.code,
+        )
+    return keys
+
+
+def plan(tasks: list[Task], cache: ArtifactCache, force: bool = False) -> tuple[dict[str, str], set[str]]:
+    """(kulcsok, futtatandó taskok): fut, ha a kulcsa új, vagy hiányzik valamelyik kimenete."""
+    keys = task_keys(tasks, cache)
+    todo = set()
+    for t in tasks:
+        if force or not all(Path(o).exists() for o in t.outputs) or cache.load(keys[t.name]) is None:
+            todo.add(t.name)
+    return keys, todo
+
+
+def run_dag(tasks: list[Task], cache: ArtifactCache, jobs: int = 4, force: bool = False,
+            dry_run: bool = False) -> list[dict[str, Any]]:
+    """
+    A taskok futtatása (jobs szálon), a változatlanok kihagyásával. Hibás task
+    leszármazottai nem indulnak ("blocked"), a független ágak tovább futnak.
+    Visszatér: taskonkénti riport (név, státusz, idő).
+    """
+    tasks = toposort(tasks)
+    keys, todo = plan(tasks, cache, force=force)
+    by_name = {t.name: t for t in tasks}
+    for t in tasks:
+        print(f"{'▶︎' if t.name in todo else '⏭ '} {t.name}" + ("" if t.name in todo else " (változatlan)"))
+    status = {t.name: "skip" for t in tasks if t.name not in todo}
+    report = {t.name: {"task": t.name, "status": "skip", "seconds": 0.0} for t in tasks}
+    if dry_run or not todo:
+        return [report[t.name] for t in tasks]
+
+    for t in tasks:
+        if t.name in todo:
+            for mod in t.imports:
+                importlib.import_module(mod)
+
+    results: dict[str, Any] = {}
+    lock = threading.Lock()
+
+    def value(name: str) -> Any:
+        with lock:
+            if name not in results:
+                restore = by_name[name].restore
+                results[name] = restore() if restore is not None else None
+            return results[name]
+
+    def execute(t: Task) -> tuple[Any, float]:
+        t0 = time.perf_counter()
+        with profile_stage(f"dag.{t.name}"):
+            res = t.func({d: value(d) for d in t.deps})
+        return res, time.perf_counter() - t0
+
+    pending = [t for t in tasks if t.name in todo]
+    running: dict[Any, Task] = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="moodle-pm") as pool:
+        while pending or running:
+            for t in list(pending):
+                if any(status.get(d) in ("error", "blocked") for d in t.deps):
+                    pending.remove(t)
+                    status[t.name] = report[t.name]["status"] = "blocked"
+                    print(f"⛔ {t.name}: kimarad (hibás függőség)")
+                elif all(status.get(d) in ("ok", "skip") for d in t.deps):
+                    pending.remove(t)
+                    status[t.name] = "running"
+                    print(f"▶︎ {t.name} indul")
+                    running[pool.submit(execute, t)] = t
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                t = running.pop(fut)
+                try:
+                    res, seconds = fut.result()
+                except (Exception, SystemExit) as e:
+                    status[t.name] = "error"
+                    report[t.name].update(status="error", error=f"{type(e).__name__}: {e}")
+                    print(f"❌ {t.name} sikertelen: {type(e).__name__}: {e}")
+                    continue
+                with lock:
+                    results[t.name] = res
+                status[t.name] = "ok"
+                report[t.name].update(status="ok", seconds=round(seconds, 3))
+                cache.save(keys[t.name], data={"seconds": round(seconds, 3)})
+                print(f"✅ {t.name} kész: {seconds:.1f}s")
+    return [report[t.name] for t in tasks]
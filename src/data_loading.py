@@ -1,5 +1,8 @@
 import pandas as pd
 from pathlib import Path
+from typing import Iterator
+
+from src.exports import to_store_dtypes
 
 HU_MONTHS = {
     "január": 1, "február": 2, "március": 3, "április": 4, "május": 5, "június": 6,
@@ -7,7 +10,58 @@ HU_MONTHS = {
 }
 
 
+def _is_digits(s: str) -> bool:
+    """Csak ASCII számjegyek (a str.isdigit() pl. a '²'-t is elfogadná, amin az int() elbukik)."""
+    return s.isascii() and s.isdigit()
+
+
+def _tokenize_hu_datetime(text: str) -> tuple[int, int, int, int, int, int] | None:
+    """
+    Fix felépítésű Moodle időbélyeg bontása regex nélkül:
+    '2025. május 22., 14:37:04' → (2025, 5, 22, 14, 37, 4).
+    Ugyanazt fogadja el, mint a korábbi regex; minden másra None.
+    """
+    t = text.replace("\xa0", " ").strip()
+    # év: 4 számjegy + pont
+    if len(t) < 5 or t[4] != "." or not _is_digits(t[:4]):
+        return None
+    # '<hónapnév> <nap>' ., '<óra>:<perc>:<mp>'
+    head, sep, tail = t[5:].partition(".,")
+    month_day = head.split()
+    if not sep or len(month_day) != 2 or not _is_digits(head[-1:]):
+        return None
+    month_name, day_str = month_day
+    month = HU_MONTHS.get(month_name.lower()) if month_name.isalpha() else None
+    if month is None or len(day_str) > 2 or not _is_digits(day_str):
+        return None
+    hms = tail.lstrip().split(":")
+    if (len(hms) != 3 or not (1 <= len(hms[0]) <= 2) or len(hms[1]) != 2 or len(hms[2]) != 2
+            or not (_is_digits(hms[0]) and _is_digits(hms[1]) and _is_digits(hms[2]))):
+        return None
+    return int(t[:4]), month, int(day_str), int(hms[0]), int(hms[1]), int(hms[2])
+
+
 def parse_hu_datetime_series(s: pd.Series) -> pd.Series:
+    """
+    Magyar Moodle időbélyegek → datetime64.
+    A log erősen ismétlődő időbélyegeket tartalmaz, ezért csak az egyedi
+    értékeket bontjuk fel (factorize), majd a kódok alapján visszaterjesztjük.
+    """
+    codes, uniques = pd.factorize(s)
+    cols = ("year", "month", "day", "hour", "minute", "second")
+    parsed = [_tokenize_hu_datetime(u if isinstance(u, str) else str(u)) for u in uniques]
+    nan_row = (float("nan"),) * len(cols)
+    parts = pd.DataFrame([p if p is not None else nan_row for p in parsed], columns=list(cols))
+    if parts.empty:
+        uniq_dt = pd.DatetimeIndex([], dtype="datetime64[ns]")
+    else:
+        uniq_dt = pd.DatetimeIndex(pd.to_datetime(parts, errors="coerce"))
+    out = uniq_dt.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(out, index=s.index)
+
+
+def _parse_hu_datetime_series_regex(s: pd.Series) -> pd.Series:
+    """Korábbi, soronkénti regex + ISO-string alapú parser (összehasonlításhoz / benchmarkhoz)."""
     clean = s.astype(str).str.replace("\xa0", " ", regex=False).str.strip()
     parts = clean.str.extract(
         r"^(?P<ev>\d{4})\.\s*"
@@ -28,5 +82,112 @@ def parse_hu_datetime_series(s: pd.Series) -> pd.Series:
     return pd.to_datetime(iso, errors="coerce", format="%Y-%m-%d %H:%M:%S")
 
 
+def as_datetime(s: pd.Series) -> pd.Series:
+    """Datetime oszlop; ha már natív datetime (pl. Parquet store-ból), nem konvertálunk újra."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    return pd.to_datetime(s, errors="coerce")
+
+
 def read_input_excel(path: Path) -> pd.DataFrame:
     return pd.read_excel(path)
+
+
+def read_input(path: Path) -> pd.DataFrame:
+    """Nyers Moodle export egyben beolvasva, a kiterjesztés szerint (.csv / Excel)."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        # ugyanúgy, mint a streaming olvasó: szövegként, BOM-tűrő kódolással
+        return pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+    return read_input_excel(path)
+
+
+def iter_input_chunks(path: Path, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    Nyers Moodle export soronkénti darabokban (chunk), a teljes fájl memóriába töltése nélkül.
+      - .xlsx: openpyxl read-only iteráció (csak az aktív munkalap)
+      - .csv : pandas chunked reader (Moodle CSV export)
+    A chunkok indexe folytonos, mintha a teljes fájlt olvastuk volna be.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".csv":
+        # utf-8-sig: a Moodle CSV export BOM-mal kezdődhet
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=str, encoding="utf-8-sig")
+        return
+
+    if suffix not in {".xlsx", ".xlsm"}:
+        raise ValueError(f"Nem támogatott bemeneti formátum a streaming módhoz: {path.suffix}")
+
+    import openpyxl  # csak streaming XLSX olvasáshoz kell
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) for c in header]
+        offset = 0
+        batch: list[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+                offset += len(batch)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+    finally:
+        wb.close()
+
+
+def read_store(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Típusos köztes tár beolvasása (Parquet, oszlop-projekcióval).
+    Ha csak a régi CSV változat létezik (ugyanazzal a névvel), azt olvassuk be,
+    és ugyanarra a típuskészletre hozzuk, mint a Parquet store-t.
+    """
+    path = Path(path)
+    if path.suffix != ".parquet":
+        path = path.with_suffix(".parquet")
+    if path.exists():
+        return pd.read_parquet(path, columns=columns)
+
+    csv_path = path.with_suffix(".csv")
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Nincs köztes tár: {path} (és {csv_path.name} sem)")
+
+    usecols = (lambda c: c in set(columns)) if columns else None
+    df = pd.read_csv(csv_path, usecols=usecols)
+    if "Idő_dt" in df.columns:
+        df["Idő_dt"] = pd.to_datetime(df["Idő_dt"], errors="coerce")
+    df = to_store_dtypes(df)
+    return df[columns] if columns else df
+
+
+def iter_store(path: Path, columns: list[str] | None = None, batch_rows: int = 500_000) -> Iterator[pd.DataFrame]:
+    """
+    Köztes tár beolvasása darabokban (Parquet: row group / batch-enként, CSV: chunked reader),
+    a teljes tábla memóriába töltése nélkül. A típusok egyeznek a read_store kimenetével.
+    """
+    path = Path(path)
+    if path.suffix != ".parquet":
+        path = path.with_suffix(".parquet")
+    if path.exists():
+        import pyarrow.parquet as pq  # a pandas Parquet motorja
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    csv_path = path.with_suffix(".csv")
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Nincs köztes tár: {path} (és {csv_path.name} sem)")
+    usecols = (lambda c: c in set(columns)) if columns else None
+    for df in pd.read_csv(csv_path, usecols=usecols, chunksize=batch_rows):
+        if "Idő_dt" in df.columns:
+            df["Idő_dt"] = pd.to_datetime(df["Idő_dt"], errors="coerce")
+        df = to_store_dtypes(df)
+        yield df[columns] if columns else df
@@ -1,13 +1,47 @@
 import pandas as pd
 from pathlib import Path
 
+from src.utils.profiling import profiled
 
+# A köztes (stage-ek közötti) tár típusai
+STORE_CATEGORICAL = [
+    "Uj_oszlop", "Munka_típus", "Eseménykörnyezet", "Munka_3utas", "lokacio",
+    "Tantervi_hét", "Összetevő", "Esemény neve", "Eredet",
+]
+STORE_INT_IDS = ["user_id", "tetel_id", "attempt_id", "quiz_id", "Tantervi_hét_szám"]
+
+
+@profiled("export.save_csv")
 def save_csv(df: pd.DataFrame, path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(path, index=False, encoding="utf-8")
     print(f"CSV mentve: {path}")
 
 
+def to_store_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Kategóriák → category, ID-k → nullable Int64, Idő_dt → natív datetime64."""
+    conv = {}
+    for c in STORE_CATEGORICAL:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            conv[c] = "category"
+    for c in STORE_INT_IDS:
+        if c in df.columns and df[c].dtype != "Int64":
+            conv[c] = "Int64"
+    out = df.astype(conv) if conv else df
+    if "Idő_dt" in out.columns and not pd.api.types.is_datetime64_any_dtype(out["Idő_dt"]):
+        out = out.assign(**{"Idő_dt": pd.to_datetime(out["Idő_dt"], errors="coerce")})
+    return out
+
+
+@profiled("export.save_parquet")
+def save_parquet(df: pd.DataFrame, path: Path):
+    """Típusos köztes tár mentése (Parquet) – a downstream stage-ek ezt olvassák."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    to_store_dtypes(df).to_parquet(path, index=False)
+    print(f"Parquet mentve: {path}")
+
+
+@profiled("export.save_xlsx")
 def save_xlsx(df: pd.DataFrame, path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
     # Pandas 2.x alatt az engine_kwargs az ajánlott mód a writer-nek átadni opciókat
@@ -0,0 +1,148 @@
+"""
+Inkrementális előfeldolgozás: a napi Moodle export mindig az előző bővített változata,
+ezért csak az új sorokat kell végigvinni a tisztítás → kategorizálás → címkézés láncon.
+
+Az új sorok felismerése, még a tisztítás (ID-k, kizárások) előtt:
+  - nyers szinten: az export a legfrissebb sorokkal kezdődik, így az előző export első
+    sorainak (fej-blokk) sor-hashét keresve az ott kezdődő rész már feldolgozott –
+    a beolvasás ott meg is állhat (RawRowFilter),
+  - időbélyeg-vízjel (watermark): a legkésőbbi már feldolgozott Idő_dt,
+  - a vízjellel egyező időbélyegű sorokhoz sor-hash (+ előfordulásszám), mert
+    ugyanabban a másodpercben több esemény is lehet, és ezek egy része már bent van.
+A vízjel a fej-blokk nélküli (pl. átrendezett) exportnál is helyes eredményt ad.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+# a nyers export oszlopai – ezekből képezzük a sor-hasht
+RAW_COLUMNS = ("Idő", "Eseménykörnyezet", "Összetevő", "Esemény neve", "Leírás", "Eredet", "IP-cím")
+STATE_FILE = "incremental_state.json"
+# ennyi nyers sor hashét tároljuk az export elejéről (fej-blokk)
+HEAD_ROWS = 20
+
+
+@dataclass
+class IngestState:
+    watermark: pd.Timestamp | None = None
+    # a vízjel másodpercében már feldolgozott sorok: hash → darabszám
+    boundary: dict[str, int] = field(default_factory=dict)
+    # felhasználónként az utolsó (reclassify utáni) Uj_oszlop – a loop-mentes szelethez
+    last_category: dict[int, str] = field(default_factory=dict)
+    rows_ingested: int = 0
+    # az utoljára feldolgozott export első HEAD_ROWS nyers sorának hashe (fájlsorrendben)
+    head: list[str] = field(default_factory=list)
+    # kizárási szabályonként az összes eddigi futásban eltávolított sorok (kizárási riport)
+    exclusions: dict[str, int] = field(default_factory=dict)
+
+
+def load_state(path: Path) -> IngestState | None:
+    if not path.exists():
+        return None
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    return IngestState(
+        watermark=pd.Timestamp(raw["watermark"]) if raw.get("watermark") else None,
+        boundary={k: int(v) for k, v in raw.get("boundary", {}).items()},
+        last_category={int(k): v for k, v in raw.get("last_category", {}).items()},
+        rows_ingested=int(raw.get("rows_ingested", 0)),
+        head=list(raw.get("head", [])),
+        exclusions={k: int(v) for k, v in raw.get("exclusions", {}).items()},
+    )
+
+
+def save_state(state: IngestState, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "watermark": None if state.watermark is None else str(state.watermark),
+        "boundary": state.boundary,
+        "last_category": {str(k): v for k, v in state.last_category.items()},
+        "rows_ingested": state.rows_ingested,
+        "head": state.head,
+        "exclusions": state.exclusions,
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Inkrementális állapot mentve: {path} (vízjel: {payload['watermark']})")
+
+
+def _row_hashes(df: pd.DataFrame) -> pd.Series:
+    """Sor-hash a nyers oszlopokból (szövegként, hogy XLSX és CSV beolvasás ugyanazt adja)."""
+    cols = [c for c in RAW_COLUMNS if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols].astype(str), index=False).map("{:016x}".format)
+
+
+class RawRowFilter:
+    """
+    Nyers (tisztítatlan) exportdarabok szűrése: az előző export fej-blokkjától kezdve
+    minden sor már feldolgozott, ezért eldobjuk (done=True után a beolvasás leállhat).
+    Közben rögzíti a mostani export fej-blokkját a következő futáshoz (head).
+    """
+
+    def __init__(self, state: IngestState | None):
+        self.prev_head = list(state.head) if state is not None else []
+        self.head: list[str] = []
+        self.done = False
+        self.skipped_from: int | None = None     # a fej-blokk kezdete (nyers sorszám), ha megvan
+        self._offset = 0
+
+    def __call__(self, raw: pd.DataFrame) -> pd.DataFrame:
+        if self.done or raw.empty:
+            return raw.iloc[:0]
+        if len(self.head) < HEAD_ROWS:
+            self.head += _row_hashes(raw.iloc[:HEAD_ROWS - len(self.head)]).tolist()
+        if not self.prev_head:
+            return raw
+        pos = self._find_head(_row_hashes(raw).tolist())
+        self._offset += len(raw)
+        if pos is None:
+            return raw
+        self.done = True
+        self.skipped_from = self._offset - len(raw) + pos
+        return raw.iloc[:pos]
+
+    def _find_head(self, h: list[str]) -> int | None:
+        """Az előző fej-blokk kezdete a darabban (a darab végén csonkolt blokkot is elfogadjuk)."""
+        first = self.prev_head[0]
+        for i, x in enumerate(h):
+            if x == first:
+                tail = h[i:i + len(self.prev_head)]
+                if tail == self.prev_head[:len(tail)]:
+                    return i
+        return None
+
+
+def select_new_rows(df: pd.DataFrame, state: IngestState | None) -> pd.DataFrame:
+    """A már feldolgozott sorok elhagyása (vízjel előtti sorok + a vízjel másodpercének ismert sorai)."""
+    if state is None or state.watermark is None:
+        return df
+    ts = df["Idő_dt"]
+    newer = ts > state.watermark
+    at_wm = ts == state.watermark
+    if at_wm.any():
+        h = _row_hashes(df[at_wm])
+        occ = h.groupby(h).cumcount()
+        seen = h.map(state.boundary).fillna(0).astype(int)
+        newer.loc[at_wm] = (occ >= seen).to_numpy()
+    return df[newer]
+
+
+def advance_state(state: IngestState | None, df_new: pd.DataFrame) -> IngestState:
+    """Új vízjel + határ-hashek az épp feldolgozott (tisztított) új sorokból."""
+    prev = state or IngestState()
+    nxt = IngestState(watermark=prev.watermark, boundary=dict(prev.boundary),
+                      last_category=dict(prev.last_category),
+                      rows_ingested=prev.rows_ingested + len(df_new),
+                      exclusions=dict(prev.exclusions))
+    ts = df_new["Idő_dt"].dropna()
+    if ts.empty:
+        return nxt
+    wm = ts.max()
+    if prev.watermark is None or wm > prev.watermark:
+        nxt.watermark, nxt.boundary = wm, {}
+    h = _row_hashes(df_new[df_new["Idő_dt"] == nxt.watermark])
+    for k, n in h.value_counts().items():
+        nxt.boundary[k] = nxt.boundary.get(k, 0) + int(n)
+    return nxt
@@ -0,0 +1,74 @@
+"""
+Deklaratív stage-gráf az előfeldolgozáshoz.
+
+Minden stage megadja, mely oszlopokat olvassa és írja. A stage-ek ugyanazt az
+egy DataFrame-et bővítik helyben (copy=False), csak a sorszűrő stage-ek adnak
+vissza új frame-et. Ha egy stage bemenetei és kimenetei az előző futása óta nem
+változtak, a futtató redundánsnak tekinti és kihagyja.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pandas as pd
+
+from src.utils.profiling import profile_stage
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[[pd.DataFrame], Any]
+    reads: tuple[str, ...] = ()
+    writes: tuple[str, ...] = ()
+    # ha meg van adva, a stage visszatérési értéke mellékkimenet (pl. szeletek),
+    # a fő DataFrame-et nem módosítja
+    output: str | None = None
+    # a redundancia-vizsgálat kulcsa; azonos kulcsú stage-ek ugyanazt a műveletet jelentik
+    key: str | None = None
+
+
+def run_pipeline(df: pd.DataFrame, stages: list[Stage], verbose: bool = True) -> tuple[pd.DataFrame, dict[str, Any]]:
+    """
+    Stage-ek futtatása sorrendben, egyetlen (helyben bővülő) DataFrame-en.
+    Visszatér: (végső DataFrame, mellékkimenetek dict).
+    """
+    outputs: dict[str, Any] = {}
+    versions: dict[str, int] = {}    # oszlop → utolsó módosítás sorszáma
+    rows_version = 0                 # sorszűrésenként nő
+    tick = 0
+    done: dict[str, tuple] = {}      # stage-kulcs → (olvasott verziók, írt verziók, sorverzió)
+
+    def _state(cols: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(versions.get(c, 0) for c in cols)
+
+    for st in stages:
+        missing = [c for c in st.reads if c not in df.columns]
+        if missing:
+            raise KeyError(f"'{st.name}' stage hiányzó bemeneti oszlop(ok): {missing}")
+
+        key = st.key or st.name
+        sig = (_state(st.reads), _state(st.writes), rows_version)
+        if st.output is None and key in done and done[key] == sig and all(c in df.columns for c in st.writes):
+            if verbose:
+                print(f"⏭  Stage kihagyva (redundáns, bemenetei nem változtak): {st.name}")
+            continue
+
+        with profile_stage(f"preprocess.{st.name}", rows_in=len(df)) as rec:
+            res = st.func(df)
+            rec.rows_out = len(res) if isinstance(res, pd.DataFrame) else len(df)
+        if st.output is not None:
+            outputs[st.output] = res
+            continue
+
+        if res is not None and res is not df:
+            # sorszűrő stage: új frame, minden oszlop "változott"
+            df = res
+            rows_version += 1
+        tick += 1
+        for c in st.writes:
+            versions[c] = tick
+        done[key] = (_state(st.reads), _state(st.writes), rows_version)
+
+    return df, outputs
@@ -0,0 +1,143 @@
+"""
+Időbeli esemény-absztrakció: felhasználónként ablakokba (bucket) vont események.
+
+Granularitások:
+  - "hour" / "day": naptári óra / nap,
+  - "window":       tetszőleges szélességű, egymást nem átfedő ablak (pl. "6h", "3D"),
+  - "session":      inaktivitási rés szerinti munkamenet (új bucket, ha két egymást
+                    követő esemény között több telt el, mint a gap).
+
+Minden bucketből egy (vagy label="category" esetén kategóriánként egy) absztrakt esemény
+lesz, így a log jóval kisebb, és az Alpha / Inductive bányászat gyorsan lefut.
+A számítás a to_event_frame rendezett kimenetén vektorizált: a bucket-határok egy
+összehasonlítással jönnek, a csoportosítás egész kulcsokon (bincount / unique) fut,
+a címkék csak az egyedi kategória-kombinációkra formázódnak.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .sessions import SESSION_GAP, session_boundaries
+
+GRANULARITIES = ("hour", "day", "window", "session")
+LABELS = ("set", "dominant", "category")
+
+_NS = {"hour": pd.Timedelta("1h").value, "day": pd.Timedelta("1D").value}
+
+
+def bucket_boundaries(case: np.ndarray, ts: np.ndarray, granularity: str,
+                      window: str | None = None, gap: str = SESSION_GAP) -> np.ndarray:
+    """
+    Eset, majd idő szerint rendezett események → bool tömb: itt kezdődik-e új bucket.
+    ts: int64 nanoszekundum (falióra szerint).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Ismeretlen granularitás: {granularity} (választható: {', '.join(GRANULARITIES)})")
+    if granularity == "session":
+        return session_boundaries(case, ts, gap)
+    new_case = np.r_[True, case[1:] != case[:-1]]
+    if granularity == "window":
+        if not window:
+            raise ValueError('A "window" granularitáshoz ablakszélesség kell (pl. window="6h").')
+        width = pd.Timedelta(window).value
+    else:
+        width = _NS[granularity]
+    slot = ts // width
+    return new_case | np.r_[True, slot[1:] != slot[:-1]]
+
+
+def _set_labels(group: np.ndarray, cat: np.ndarray, cat_names: np.ndarray, n_groups: int) -> np.ndarray:
+    """Bucketenként a jelen lévő kategóriák rendezett halmaza "A+B" alakban (bitmaszkon át)."""
+    if len(cat_names) > 62:
+        raise ValueError(f'label="set" legfeljebb 62 kategóriát kezel (most: {len(cat_names)}).')
+    order = np.argsort(cat_names)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    mask = np.zeros(n_groups, dtype=np.int64)
+    np.bitwise_or.at(mask, group, np.left_shift(np.int64(1), rank[cat]))
+    combos, inverse = np.unique(mask, return_inverse=True)
+    sorted_names = cat_names[order]
+    labels = np.array(["+".join(sorted_names[[b for b in range(len(order)) if m >> b & 1]])
+                       for m in combos], dtype=object)
+    return labels[inverse]
+
+
+def abstract_event_df(df_ev: pd.DataFrame, granularity: str = "day", label: str = "set",
+                      window: str | None = None, gap: str = SESSION_GAP) -> pd.DataFrame:
+    """
+    to_event_frame kimenet (eset és idő szerint rendezett) → absztrakt esemény-DataFrame.
+
+    label:
+      - "set":      concept:name = a bucketben előforduló kategóriák halmaza ("Hazi+Orai")
+      - "dominant": concept:name = a bucket leggyakoribb kategóriája (holtversenyben ábécérend)
+      - "category": bucketenként kategóriánként egy esemény, concept:name = kategória
+    Oszlopok: case:concept:name, concept:name, time:timestamp (bucket első eseménye),
+    esemeny_db (események száma), idotartam_s (első → utolsó esemény, másodperc).
+    """
+    if label not in LABELS:
+        raise ValueError(f"Ismeretlen címke-mód: {label} (választható: {', '.join(LABELS)})")
+    cols = ["case:concept:name", "concept:name", "time:timestamp", "esemeny_db", "idotartam_s"]
+    # felhasználóhoz nem köthető események nem kerülnek bucketbe (ahogy a heti aggregátumban sem)
+    df_ev = df_ev.dropna(subset=["case:concept:name", "concept:name", "time:timestamp"])
+    if df_ev.empty:
+        return df_ev.reindex(columns=cols)
+
+    stamps = df_ev["time:timestamp"]
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+    ts = stamps.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    case, case_names = pd.factorize(df_ev["case:concept:name"], sort=False)
+    cat, cat_names = pd.factorize(df_ev["concept:name"], sort=False)
+    case_names = np.asarray(case_names, dtype=object)
+    cat_names = np.asarray(cat_names, dtype=object)
+
+    start = bucket_boundaries(case, ts, granularity, window=window, gap=gap)
+    group = np.cumsum(start) - 1
+    n_groups = int(group[-1]) + 1
+    first = np.flatnonzero(start)
+    last = np.r_[first[1:], len(ts)] - 1
+    g_case = case_names[case[first]]
+    g_start = ts[first]
+    g_count = np.bincount(group, minlength=n_groups)
+    g_dur = (ts[last] - g_start) / 1e9
+
+    if label == "category":
+        n_cat = len(cat_names)
+        pairs, counts = np.unique(group.astype(np.int64) * n_cat + cat, return_counts=True)
+        g, c = pairs // n_cat, pairs % n_cat
+        out = pd.DataFrame({
+            "case:concept:name": g_case[g],
+            "concept:name": cat_names[c],
+            "time:timestamp": g_start[g],
+            "esemeny_db": counts,
+            "idotartam_s": g_dur[g],
+        })
+        # bucketen belül kategórianév szerint (a bucketek sorrendje marad)
+        out = out.iloc[np.lexsort((out["concept:name"].to_numpy(dtype=str), g))]
+    else:
+        if label == "set":
+            names = _set_labels(group, cat, cat_names, n_groups)
+        else:
+            n_cat = len(cat_names)
+            pairs, counts = np.unique(group.astype(np.int64) * n_cat + cat, return_counts=True)
+            g, c = pairs // n_cat, pairs % n_cat
+            # bucketenként: legnagyobb darabszám, holtversenyben a kisebb kategórianév
+            name_rank = np.argsort(np.argsort(cat_names))
+            order = np.lexsort((name_rank[c], -counts, g))
+            head = order[np.r_[True, g[order][1:] != g[order][:-1]]]
+            names = cat_names[c[head]]
+        out = pd.DataFrame({
+            "case:concept:name": g_case,
+            "concept:name": names,
+            "time:timestamp": g_start,
+            "esemeny_db": g_count,
+            "idotartam_s": g_dur,
+        })
+
+    out["case:concept:name"] = out["case:concept:name"].astype(str)
+    out["concept:name"] = out["concept:name"].astype(str)
+    out["time:timestamp"] = out["time:timestamp"].to_numpy().astype("datetime64[ns]")
+    out = out.reset_index(drop=True)[cols]
+    from pm4py.objects.log.util import dataframe_utils
+    return dataframe_utils.convert_timestamp_columns_in_df(out)
@@ -0,0 +1,272 @@
+"""
+Alignment alapú conformance: variánsonkénti alignmentek process poolon, időkerettel és lemez-cache-sel.
+
+- Fitness: minden variáns egyszer igazodik a hálóhoz (pm4py A* state equation), a pm4py
+  alignment-fitness képletével (költség / legjobb-legrosszabb költség), variáns-súllyal.
+- Precision: 1-align ETConformance – ugyanazokból az optimális alignmentekből. A modell-
+  projekció (látható címkék) prefixei adják az állapotokat; állapotonként az engedélyezett
+  látható tranzíciók vs. a logban ténylegesen következő aktivitások. A prefixeket így nem kell
+  külön-külön újra alignolni (a pm4py ALIGN_ETCONFORMANCE ezt teszi, ezért lassú nagy logon).
+- Időkeret: variánsonként max_align_time_trace (a pm4py keresés maga ellenőrzi). Ha lejár,
+  a variáns fitnessze token replay-ből jön (fallback), a precisionből kimarad; mindkettőt jelentjük.
+- Cache: modell-hash → {variáns → alignment}. A hash szerkezeti (címkék + élek, a tranzíció-
+  nevektől független), mert az inductive/heuristics hálók tranzícióinak neve futásonként változik.
+  A mentett lépések kanonikus tranzíció-azonosítókat használnak; visszajátszáskor ellenőrizzük,
+  hogy minden lépés tüzelhető – ha nem, a variánst újraszámoljuk.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
+
+import numpy as np
+import pm4py
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_alg
+from pm4py.algo.conformance.alignments.petri_net.variants import state_equation_a_star
+from pm4py.objects.log.obj import Event, Trace
+from pm4py.objects.petri_net import semantics
+from pm4py.objects.petri_net.utils import align_utils, check_soundness
+from pm4py.objects.petri_net.utils.align_utils import get_visible_transitions_eventually_enabled_by_marking
+from pm4py.util import constants
+
+from .config import ALIGN_TIMEOUT_S
+from .metrics import VariantLog, replay_log
+
+ACTIVITY_KEY = "concept:name"
+ALIGN_PARAMS = alignments_alg.Parameters
+SKIP = align_utils.SKIP
+
+
+# --- szerkezeti modell-hash + kanonikus tranzíció-azonosítók ---
+
+def _h(*parts) -> str:
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def canonical_model(net, im, fm) -> tuple[str, dict[str, str]]:
+    """
+    (modell-hash, tranzíciónév → kanonikus azonosító). Weisfeiler–Lehman-szerű színfinomítás:
+    kezdetben a hely színe a kezdő/vég jelölés, a tranzícióé a címke; körönként minden csúcs
+    színe a szomszédai színéből frissül, amíg a partíció finomodik.
+    """
+    color: dict[Any, str] = {p: _h("p", im[p], fm[p]) for p in net.places}
+    color.update({t: _h("t", t.label) for t in net.transitions})
+    n_classes = len(set(color.values()))
+    for _ in range(len(color)):
+        color = {
+            node: _h(c,
+                     sorted((a.weight, color[a.source]) for a in node.in_arcs),
+                     sorted((a.weight, color[a.target]) for a in node.out_arcs))
+            for node, c in color.items()
+        }
+        k = len(set(color.values()))
+        if k == n_classes:
+            break
+        n_classes = k
+    model_hash = _h(sorted(color.values()))
+    ids: dict[str, str] = {}
+    seen: Counter = Counter()
+    for t in sorted(net.transitions, key=lambda t: (color[t], t.name)):
+        ids[t.name] = f"{color[t]}#{seen[color[t]]}"
+        seen[color[t]] += 1
+    return model_hash, ids
+
+
+def variant_key(variant: tuple[str, ...]) -> str:
+    return constants.DEFAULT_VARIANT_SEP.join(variant)
+
+
+# --- worker oldal ---
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(net, im, fm, ids: dict[str, str], timeout: float) -> None:
+    _WORKER.update(net=net, im=im, fm=fm, ids=ids, timeout=timeout,
+                   bwc=state_equation_a_star.get_best_worst_cost(net, im, fm))
+
+
+def _align_one(variant: tuple[str, ...]) -> dict[str, Any]:
+    """Egy variáns optimális alignmentje; időtúllépésnél {"timeout": mp}."""
+    w = _WORKER
+    trace = Trace([Event({ACTIVITY_KEY: a}) for a in variant])
+    params = {
+        ALIGN_PARAMS.PARAM_MAX_ALIGN_TIME_TRACE: w["timeout"],
+        ALIGN_PARAMS.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+        ALIGN_PARAMS.ENABLE_BEST_WORST_COST: False,
+    }
+    t0 = time.perf_counter()
+    ali = alignments_alg.apply_trace(trace, w["net"], w["im"], w["fm"], parameters=params)
+    seconds = round(time.perf_counter() - t0, 3)
+    if ali is None:
+        return {"timeout": w["timeout"], "seconds": seconds}
+
+    # a pm4py apply_trace fitness-képlete (a legjobb-legrosszabb költséget egyszer számoljuk)
+    bwc = len(variant) * align_utils.STD_MODEL_LOG_MOVE_COST + w["bwc"]
+    den = bwc // align_utils.STD_MODEL_LOG_MOVE_COST
+    fitness = 1 - (ali["cost"] // align_utils.STD_MODEL_LOG_MOVE_COST) / den if den > 0 else 0
+    moves = [[None if names[1] == SKIP else w["ids"][names[1]], labels[1]]
+             for names, labels in ali["alignment"]]
+    return {"cost": ali["cost"], "bwc": bwc, "fitness": fitness,
+            "visited_states": ali["visited_states"], "seconds": seconds, "moves": moves}
+
+
+# --- szülő oldal ---
+
+def align_variants(variants: list[tuple[str, ...]], net, im, fm, workers: int | None = None,
+                   timeout: float = ALIGN_TIMEOUT_S, cache=None, refresh: bool = False) -> dict[str, dict[str, Any]]:
+    """
+    Variáns-kulcs → alignment eredmény. A cache-ben lévő (és érvényes) eredményeket
+    újrahasználja (refresh=True: nem); a többit a leghosszabbal kezdve osztja szét a worker poolon.
+    """
+    model_hash, ids = canonical_model(net, im, fm)
+    key = None
+    stored: dict[str, dict[str, Any]] = {}
+    if cache is not None:
+        key = cache.make_key("alignments", params={"model": model_hash, "pm4py": pm4py.__version__},
+                             code=[__file__])
+        stored = cache.load(key) or {}
+
+    def reusable(r):
+        # időtúllépést csak akkor fogadunk el, ha most sem adnánk több időt
+        return not refresh and r is not None and ("moves" in r or r.get("timeout", 0) >= timeout)
+
+    todo = sorted({v for v in variants if not reusable(stored.get(variant_key(v)))}, key=len, reverse=True)
+    if todo:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+        print(f"   Alignment: {len(todo)} variáns ({len(variants) - len(todo)} cache-ből), "
+              f"{workers} worker, időkeret {timeout:g} s/variáns")
+        if workers == 1:
+            _init_worker(net, im, fm, ids, timeout)
+            for v in todo:
+                stored[variant_key(v)] = _align_one(v)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(net, im, fm, ids, timeout)) as pool:
+                futures = {pool.submit(_align_one, v): v for v in todo}
+                for fut in as_completed(futures):
+                    stored[variant_key(futures[fut])] = fut.result()
+        if cache is not None:
+            cache.save(key, data=stored)
+    return {variant_key(v): stored[variant_key(v)] for v in variants}
+
+
+def _model_states(moves, net, im, by_id) -> list[tuple[Any, str]] | None:
+    """
+    Alignment lépései → (jelölés, következő látható modellcímke) párok minden látható
+    modell-lépés előtt. None, ha egy mentett lépés nem tüzelhető (elavult cache).
+    """
+    marking = im
+    out = []
+    for cid, label in moves:
+        if cid is None:                      # log-lépés: a modell nem mozdul
+            continue
+        t = by_id.get(cid)
+        if t is None or not semantics.is_enabled(t, net, marking):
+            return None
+        if t.label is not None:
+            out.append((marking, t.label))
+        marking = semantics.execute(t, net, marking)
+    return out
+
+
+def _token_fitness(variants: list[tuple[str, ...]], net, im, fm) -> dict[str, float]:
+    """Fallback: token replay trace-fitness az alignment nélkül maradt variánsokra."""
+    if not variants:
+        return {}
+    frame = VariantLog(variants=variants, weights=np.ones(len(variants), dtype=np.int64), source=None).frame()
+    return {variant_key(v): float(r["trace_fitness"]) for v, r in zip(variants, replay_log(frame, net, im, fm))}
+
+
+def alignment_metrics(vlog, net, im, fm, workers: int | None = None, timeout: float = ALIGN_TIMEOUT_S,
+                      cache=None) -> dict[str, Any]:
+    """
+    Alignment fitness (átlagos trace-fitness, log-fitness, illeszkedő trace-ek %-a) és
+    1-align ETC precision egy VariantLog-ra. Az időtúllépett variánsok fitnessze token
+    replay-ből jön, a precisionből kimaradnak.
+    """
+    t0 = time.perf_counter()
+    # a pm4py is csak easy sound hálón alignol: máshol a keresés a végjelölést sosem éri el
+    if not check_soundness.check_easy_soundness_net_in_fin_marking(net, im, fm):
+        print("⚠️  A háló nem easy sound – alignment helyett token replay fitness (fallback).")
+        results = {variant_key(v): {"unsound": True} for v in vlog.variants}
+    else:
+        results = align_variants(vlog.variants, net, im, fm, workers=workers, timeout=timeout, cache=cache)
+    _, ids = canonical_model(net, im, fm)
+    by_id = {ids[t.name]: t for t in net.transitions}
+    states = {k: _model_states(r["moves"], net, im, by_id) for k, r in results.items() if "moves" in r}
+    stale = [v for v in vlog.variants if variant_key(v) in states and states[variant_key(v)] is None]
+    if stale:                                # elavult cache-bejegyzés (pl. hash-ütközés): újraszámolás
+        results.update(align_variants(stale, net, im, fm, workers=workers, timeout=timeout,
+                                      cache=cache, refresh=True))
+        states.update({variant_key(v): _model_states(results[variant_key(v)]["moves"], net, im, by_id)
+                       for v in stale if "moves" in results[variant_key(v)]})
+    fallback = _token_fitness([v for v in vlog.variants if states.get(variant_key(v)) is None], net, im, fm)
+
+    # precision-állapotok: modell-prefix azonosító → (engedélyezett címkék, súly, megfigyelt folytatások)
+    state_ids: dict[tuple[int, str], int] = {}
+    enabled: dict[int, set] = {}
+    weight: Counter = Counter()
+    observed: dict[int, set] = {}
+    enabled_memo: dict[Any, frozenset] = {}
+
+    def eventually_enabled(marking):
+        k = frozenset((p.name, n) for p, n in marking.items())
+        if k not in enabled_memo:
+            enabled_memo[k] = frozenset(t.label for t in
+                                        get_visible_transitions_eventually_enabled_by_marking(net, marking)
+                                        if t.label is not None)
+        return enabled_memo[k]
+
+    fit = np.zeros(vlog.n_variants)
+    aligned = np.zeros(vlog.n_variants, dtype=bool)
+    cost = bwc = 0.0
+    for i, (v, w) in enumerate(zip(vlog.variants, vlog.weights)):
+        r = results[variant_key(v)]
+        if states.get(variant_key(v)) is None:
+            fit[i] = fallback[variant_key(v)]
+            continue
+        aligned[i] = True
+        fit[i] = r["fitness"]
+        cost += w * r["cost"]
+        bwc += w * r["bwc"]
+        sid = 0
+        for marking, label in states[variant_key(v)]:
+            enabled.setdefault(sid, set()).update(eventually_enabled(marking))
+            weight[sid] += int(w)
+            observed.setdefault(sid, set()).add(label)
+            sid = state_ids.setdefault((sid, label), len(state_ids) + 1)
+
+    sum_at = sum(weight[s] * len(enabled[s]) for s in weight)
+    sum_ee = sum(weight[s] * len(enabled[s] - observed[s]) for s in weight)
+    weights = vlog.weights
+    return {
+        "fitness": float(np.dot(weights, fit) / weights.sum()) if len(weights) else 0.0,
+        "log_fitness": float(1 - cost / bwc) if bwc > 0 else None,
+        "perc_fit_traces": float(100.0 * weights[(fit == 1.0) & aligned].sum() / weights.sum()) if len(weights) else 0.0,
+        "precision": (float(1 - sum_ee / sum_at) if sum_at > 0 else 1.0) if aligned.any() else None,
+        "aligned_variants": int(aligned.sum()),
+        "fallback_variants": int((~aligned).sum()),
+        "fallback_traces": int(weights[~aligned].sum()),
+        "easy_sound": not any("unsound" in r for r in results.values()),
+        "timeout_s": timeout,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def summary_lines(a: dict[str, Any]) -> list[str]:
+    """Az alignment_metrics eredményének rövid, kiírható összefoglalója."""
+    def fmt(x):
+        return "n/a" if x is None else f"{x:.4f}"
+
+    return [
+        f"Alignment fitness:   {fmt(a['fitness'])} (log: {fmt(a['log_fitness'])}, "
+        f"illeszkedő trace-ek: {a['perc_fit_traces']:.1f}%)",
+        f"Alignment precision: {fmt(a['precision'])} (1-align ETC)",
+        f"Alignment: {a['aligned_variants']} variáns alignolva, {a['fallback_variants']} fallback "
+        f"({a['fallback_traces']} trace), {a['seconds']:.1f} s",
+    ]
@@ -2,3 +2,6 @@ DEPENDENCY_THRESH  = 0.60
 MIN_ACTIVITY_OCC   = 1
 MIN_DFG_OCC        = 1
 AND_MEASURE_THRESH = 0.65
+
+# Alignment: időkeret variánsonként (másodperc); túllépéskor token replay tartalék
+ALIGN_TIMEOUT_S    = 60.0
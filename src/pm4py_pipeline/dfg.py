@@ -0,0 +1,111 @@
+"""
+Vektorizált directly-follows számítás közvetlenül az esemény-DataFrame-ből.
+
+Az eset és aktivitás oszlopot egész kódokra képezzük (factorize), és egyetlen
+NumPy-menetben számoljuk:
+  - DFG élek gyakorisága + átlagos / medián átmeneti idő (másodperc),
+  - kezdő és záró aktivitások gyakorisága,
+  - aktivitás-gyakoriságok,
+  - a Heuristics Minerhez a 2-es ablakú DFG és az a-b-c hármasok gyakorisága.
+
+A bemenet a to_event_frame / load_log kimenete, ami eset és idő szerint már rendezett
+(presorted=True); más bemenetnél stabil rendezés fut előtte. Az eredmény szótárai a
+pm4py DFG-formátumát követik ((a, b) → érték), így a pm4py vizualizálói és bányászai
+közvetlenül fogadják.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CASE_KEY = "case:concept:name"
+ACTIVITY_KEY = "concept:name"
+TIMESTAMP_KEY = "time:timestamp"
+
+
+@dataclass
+class DirectlyFollows:
+    frequency: dict[tuple[str, str], int]
+    mean_duration: dict[tuple[str, str], float]
+    median_duration: dict[tuple[str, str], float]
+    start_activities: dict[str, int]
+    end_activities: dict[str, int]
+    activities: dict[str, int]
+    window_2: dict[tuple[str, str], int]
+    freq_triples: dict[tuple[str, str, str], int]
+
+
+def _count_pairs(codes: list[np.ndarray], names: np.ndarray, n: int):
+    """Kódsorok (azonos hosszúak) → egyedi kombinációk, inverz index, darabszám, névtuple-ök."""
+    key = np.zeros(len(codes[0]), dtype=np.int64)
+    for c in codes:
+        key = key * n + c
+    uniq, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+    parts = []
+    rest = uniq
+    for _ in codes:
+        parts.append(rest % n)
+        rest = rest // n
+    labels = list(zip(*(names[p] for p in reversed(parts))))
+    return labels, inverse, counts
+
+
+def _group_median(values: np.ndarray, groups: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Csoportonkénti medián egy rendezéssel (csoport, érték) szerint."""
+    order = np.lexsort((values, groups))
+    v = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    lo = starts + (counts - 1) // 2
+    hi = starts + counts // 2
+    return (v[lo] + v[hi]) / 2.0
+
+
+def directly_follows(df: pd.DataFrame, case_col: str = CASE_KEY, act_col: str = ACTIVITY_KEY,
+                     ts_col: str = TIMESTAMP_KEY, presorted: bool = True) -> DirectlyFollows:
+    """Eseménytábla → DirectlyFollows, egyetlen vektorizált menetben (Python ciklus az eseményeken nincs)."""
+    df = df.dropna(subset=[case_col, act_col])
+    case, _ = pd.factorize(df[case_col], sort=False)
+    act, act_names = pd.factorize(df[act_col], sort=False)
+    act_names = np.asarray(act_names, dtype=object)
+    has_ts = ts_col in df.columns
+    ts = (df[ts_col].to_numpy(dtype="datetime64[ns]").view(np.int64) if has_ts
+          else np.zeros(len(df), dtype=np.int64))
+    if not presorted:
+        order = np.lexsort((ts, case)) if has_ts else np.argsort(case, kind="stable")
+        case, act, ts = case[order], act[order], ts[order]
+    n = max(len(act_names), 1)
+
+    out = DirectlyFollows({}, {}, {}, {}, {}, {}, {}, {})
+    if not len(act):
+        return out
+
+    # aktivitás-, kezdő- és záró gyakoriságok
+    out.activities = dict(zip(act_names, np.bincount(act, minlength=n).tolist()))
+    first = np.concatenate(([True], case[1:] != case[:-1]))
+    last = np.concatenate((case[1:] != case[:-1], [True]))
+    for target, mask in ((out.start_activities, first), (out.end_activities, last)):
+        counts = np.bincount(act[mask], minlength=n)
+        target.update({act_names[i]: int(counts[i]) for i in np.flatnonzero(counts)})
+
+    # DFG: szomszédos események ugyanazon esetben
+    same1 = case[1:] == case[:-1]
+    if same1.any():
+        labels, inverse, counts = _count_pairs([act[:-1][same1], act[1:][same1]], act_names, n)
+        dur = (ts[1:] - ts[:-1])[same1] / 1e9
+        means = np.bincount(inverse, weights=dur) / counts
+        medians = _group_median(dur, inverse, counts)
+        out.frequency = dict(zip(labels, counts.tolist()))
+        out.mean_duration = dict(zip(labels, means.tolist()))
+        out.median_duration = dict(zip(labels, medians.tolist()))
+
+    # 2-es ablak + hármasok (a Heuristics Miner hurokdetektálásához)
+    if len(act) > 2:
+        same2 = same1[:-1] & same1[1:]
+        if same2.any():
+            labels, _, counts = _count_pairs([act[:-2][same2], act[2:][same2]], act_names, n)
+            out.window_2 = dict(zip(labels, counts.tolist()))
+            labels, _, counts = _count_pairs([act[:-2][same2], act[1:-1][same2], act[2:][same2]], act_names, n)
+            out.freq_triples = dict(zip(labels, counts.tolist()))
+    return out
@@ -0,0 +1,46 @@
+"""
+Bányász-regiszter: név → felfedező függvény (log, **paraméterek) → (háló, kezdő, vég jelölés).
+
+A futtatók (main_evaluate_grid.py, sweep-ek) ezen keresztül választanak bányászt,
+így egy új algoritmus egy bejegyzéssel elérhető mindenhol. A pm4py a felfedező
+függvényeken belül töltődik be: a regiszter és a param_grid import nélkül is használható
+(CLI választék, jobok összeállítása).
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Any, Callable
+
+
+def discover_alpha(log):
+    import pm4py
+    return pm4py.discover_petri_net_alpha(log)
+
+
+def discover_heuristics(log, dependency_threshold: float = 0.5, and_threshold: float = 0.65,
+                        loop_two_threshold: float = 0.5):
+    import pm4py
+    return pm4py.discover_petri_net_heuristics(
+        log,
+        dependency_threshold=dependency_threshold,
+        and_threshold=and_threshold,
+        loop_two_threshold=loop_two_threshold,
+    )
+
+
+def discover_inductive(log, noise_threshold: float = 0.0):
+    import pm4py
+    return pm4py.discover_petri_net_inductive(log, noise_threshold=noise_threshold)
+
+
+MINERS: dict[str, Callable[..., Any]] = {
+    "alpha": discover_alpha,
+    "heuristics": discover_heuristics,
+    "inductive": discover_inductive,
+}
+
+
+def param_grid(**values: list) -> list[dict[str, Any]]:
+    """Paraméterlisták Descartes-szorzata: param_grid(a=[1, 2], b=[3]) → [{a:1,b:3}, {a:2,b:3}]."""
+    keys = list(values)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(values[k] for k in keys))]
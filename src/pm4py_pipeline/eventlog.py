@@ -3,10 +3,15 @@ from __future__ import annotations
 import re
 from pathlib import Path
 from typing import Tuple
+from xml.sax.saxutils import quoteattr
+import numpy as np
 import pandas as pd
-import pm4py
-from pm4py.objects.log.util import dataframe_utils
-from pm4py.objects.conversion.log import converter as log_converter
+
+from src.data_loading import as_datetime
+from src.utils.profiling import profiled
+from .weekly import WeeklyAggregate, weekly_aggregate
+from .abstraction import abstract_event_df
+from .sessions import SESSION_GAP, session_event_df, session_stats
 
 REQUIRED = {"user_id", "Uj_oszlop", "Idő_dt"}
 
@@ -38,42 +43,147 @@ def fix_xes_for_prom(path: Path) -> None:
     except Exception as e:
         print(f"⚠️ Nem sikerült a XES header javítása ({path}): {e}")
 
+# --- STREAMING XES ÍRÓ (DataFrame → fájl, EventLog objektum nélkül) ---
+
+CASE_KEY = "case:concept:name"
+
+# ProM-kompatibilis fejléc: decimális xes.version, üres xes.features (nincs szükség utólagos fixre)
+_XES_HEADER = (
+    '<?xml version="1.0" encoding="utf-8" ?>\n'
+    '<log xes.version="1.0" xes.features="" xmlns="http://www.xes-standard.org/">\n'
+    '\t<extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext" />\n'
+    '\t<extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext" />\n'
+    '\t<string key="origin" value="csv" />\n'
+)
+
+
+def _xes_values(s: pd.Series) -> tuple[str, np.ndarray]:
+    """Oszlop → (XES típus, szöveges értékek object tömbként; hiányzó érték → None)."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        # naiv idő = UTC (ahogy a pm4py is írta); isoformat: tört másodperc csak ha nem nulla
+        ts = (s.dt.tz_convert("UTC").dt.tz_localize(None) if s.dt.tz is not None else s).to_numpy()
+        txt = np.datetime_as_string(ts, unit="s").astype(object)
+        frac = ts.astype("datetime64[us]") != ts.astype("datetime64[s]")
+        if frac.any():
+            txt[frac] = np.datetime_as_string(ts[frac], unit="us").astype(object)
+        out = txt + "+00:00"
+        out[np.isnat(ts)] = None
+        return "date", out
+    if pd.api.types.is_bool_dtype(s):
+        return "boolean", s.map({True: "true", False: "false"}).to_numpy(dtype=object, na_value=None)
+    if pd.api.types.is_integer_dtype(s):
+        kind = "int"
+    elif pd.api.types.is_float_dtype(s):
+        kind = "float"
+    else:
+        kind = "string"
+    return kind, s.astype("string").to_numpy(dtype=object, na_value=None)
+
+
+def _attr_lines(s: pd.Series, indent: str) -> np.ndarray:
+    """
+    Soronkénti '<típus key=".." value=".." />' sorok. A formázás és az escape-elés
+    csak az egyedi értékeken fut, a sorokra kódok alapján szórjuk vissza.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    uniques = pd.Series(uniques)
+    if isinstance(uniques.dtype, pd.CategoricalDtype):
+        uniques = uniques.astype(uniques.dtype.categories.dtype)
+    kind, vals = _xes_values(uniques)
+    head = f"{indent}<{kind} key={quoteattr(str(s.name))} value="
+    if kind in ("date", "int", "float", "boolean"):
+        # ezekben nincs escape-elendő karakter
+        lines = np.append(head + '"' + vals + '" />\n', "").astype(object)
+    else:
+        lines = np.array([head + quoteattr(v) + " />\n" for v in vals] + [""], dtype=object)
+    return lines[codes]                      # -1 (hiányzó) → utolsó elem: üres sor, az attribútum kimarad
+
+
+def write_xes_frame(df: pd.DataFrame, out_path: Path, case_col: str = CASE_KEY,
+                    chunk_rows: int = 100_000) -> None:
+    """
+    Eset szerint rendezett esemény-DataFrame közvetlen XES-be írása, pufferelt streamként.
+    A case_col oszlop a trace neve, a többi oszlop (sorrendben) esemény-attribútum;
+    a típus a dtype-ból jön (int/float/boolean/date/string), hiányzó érték nem íródik ki.
+    """
+    event_cols = [c for c in df.columns if c != case_col]
+    # hiányzó esetazonosító → "nan" trace (ahogy a pm4py EventLog-konverzió is írta)
+    case = df[case_col].astype("string").fillna("nan").to_numpy(dtype=object)
+    # új trace ott kezdődik, ahol az esetazonosító változik
+    starts = np.flatnonzero(np.r_[True, case[1:] != case[:-1]]) if len(case) else np.array([], dtype=int)
+
+    with open(out_path, "w", encoding="utf-8", newline="\n", buffering=1 << 20) as f:
+        f.write(_XES_HEADER)
+        for lo in range(0, len(df), chunk_rows):
+            hi = min(lo + chunk_rows, len(df))
+            part = df.iloc[lo:hi]
+            body = np.full(hi - lo, "\t\t<event>\n", dtype=object)
+            for c in event_cols:
+                body = body + _attr_lines(part[c], "\t\t\t")
+            body = body + "\t\t</event>\n"
+
+            # trace-határok: előző trace lezárása + új trace nyitása az esemény elé
+            first = starts[(starts >= lo) & (starts < hi)]
+            for i in first:
+                opener = (("\t</trace>\n" if i > 0 else "") + "\t<trace>\n"
+                          f"\t\t<string key=\"concept:name\" value={quoteattr(case[i])} />\n")
+                body[i - lo] = opener + body[i - lo]
+            f.writelines(body)
+        if len(df):
+            f.write("\t</trace>\n")
+        f.write("</log>\n")
+
+
 # --- NAPI ESEMÉNYSZINTŰ XES ---
 
-def to_event_log(df_src: pd.DataFrame):
-    missing = REQUIRED - set(df_src.columns)
+def to_event_frame(df_src: pd.DataFrame, attrs: tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    PM4Py-formátumú esemény-DataFrame (case:concept:name, concept:name, time:timestamp),
+    eset és idő szerint rendezve. Az attrs oszlopok (pl. a collapse_runs run-attribútumai)
+    változatlan néven, eseményattribútumként utánuk kerülnek.
+    """
+    missing = (REQUIRED | set(attrs)) - set(df_src.columns)
     assert not missing, f"Hiányzó oszlop(ok): {missing}"
 
-    df_pm = df_src[["user_id", "Uj_oszlop", "Idő_dt"]].copy()
-    df_pm["time:timestamp"] = pd.to_datetime(df_pm["Idő_dt"], errors="coerce")
+    df_pm = df_src[["user_id", "Uj_oszlop", "Idő_dt", *attrs]].copy()
+    df_pm["time:timestamp"] = as_datetime(df_pm["Idő_dt"])
     df_pm = (
         df_pm.dropna(subset=["time:timestamp"])
              .rename(columns={
                  "user_id": "case:concept:name",
                  "Uj_oszlop": "concept:name",
-             })[["case:concept:name", "concept:name", "time:timestamp"]]
+             })[["case:concept:name", "concept:name", "time:timestamp", *attrs]]
     )
 
     df_pm["case:concept:name"] = df_pm["case:concept:name"].astype(str)
     df_pm["concept:name"] = df_pm["concept:name"].astype(str)
-    df_pm = df_pm.sort_values(["case:concept:name", "time:timestamp"]).reset_index(drop=True)
-    df_pm = dataframe_utils.convert_timestamp_columns_in_df(df_pm)
+    return df_pm.sort_values(["case:concept:name", "time:timestamp"], kind="stable").reset_index(drop=True)
 
+
+@profiled("xes.to_event_log")
+def to_event_log(df_src: pd.DataFrame):
+    # pm4py csak itt kell (lusta import: a modul betöltése pm4py nélkül gyors)
+    from pm4py.objects.log.util import dataframe_utils
+    from pm4py.objects.conversion.log import converter as log_converter
+
+    df_pm = dataframe_utils.convert_timestamp_columns_in_df(to_event_frame(df_src))
     params = {log_converter.Variants.TO_EVENT_LOG.value.Parameters.CASE_ID_KEY: "case:concept:name"}
     event_log = log_converter.apply(df_pm, variant=log_converter.Variants.TO_EVENT_LOG, parameters=params)
     return event_log
 
 
-def export_xes(df_src: pd.DataFrame, out_path: Path):
+@profiled("xes.export_xes")
+def export_xes(df_src: pd.DataFrame, out_path: Path, attrs: tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Napi eseményszintű XES (streaming író); visszatér a kiírt esemény-DataFrame-mel.
+    Az attrs oszlopok további eseményattribútumként íródnak ki.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    event_log = to_event_log(df_src)
-    pm4py.write_xes(event_log, str(out_path))
-
-    # <<< ÚJ: fejléc-fix ProM-hoz
-    fix_xes_for_prom(out_path)
+    df_pm = to_event_frame(df_src, attrs=attrs)
+    write_xes_frame(df_pm, out_path)
 
     print(f"XES mentve: {out_path} | Események: {len(df_src)} | Esetek: {df_src['user_id'].nunique()}")
-    return event_log
+    return df_pm
 
 
 
@@ -85,70 +195,79 @@ def _weekly_event_df(df_src: pd.DataFrame, include_category: bool = True) -> pd.
     - include_category=True:  concept:name = "W{week}-{year} | {Uj_oszlop}"
     - include_category=False: concept:name = "W{week}-{year}"
     1 esemény / (user_id, hét[, kategória]) a hétfő 00:00 időpontra.
+    Több heti kimenethez egyszer számolt weekly_aggregate(...).events() olcsóbb.
     """
     need = {"user_id", "Uj_oszlop", "Idő_dt"}
     missing = need - set(df_src.columns)
     assert not missing, f"Hiányzó oszlop(ok) a heti exporthoz: {missing}"
+    return weekly_aggregate(df_src).events(include_category)
+
 
-    df = df_src.copy()
-    df["Idő_dt"] = pd.to_datetime(df["Idő_dt"], errors="coerce")
-    df = df.dropna(subset=["Idő_dt", "user_id"])
-
-    iso = df["Idő_dt"].dt.isocalendar()
-    df["_iso_year"] = iso.year.astype(int)
-    df["_iso_week"] = iso.week.astype(int)
-    df["_week_start"] = df["Idő_dt"].dt.to_period("W-MON").dt.start_time
-
-    if include_category:
-        df["_event_name"] = (
-            "W" + df["_iso_week"].astype(str).str.zfill(2) + "-" + df["_iso_year"].astype(str)
-            + " | " + df["Uj_oszlop"].astype(str)
-        )
-        group_cols = ["user_id", "_iso_year", "_iso_week", "Uj_oszlop"]
+@profiled("xes.export_weekly_xes")
+def export_weekly_xes(
+    df_src: pd.DataFrame,
+    out_path: Path,
+    include_category: bool = True,
+    weekly: WeeklyAggregate | None = None,
+) -> pd.DataFrame:
+    """
+    Heti bontású XES export (streaming író) + a használt esemény-DataFrame visszaadása.
+    Ha a weekly aggregátum meg van adva, abból dolgozunk (a df_src nem kerül újra feldolgozásra).
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if weekly is not None:
+        df_ev = weekly.events(include_category)
     else:
-        df["_event_name"] = "W" + df["_iso_week"].astype(str).str.zfill(2) + "-" + df["_iso_year"].astype(str)
-        group_cols = ["user_id", "_iso_year", "_iso_week"]
-
-    ev = (
-        df.groupby(group_cols, as_index=False)
-          .agg({"_week_start": "min", "_event_name": "first"})
-          .rename(columns={
-              "_week_start": "time:timestamp",
-              "user_id": "case:concept:name",
-              "_event_name": "concept:name"
-          })
-    )
+        df_ev = _weekly_event_df(df_src, include_category=include_category)
+    write_xes_frame(df_ev, out_path)
 
-    ev["case:concept:name"] = ev["case:concept:name"].astype(str)
-    ev["concept:name"] = ev["concept:name"].astype(str)
-    ev["time:timestamp"] = pd.to_datetime(ev["time:timestamp"], errors="coerce")
-    ev = ev.sort_values(["case:concept:name", "time:timestamp"]).reset_index(drop=True)
-    ev = dataframe_utils.convert_timestamp_columns_in_df(ev)
-    return ev
+    print(f"XES (heti) mentve: {out_path} | Események: {len(df_ev)} | Esetek: {df_ev['case:concept:name'].nunique()}")
+    return df_ev
 
 
-def export_weekly_xes(
+# --- ABSZTRAHÁLT (ÓRA / NAP / ABLAK / MUNKAMENET) XES ---
+
+@profiled("xes.export_abstract_xes")
+def export_abstract_xes(
     df_src: pd.DataFrame,
     out_path: Path,
-    include_category: bool = True
-) -> tuple[object, pd.DataFrame]:
+    granularity: str = "day",
+    label: str = "set",
+    window: str | None = None,
+    gap: str = SESSION_GAP,
+) -> pd.DataFrame:
     """
-    Heti bontású XES export + a használt esemény-DataFrame visszaadása.
+    Felhasználónként időablakokba vont XES export (lásd abstraction.abstract_event_df);
+    visszatér a kiírt absztrakt esemény-DataFrame-mel.
     """
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    df_ev = abstract_event_df(to_event_frame(df_src), granularity=granularity, label=label,
+                              window=window, gap=gap)
+    write_xes_frame(df_ev, out_path)
 
-    df_ev = _weekly_event_df(df_src, include_category=include_category)
+    print(f"XES ({granularity}) mentve: {out_path} | Események: {len(df_ev)} (eredeti: {len(df_src)}) "
+          f"| Esetek: {df_ev['case:concept:name'].nunique()}")
+    return df_ev
 
-    params = {log_converter.Variants.TO_EVENT_LOG.value.Parameters.CASE_ID_KEY: "case:concept:name"}
-    event_log = log_converter.apply(df_ev, variant=log_converter.Variants.TO_EVENT_LOG, parameters=params)
 
-    pm4py.write_xes(event_log, str(out_path))
+# --- MUNKAMENET-SZINTŰ XES ---
 
-    # <<< ÚJ: fejléc-fix ProM-hoz
-    fix_xes_for_prom(out_path)
+@profiled("xes.export_session_xes")
+def export_session_xes(df_src: pd.DataFrame, out_path: Path,
+                       gap: str = SESSION_GAP) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Munkamenet-szintű XES (eset = felhasználó + munkamenet sorszám, inaktivitási rés szerint);
+    visszatér a kiírt esemény-DataFrame-mel és a munkamenet-statisztikával.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    df_pm = to_event_frame(df_src)
+    df_ev = session_event_df(df_pm, gap=gap)
+    write_xes_frame(df_ev, out_path)
 
-    print(f"XES (heti) mentve: {out_path} | Események: {len(df_ev)} | Esetek: {df_ev['case:concept:name'].nunique()}")
-    return event_log, df_ev
+    print(f"XES (munkamenet, gap={gap}) mentve: {out_path} | Események: {len(df_ev)} "
+          f"| Esetek: {df_ev['case:concept:name'].nunique()} (felhasználók: {df_ev['user_id'].nunique()})")
+    return df_ev, session_stats(df_pm, gap=gap)
 
 
 
@@ -160,18 +279,4 @@ def weekly_counts_dataframe(df_src: pd.DataFrame) -> pd.DataFrame:
     need = {"user_id", "Uj_oszlop", "Idő_dt"}
     missing = need - set(df_src.columns)
     assert not missing, f"Hiányzó oszlop(ok) a weekly_counts_dataframe-hoz: {missing}"
-
-    df = df_src.copy()
-    df["Idő_dt"] = pd.to_datetime(df["Idő_dt"], errors="coerce")
-    df = df.dropna(subset=["Idő_dt", "user_id"])
-
-    iso = df["Idő_dt"].dt.isocalendar()
-    out = (
-        df.assign(iso_year=iso.year.astype(int), iso_week=iso.week.astype(int))
-          .groupby(["user_id", "iso_year", "iso_week", "Uj_oszlop"], as_index=False)
-          .size()
-          .rename(columns={"size": "esemeny_db"})
-          .sort_values(["user_id", "iso_year", "iso_week", "Uj_oszlop"])
-          .reset_index(drop=True)
-    )
-    return out
+    return weekly_aggregate(df_src).counts_frame()
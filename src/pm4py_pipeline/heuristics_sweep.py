@@ -0,0 +1,108 @@
+"""
+Heuristics Miner küszöb-sweep a log statisztikáinak újrahasznosításával.
+
+A Heuristics Miner drága része a log bejárása: DFG, 2-es ablakú DFG (hurkok),
+frekvencia-hármasok (a-b-a minták), aktivitás-, kezdő- és végaktivitás-számok.
+Ezek nem függnek a küszöböktől, ezért egyszer számoljuk őket (HeuristicsStats);
+küszöb-kombinációnként csak a függőségi / AND / 2-hosszú hurok mértékek
+újraküszöbölése fut (a pm4py calculate() a gyorsítótárazott szótárakon, a log érintése nélkül).
+
+Különböző küszöbök gyakran ugyanazt a hálót adják; a hálókat szerkezeti aláírásuk
+szerint csoportosítjuk, és minden különböző hálót csak egyszer értékelünk ki.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+import pm4py
+from pm4py.algo.discovery.heuristics.variants import classic as heu_classic
+from pm4py.objects.conversion.heuristics_net import converter as hn_converter
+
+from .config import MIN_ACTIVITY_OCC, MIN_DFG_OCC
+from .dfg import DirectlyFollows, directly_follows
+
+HEU_PARAMS = heu_classic.Parameters
+
+# a Pareto-front célfüggvényei (mind maximalizálandó)
+PARETO_OBJECTIVES = ("fitness", "precision", "simplicity")
+
+
+@dataclass
+class HeuristicsStats:
+    """A küszöbfüggetlen log-statisztikák, amelyekből a Heuristics háló felépül."""
+    dfg: dict
+    dfg_window_2: dict
+    freq_triples: dict
+    activities_occurrences: dict
+    start_activities: dict
+    end_activities: dict
+
+    @classmethod
+    def from_directly_follows(cls, d: DirectlyFollows) -> "HeuristicsStats":
+        return cls(dfg=d.frequency, dfg_window_2=d.window_2, freq_triples=d.freq_triples,
+                   activities_occurrences=d.activities, start_activities=d.start_activities,
+                   end_activities=d.end_activities)
+
+    def heuristics_net(self, dependency_threshold: float = 0.5, and_threshold: float = 0.65,
+                       loop_two_threshold: float = 0.5):
+        """HeuristicsNet a megadott küszöbökkel – csak a szótárakból, log-bejárás nélkül."""
+        return heu_classic.apply_heu_dfg(
+            self.dfg,
+            activities=list(self.activities_occurrences),
+            activities_occurrences=self.activities_occurrences,
+            start_activities=self.start_activities,
+            end_activities=self.end_activities,
+            dfg_window_2=self.dfg_window_2,
+            freq_triples=self.freq_triples,
+            parameters={
+                HEU_PARAMS.DEPENDENCY_THRESH: dependency_threshold,
+                HEU_PARAMS.AND_MEASURE_THRESH: and_threshold,
+                HEU_PARAMS.LOOP_LENGTH_TWO_THRESH: loop_two_threshold,
+                HEU_PARAMS.MIN_ACT_COUNT: MIN_ACTIVITY_OCC,
+                HEU_PARAMS.MIN_DFG_OCCURRENCES: MIN_DFG_OCC,
+            },
+        )
+
+
+def heuristics_stats(log) -> HeuristicsStats:
+    """
+    A pm4py apply_heu_pandas-szal azonos statisztikák, egyszer (egy vektorizált menetben) kiszámolva.
+    A bemenet pm4py-formátumú DataFrame (load_log, eset és idő szerint rendezett) vagy EventLog.
+    """
+    df = log if isinstance(log, pd.DataFrame) else pm4py.convert_to_dataframe(log)
+    return HeuristicsStats.from_directly_follows(directly_follows(df))
+
+
+def net_signature(heu_net) -> str:
+    """
+    A HeuristicsNet szerkezeti aláírása: csomópontok, élek, AND-kötések, kezdő/vég jelölés.
+    Azonos aláírású hálókból ugyanaz a Petri-háló lesz.
+    """
+    parts = []
+    for name in sorted(heu_net.nodes):
+        node = heu_net.nodes[name]
+        parts.append((
+            name,
+            bool(node.is_start_activity),
+            bool(node.is_end_activity),
+            sorted(n.node_name for n in node.output_connections),
+            sorted((a, b) for a in node.and_measures_in for b in node.and_measures_in[a]),
+            sorted((a, b) for a in node.and_measures_out for b in node.and_measures_out[a]),
+        ))
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def to_petri(heu_net):
+    return hn_converter.apply(heu_net)
+
+
+def pareto_front(rows: list[dict[str, Any]], objectives: tuple[str, ...] = PARETO_OBJECTIVES) -> list[bool]:
+    """Minden sorra: nem dominált-e (egyik célban sem rosszabb, és legalább egyben jobb másik sor nincs)."""
+    def dominates(a, b):
+        return (all(a[k] >= b[k] for k in objectives)
+                and any(a[k] > b[k] for k in objectives))
+
+    return [not any(dominates(other, row) for other in rows if other is not row) for row in rows]
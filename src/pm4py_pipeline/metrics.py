@@ -0,0 +1,245 @@
+"""
+Modellminőségi metrikák egyetlen token replay-ből.
+
+A pm4py evaluátorai (replay_fitness, generalization) mind saját token replay-t
+futtatnak ugyanarra a (log, háló) párra. Itt a log egyszer fut végig a hálón, és
+ebből az egy eredményből számoljuk:
+  - fitness (átlagos trace-fitness + log-szintű fitness + illeszkedő trace-ek aránya),
+  - generalization (pm4py get_generalization, az aktivált tranzíciókból),
+  - aktivált tranzíció-lefedettség (látható tranzíciók hány %-a sült el).
+
+A precision (ETConformance) a log prefixeit játssza vissza, más replay-paraméterekkel
+(azonnali megállás nem illeszkedő prefixnél), ezért az egy külön (prefixenkénti) replay marad.
+
+Variáns-tömörítés: a hallgatói trace-ek jóval kevesebb különböző aktivitás-sorozatra
+esnek szét, mint ahány eset van. A kiértékelés ezért variánsonként egyszer játszik vissza,
+és az eredményeket a variáns gyakoriságával súlyozza – a metrikák értéke ugyanaz, az idő
+a variánsok számával arányos.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
+from pm4py.algo.evaluation.precision import algorithm as precision_eval
+from pm4py.algo.evaluation.precision import utils as precision_utils
+from pm4py.algo.evaluation.simplicity import algorithm as simplicity_eval
+from pm4py.objects.petri_net.utils.align_utils import get_visible_transitions_eventually_enabled_by_marking
+from pm4py.util import constants
+
+CASE_KEY = "case:concept:name"
+ACTIVITY_KEY = "concept:name"
+TIMESTAMP_KEY = "time:timestamp"
+
+PRECISION_VARIANTS = {
+    "token": precision_eval.Variants.ETCONFORMANCE_TOKEN,
+    "align": precision_eval.Variants.ALIGN_ETCONFORMANCE,
+}
+
+
+TR_PARAMS = token_replay.Variants.TOKEN_REPLAY.value.Parameters
+
+
+@dataclass
+class VariantLog:
+    """Variánsokra tömörített log: egyedi aktivitás-sorozatok + gyakoriságuk."""
+    variants: list[tuple[str, ...]]
+    weights: np.ndarray
+    source: Any                      # az eredeti log (az alignment alapú precision-höz)
+
+    @property
+    def n_traces(self) -> int:
+        return int(self.weights.sum())
+
+    @property
+    def n_variants(self) -> int:
+        return len(self.variants)
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.n_traces / self.n_variants if self.variants else 1.0
+
+    def info(self) -> dict[str, Any]:
+        return {"traces": self.n_traces, "variants": self.n_variants,
+                "compression_ratio": round(self.compression_ratio, 3)}
+
+    def frame(self) -> pd.DataFrame:
+        """Variánsonként egy eset pm4py-formátumban; az esetazonosító a variáns sorszáma."""
+        lens = np.fromiter((len(v) for v in self.variants), dtype=np.int64, count=len(self.variants))
+        width = len(str(max(len(self.variants) - 1, 0)))
+        cases = np.repeat([f"{i:0{width}d}" for i in range(len(self.variants))], lens)
+        acts = [a for v in self.variants for a in v]
+        ts = pd.Timestamp("1970-01-01", tz="UTC") + pd.to_timedelta(np.arange(len(acts)), unit="s")
+        return pd.DataFrame({ACTIVITY_KEY: acts, TIMESTAMP_KEY: ts, CASE_KEY: cases})
+
+
+def compress_variants(log) -> VariantLog:
+    """Log (pm4py DataFrame vagy EventLog) → variánsok, első előfordulásuk sorrendjében."""
+    if isinstance(log, VariantLog):
+        return log
+    if isinstance(log, pd.DataFrame):
+        # ugyanaz a trace-képzés, mint a pm4py get_traces-ében (eset szerint, soron belüli sorrend)
+        traces = log.groupby(CASE_KEY, sort=True)[ACTIVITY_KEY].agg(tuple)
+    else:
+        traces = pd.Series([tuple(ev[ACTIVITY_KEY] for ev in tr) for tr in log], dtype=object)
+    counts = traces.value_counts(sort=False)
+    return VariantLog(variants=list(counts.index), weights=counts.to_numpy(dtype=np.int64), source=log)
+
+
+def replay_log(log, net, im, fm) -> list[dict]:
+    """Egyetlen token replay, a replay_fitness evaluátor paramétereivel (eredmény esetenként)."""
+    params = {
+        TR_PARAMS.CONSIDER_REMAINING_IN_FITNESS: True,
+        TR_PARAMS.SHOW_PROGRESS_BAR: False,
+    }
+    return token_replay.apply(log, net, im, fm, variant=token_replay.Variants.TOKEN_REPLAY, parameters=params)
+
+
+def activated_coverage(net, replayed: list[dict]) -> float:
+    """Látható tranzíciók aránya, amelyek legalább egy trace-ben elsültek."""
+    activated = {t.label for tr in replayed for t in tr["activated_transitions"] if t.label is not None}
+    visible = {t.label for t in net.transitions if t.label is not None}
+    return float(len(activated & visible) / len(visible)) if visible else 0.5
+
+
+def _weighted_fitness(replayed: list[dict], w: np.ndarray) -> dict[str, float]:
+    """A pm4py replay_fitness.evaluate képletei, variáns-gyakorisággal súlyozva."""
+    def total(key):
+        return float(np.dot(w, [r[key] for r in replayed]))
+
+    no_traces = float(w.sum())
+    fit_traces = float(np.dot(w, [bool(r["trace_is_fit"]) for r in replayed]))
+    total_m, total_c = total("missing_tokens"), total("consumed_tokens")
+    total_r, total_p = total("remaining_tokens"), total("produced_tokens")
+    out = {"average_trace_fitness": 0.0, "log_fitness": 0.0, "perc_fit_traces": 0.0}
+    if no_traces > 0 and total_c > 0 and total_p > 0:
+        out["perc_fit_traces"] = 100.0 * fit_traces / no_traces
+        out["average_trace_fitness"] = total("trace_fitness") / no_traces
+        out["log_fitness"] = 0.5 * (1 - total_m / total_c) + 0.5 * (1 - total_r / total_p)
+    return out
+
+
+def _weighted_generalization(net, replayed: list[dict], w: np.ndarray) -> float:
+    """pm4py get_generalization: az aktivált tranzíciók előfordulásai variáns-súllyal."""
+    occ: Counter = Counter()
+    for r, k in zip(replayed, w):
+        for t in r["activated_transitions"]:
+            occ[t] += int(k)
+    if not net.transitions:
+        return 1.0
+    inv_sq = sum(1.0 / np.sqrt(n) for n in occ.values()) + sum(1 for t in net.transitions if t not in occ)
+    return float(1.0 - inv_sq / len(net.transitions))
+
+
+def replay_metrics(log, net, im, fm) -> dict[str, float]:
+    """Fitness + generalization + aktivált lefedettség egy (variánsonkénti) replay-ből."""
+    vlog = compress_variants(log)
+    replayed = replay_log(vlog.frame(), net, im, fm)
+    return {
+        **_weighted_fitness(replayed, vlog.weights),
+        "generalization": _weighted_generalization(net, replayed, vlog.weights),
+        "activated_coverage": activated_coverage(net, replayed),
+    }
+
+
+def _etc_token_precision(vlog: VariantLog, net, im, fm) -> float:
+    """
+    A pm4py ETCONFORMANCE_TOKEN számítása, a prefixek előfordulását variáns-súllyal
+    számolva; az egyedi prefixek replay-e ugyanazokkal a paraméterekkel fut.
+    """
+    prefixes: dict[str, set] = {}
+    prefix_count: Counter = Counter()
+    for trace, k in zip(vlog.variants, vlog.weights):
+        for i in range(1, len(trace)):
+            prefix = constants.DEFAULT_VARIANT_SEP.join(trace[0:i])
+            prefixes.setdefault(prefix, set()).add(trace[i])
+            prefix_count[prefix] += int(k)
+
+    keys = list(prefixes)
+    params = {
+        TR_PARAMS.SHOW_PROGRESS_BAR: False,
+        TR_PARAMS.CONSIDER_REMAINING_IN_FITNESS: False,
+        TR_PARAMS.TRY_TO_REACH_FINAL_MARKING_THROUGH_HIDDEN: False,
+        TR_PARAMS.STOP_IMMEDIATELY_UNFIT: True,
+        TR_PARAMS.WALK_THROUGH_HIDDEN_TRANS: True,
+        TR_PARAMS.CLEANING_TOKEN_FLOOD: False,
+    }
+    replayed = token_replay.apply(precision_utils.form_fake_log(keys), net, im, fm,
+                                  variant=token_replay.Variants.TOKEN_REPLAY, parameters=params)
+
+    # az üres prefix: a kezdő jelölésben engedélyezett vs. a logban tényleg kezdő aktivitások
+    start_activities = {v[0] for v in vlog.variants if v}
+    enabled_ini = {t.label for t in get_visible_transitions_eventually_enabled_by_marking(net, im)}
+    sum_at = vlog.n_traces * len(enabled_ini)
+    sum_ee = vlog.n_traces * len(enabled_ini - start_activities)
+    for key, r in zip(keys, replayed):
+        if r["trace_is_fit"]:
+            activated = {t.label for t in r["enabled_transitions_in_marking"] if t.label is not None}
+            sum_at += len(activated) * prefix_count[key]
+            sum_ee += len(activated - prefixes[key]) * prefix_count[key]
+    return 1 - sum_ee / sum_at if sum_at > 0 else 1.0
+
+
+def etc_precision(log, net, im, fm, variant: str = "token") -> float:
+    """
+    ETConformance precision. token: variáns-súlyozott prefix token replay;
+    align: a pm4py alignment alapú változata az eredeti logon (az alignmentek
+    prefix-gyakoriságát a pm4py maga számolja).
+    """
+    if variant == "token":
+        return float(_etc_token_precision(compress_variants(log), net, im, fm))
+    source = log.source if isinstance(log, VariantLog) else log
+    return float(precision_eval.apply(source, net, im, fm, variant=PRECISION_VARIANTS[variant]))
+
+
+def simplicity(net) -> float:
+    try:
+        return float(simplicity_eval.apply(net))
+    except Exception:
+        num_arcs = len(net.arcs)
+        denom = len(net.places) + len(net.transitions)
+        return 1.0 / (1.0 + (num_arcs / denom)) if denom else 0.5
+
+
+def f_score(fitness: float, precision: float) -> float:
+    return (2 * fitness * precision / (fitness + precision)) if (fitness > 0 and precision > 0) else 0.0
+
+
+def model_info(net) -> dict[str, Any]:
+    return {
+        "places": len(net.places),
+        "transitions": len(net.transitions),
+        "arcs": len(net.arcs),
+        "visible_transitions": len([t for t in net.transitions if t.label is not None]),
+        "silent_transitions": len([t for t in net.transitions if t.label is None]),
+    }
+
+
+def evaluate_model(log, net, im, fm, precision: str = "token", alignments: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    Teljes kiértékelés egy hálóra: egy (variáns-)replay + ETC precision + szerkezeti metrikák.
+    alignments: ha meg van adva (pl. {"workers": 4, "timeout": 60, "cache": cache}), az
+    eredmény "alignment" kulcsa az alignment fitness + precision (alignments.alignment_metrics).
+    """
+    vlog = compress_variants(log)
+    rep = replay_metrics(vlog, net, im, fm)
+    prec = etc_precision(vlog, net, im, fm, variant=precision)
+    out = {
+        "fitness": rep["average_trace_fitness"],
+        "log_fitness": rep["log_fitness"],
+        "precision": prec,
+        "generalization": rep["generalization"],
+        "activated_coverage": rep["activated_coverage"],
+        "simplicity": simplicity(net),
+        "f_score": f_score(rep["average_trace_fitness"], prec),
+        "model_info": model_info(net),
+        "variants": vlog.info(),
+    }
+    if alignments is not None:
+        from .alignments import alignment_metrics    # az alignments modul a metrics-re épül
+        out["alignment"] = alignment_metrics(vlog, net, im, fm, **alignments)
+    return out
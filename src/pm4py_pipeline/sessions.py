@@ -0,0 +1,125 @@
+"""
+Munkamenet-felbontás (sessionization) inaktivitási rés alapján.
+
+Egy felhasználó teljes félévnyi eseménysora nagyon hosszú trace; a token replay és az
+alignment állapottere ezzel robban. Itt minden felhasználó eseményeit munkamenetekre
+bontjuk: új munkamenet kezdődik, ha két egymást követő esemény között több telt el,
+mint a gap. A számítás a to_event_frame rendezett kimenetén egyetlen vektorizált
+különbségképzés (np.diff) + kumulált összeg; az esetazonosítók csak az egyedi
+munkamenetekre formázódnak.
+
+Kimenetek:
+  - session_event_df: munkamenet-szintű esetek (case:concept:name = "{user_id}_{sorszám}"),
+  - session_stats:    munkamenetenkénti statisztika (kezdet, vég, hossz, eseményszám, kategóriák).
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+SESSION_GAP = "30min"
+
+
+def session_boundaries(case: np.ndarray, ts: np.ndarray, gap: str = SESSION_GAP) -> np.ndarray:
+    """
+    Eset, majd idő szerint rendezett események → bool tömb: itt kezdődik-e új munkamenet.
+    case: egész esetkódok, ts: int64 nanoszekundum.
+    """
+    if not len(ts):
+        return np.zeros(0, dtype=bool)
+    limit = pd.Timedelta(gap).value
+    new_case = np.r_[True, case[1:] != case[:-1]]
+    return new_case | np.r_[True, np.diff(ts) > limit]
+
+
+def _session_codes(df_ev: pd.DataFrame, gap: str):
+    """Közös előkészítés: (szűrt frame, eset kódok, esetnevek, ts ns, munkamenet-kezdet maszk)."""
+    df_ev = df_ev.dropna(subset=["case:concept:name", "time:timestamp"])
+    stamps = df_ev["time:timestamp"]
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+    ts = stamps.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    case, case_names = pd.factorize(df_ev["case:concept:name"], sort=False)
+    start = session_boundaries(case, ts, gap)
+    return df_ev, case, np.asarray(case_names, dtype=object), ts, start
+
+
+def _session_index(case: np.ndarray, start: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Eseményenként: globális munkamenet-kód és a felhasználón belüli sorszám (0-tól)."""
+    sid = np.cumsum(start) - 1
+    first = np.flatnonzero(start)
+    # a felhasználó első munkamenetének globális kódja, eseményenként
+    user_first = np.flatnonzero(np.r_[True, case[1:] != case[:-1]])
+    user_offset = np.repeat(sid[user_first], np.diff(np.r_[user_first, len(case)]))
+    return sid, (sid - user_offset)[first]
+
+
+def session_event_df(df_ev: pd.DataFrame, gap: str = SESSION_GAP) -> pd.DataFrame:
+    """
+    to_event_frame kimenet → munkamenet-szintű esemény-DataFrame.
+    case:concept:name = "{user_id}_{munkamenet sorszám, 4 jegyre töltve}", user_id és
+    session_idx eseményattribútumként megmarad; a sorrend (felhasználó, idő) változatlan.
+    """
+    df_ev, case, case_names, ts, start = _session_codes(df_ev, gap)
+    if df_ev.empty:
+        return df_ev.assign(user_id=df_ev["case:concept:name"], session_idx=pd.Series(dtype="int64"))
+    sid, idx = _session_index(case, start)
+    first = np.flatnonzero(start)
+    labels = np.array([f"{u}_{i:04d}" for u, i in zip(case_names[case[first]], idx)], dtype=object)
+
+    out = df_ev.reset_index(drop=True)
+    out = out.assign(**{"user_id": out["case:concept:name"], "session_idx": idx[sid],
+                        "case:concept:name": labels[sid]})
+    out["case:concept:name"] = out["case:concept:name"].astype(str)
+    return out
+
+
+def session_stats(df_ev: pd.DataFrame, gap: str = SESSION_GAP) -> pd.DataFrame:
+    """
+    Munkamenetenkénti statisztika:
+      user_id, session_idx, kezdet, veg, idotartam_s, esemeny_db, kategoria_db, kategoriak
+    (a kategóriák "A+B" halmazként, ábécérendben).
+    """
+    cols = ["user_id", "session_idx", "kezdet", "veg", "idotartam_s", "esemeny_db", "kategoria_db", "kategoriak"]
+    df_ev, case, case_names, ts, start = _session_codes(df_ev, gap)
+    if df_ev.empty:
+        return pd.DataFrame(columns=cols)
+    sid, idx = _session_index(case, start)
+    first = np.flatnonzero(start)
+    last = np.r_[first[1:], len(ts)] - 1
+    n_sessions = len(first)
+
+    cat, cat_names = pd.factorize(df_ev["concept:name"].astype(str), sort=True)
+    n_cat = max(len(cat_names), 1)
+    pairs = np.unique(sid.astype(np.int64) * n_cat + cat)
+    pair_sid, pair_cat = pairs // n_cat, pairs % n_cat
+    n_cats = np.bincount(pair_sid, minlength=n_sessions)
+    # rendezett (session, kategória) párok → session-enként összefűzött kategórianevek
+    bounds = np.r_[0, np.cumsum(n_cats)]
+    names = np.asarray(cat_names, dtype=object)[pair_cat]
+    cat_sets = np.array(["+".join(names[bounds[i]:bounds[i + 1]]) for i in range(n_sessions)], dtype=object)
+
+    return pd.DataFrame({
+        "user_id": case_names[case[first]],
+        "session_idx": idx,
+        "kezdet": ts[first].astype("datetime64[ns]"),
+        "veg": ts[last].astype("datetime64[ns]"),
+        "idotartam_s": (ts[last] - ts[first]) / 1e9,
+        "esemeny_db": np.bincount(sid, minlength=n_sessions),
+        "kategoria_db": n_cats,
+        "kategoriak": cat_sets,
+    })[cols]
+
+
+def summarize_sessions(stats: pd.DataFrame) -> dict:
+    """Összefoglaló a munkamenet-statisztikából (konzolra / JSON-ba)."""
+    if stats.empty:
+        return {"sessions": 0}
+    return {
+        "sessions": int(len(stats)),
+        "users": int(stats["user_id"].nunique()),
+        "sessions_per_user": round(float(stats.groupby("user_id").size().mean()), 2),
+        "events_per_session_mean": round(float(stats["esemeny_db"].mean()), 2),
+        "events_per_session_max": int(stats["esemeny_db"].max()),
+        "duration_s_median": round(float(stats["idotartam_s"].median()), 1),
+    }
@@ -0,0 +1,149 @@
+"""
+Heti aggregáló motor: egyetlen menetben a heti XES-ek és a heti elemző tábla alapja.
+
+Az ISO év / hét és a hét kezdőnapja (hétfő) egész aritmetikával jön a datetime64
+értékekből (napok az epoch óta; 1970-01-01 csütörtök), isocalendar() és to_period()
+nélkül. Az aggregálás egész kulcsokon fut: (felhasználó kód, hétfő napszáma,
+kategória kód) → esemény darabszám. A "W{hét}-{év}" címkék csak az egyedi
+csoportokra formázódnak.
+
+A bemenet lehet egy DataFrame vagy DataFrame-chunkok sorozata (pl. iter_store),
+így a memóriánál nagyobb log is feldolgozható: chunkonként csak a kis részösszegek
+maradnak meg, ezeket a végén összevonjuk.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.data_loading import as_datetime
+
+REQUIRED = ("user_id", "Uj_oszlop", "Idő_dt")
+
+# 1970-01-01 csütörtök → hétfő-alapú hét napja: (nap + 3) % 7
+_EPOCH_WEEKDAY = 3
+
+
+def iso_week_start(ts: pd.Series) -> np.ndarray:
+    """Időbélyegek → a hét hétfőjének napszáma (int64, napok az epoch óta); NaT → nincs kiszűrve."""
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_localize(None)          # falióra szerinti hét, ahogy az isocalendar() is
+    days = ts.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return days - (days + _EPOCH_WEEKDAY) % 7
+
+
+def iso_year_week(monday: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Hétfő napszámok → (ISO év, ISO hét). Az ISO év a hét csütörtökének éve."""
+    thursday = monday + 3
+    year = thursday.astype("datetime64[D]").astype("datetime64[Y]")
+    jan1 = year.astype("datetime64[D]").astype(np.int64)
+    return year.astype(np.int64) + 1970, (thursday - jan1) // 7 + 1
+
+
+def _partial_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Egy chunk → (user_id, _week_start, Uj_oszlop, esemeny_db) részösszegek."""
+    missing = set(REQUIRED) - set(df.columns)
+    assert not missing, f"Hiányzó oszlop(ok) a heti aggregáláshoz: {missing}"
+
+    ts = as_datetime(df["Idő_dt"])
+    keep = (ts.notna() & df["user_id"].notna()).to_numpy()
+    monday = iso_week_start(ts)[keep]
+    user, user_vals = pd.factorize(df["user_id"][keep], sort=False)
+    cat, cat_vals = pd.factorize(df["Uj_oszlop"][keep], sort=False)
+    n_cat = len(cat_vals) + 1                # utolsó kód: hiányzó kategória
+    cat = np.where(cat < 0, n_cat - 1, cat)
+    if not len(monday):
+        return pd.DataFrame({"user_id": user_vals[:0], "_week_start": monday,
+                             "Uj_oszlop": cat_vals[:0], "esemeny_db": monday})
+
+    # egyetlen int64 kulcs: (felhasználó, hét, kategória)
+    w0 = monday.min()
+    n_weeks = (monday.max() - w0) // 7 + 1
+    key = (user.astype(np.int64) * n_weeks + (monday - w0) // 7) * n_cat + cat
+    uniq, counts = np.unique(key, return_counts=True)
+    cat_code = uniq % n_cat
+    week_code = (uniq // n_cat) % n_weeks
+    user_code = uniq // n_cat // n_weeks
+    return pd.DataFrame({
+        "user_id": user_vals.take(user_code),
+        "_week_start": w0 + week_code * 7,
+        "Uj_oszlop": cat_vals.take(np.where(cat_code == n_cat - 1, -1, cat_code), allow_fill=True),
+        "esemeny_db": counts,
+    })
+
+
+@dataclass
+class WeeklyAggregate:
+    """
+    (user_id, hét, kategória) → esemény darabszám, user_id / hét / kategória szerint rendezve.
+    Ebből jön mindhárom heti kimenet (kategóriás és kategória nélküli XES-DF, elemző tábla).
+    """
+    counts: pd.DataFrame
+
+    def _labelled(self) -> pd.DataFrame:
+        df = self.counts
+        weeks, week_code = np.unique(df["_week_start"].to_numpy(), return_inverse=True)
+        years, nums = iso_year_week(weeks)
+        labels = np.array([f"W{w:02d}-{y}" for y, w in zip(years, nums)], dtype=object)
+        return df.assign(_iso_year=years[week_code], _iso_week=nums[week_code],
+                         _label=labels[week_code])
+
+    def events(self, include_category: bool = True) -> pd.DataFrame:
+        """
+        Heti bontású 'eseménylista' XES-hez és elemzéshez, a hét hétfő 00:00 időpontjára.
+          - include_category=True:  1 esemény / (user_id, hét, kategória), concept:name = "W{week}-{year} | {Uj_oszlop}"
+          - include_category=False: 1 esemény / (user_id, hét),            concept:name = "W{week}-{year}"
+        """
+        df = self._labelled()
+        if include_category:
+            df = df[df["Uj_oszlop"].notna()]
+            name = df["_label"] + " | " + df["Uj_oszlop"].astype(str).to_numpy(dtype=object)
+            cols = ["_iso_year", "_iso_week", "Uj_oszlop"]
+        else:
+            df = df.drop_duplicates(["user_id", "_week_start"])
+            name = df["_label"]
+            cols = ["_iso_year", "_iso_week"]
+
+        ev = pd.DataFrame({"case:concept:name": df["user_id"].astype(str)})
+        for c in cols:
+            ev[c] = df[c]
+        ev["time:timestamp"] = df["_week_start"].to_numpy().astype("datetime64[D]").astype("datetime64[us]")
+        ev["concept:name"] = name.astype(str)
+        ev = ev.sort_values(["case:concept:name", "time:timestamp"], kind="stable").reset_index(drop=True)
+        from pm4py.objects.log.util import dataframe_utils
+        return dataframe_utils.convert_timestamp_columns_in_df(ev)
+
+    def counts_frame(self) -> pd.DataFrame:
+        """Elemző tábla: user_id × iso_year × iso_week × Uj_oszlop → esemeny_db."""
+        df = self._labelled()
+        return (
+            df[df["Uj_oszlop"].notna()]
+              .rename(columns={"_iso_year": "iso_year", "_iso_week": "iso_week"})
+              [["user_id", "iso_year", "iso_week", "Uj_oszlop", "esemeny_db"]]
+              .reset_index(drop=True)
+        )
+
+
+def weekly_aggregate(source: pd.DataFrame | Iterable[pd.DataFrame],
+                     chunk_rows: int | None = None) -> WeeklyAggregate:
+    """
+    Heti aggregátum egy menetben. A source egy DataFrame (chunk_rows-onként szeletelve,
+    ha meg van adva) vagy DataFrame-chunkok iterálható sorozata.
+    """
+    if isinstance(source, pd.DataFrame):
+        step = chunk_rows or max(len(source), 1)
+        chunks = (source.iloc[lo:lo + step] for lo in range(0, max(len(source), 1), step))
+    else:
+        chunks = source
+
+    parts = [_partial_counts(chunk) for chunk in chunks] or [_partial_counts(pd.DataFrame(columns=list(REQUIRED)))]
+    counts = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+    if len(parts) > 1:
+        # chunkhatáron átnyúló csoportok összevonása (a részösszegek már kicsik)
+        counts = (counts.groupby(["user_id", "_week_start", "Uj_oszlop"], observed=True, dropna=False)
+                        ["esemeny_db"].sum().reset_index())
+    counts = counts.sort_values(["user_id", "_week_start", "Uj_oszlop"], kind="stable").reset_index(drop=True)
+    return WeeklyAggregate(counts)
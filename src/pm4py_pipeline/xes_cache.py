@@ -0,0 +1,143 @@
+"""
+Gyors XES beolvasás a bányász szkriptekhez, bináris oldalfájllal (sidecar).
+
+Az első beolvasás iteratív XML parserrel (iterparse) megy végig a fájlon, és csak a
+bányászathoz kellő három attribútumot tartja meg: eset, aktivitás, időbélyeg.
+Ezeket kódolt formában a XES mellé mentjük (<fájl>.xes.npz): esetkódok,
+aktivitáskódok, int64 időbélyegek + a két szótár. A következő futások a sidecarból
+építik vissza a pm4py-formátumú DataFrame-et, XML parse nélkül.
+
+A sidecar érvényessége: a XES mérete + mtime-ja; ha az mtime eltér, de a tartalom
+hash-e ugyanaz (pl. a cache visszamásolta a fájlt), a sidecar továbbra is érvényes.
+"""
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.profiling import profiled
+
+from src.cache import fingerprint_file
+
+CASE_KEY = "case:concept:name"
+ACTIVITY_KEY = "concept:name"
+TIMESTAMP_KEY = "time:timestamp"
+SIDECAR_SUFFIX = ".npz"
+
+# a pm4py.read_xes által a DataFrame-re tett paraméterek (a pm4py algoritmusok ezekből olvassák a kulcsokat)
+_PM4PY_ATTRS = {
+    "pm4py:param:activity_key": ACTIVITY_KEY,
+    "pm4py:param:attribute_key": ACTIVITY_KEY,
+    "pm4py:param:timestamp_key": TIMESTAMP_KEY,
+    "pm4py:param:resource_key": "org:resource",
+    "pm4py:param:transition_key": "lifecycle:transition",
+    "pm4py:param:group_key": "org:group",
+}
+
+
+def sidecar_path(xes_path: Path) -> Path:
+    return xes_path.with_name(xes_path.name + SIDECAR_SUFFIX)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_xes(xes_path: Path) -> dict[str, np.ndarray]:
+    """
+    XES → kódolt tömbök, iterparse-szal (a feldolgozott elemeket azonnal eldobjuk,
+    így a memória a trace méretével arányos, nem a fájléval).
+    """
+    cases: list[str] = []
+    acts: list[str | None] = []
+    stamps: list[str | None] = []
+    trace_start = 0
+
+    for ev, elem in ET.iterparse(str(xes_path), events=("end",)):
+        tag = _local(elem.tag)
+        if tag == "event":
+            act = ts = None
+            for child in elem:
+                key = child.get("key")
+                if key == ACTIVITY_KEY:
+                    act = child.get("value")
+                elif key == TIMESTAMP_KEY:
+                    ts = child.get("value")
+            acts.append(act)
+            stamps.append(ts)
+            elem.clear()
+        elif tag == "trace":
+            # a trace saját attribútumai a közvetlen gyerekek között vannak (az eseményeket már töröltük)
+            name = next((c.get("value") for c in elem if c.get("key") == ACTIVITY_KEY and _local(c.tag) != "event"),
+                        None)
+            cases.extend([name] * (len(acts) - trace_start))
+            trace_start = len(acts)
+            elem.clear()
+
+    case_codes, case_names = pd.factorize(pd.Series(cases, dtype=object))
+    act_codes, act_names = pd.factorize(pd.Series(acts, dtype=object))
+    ts = pd.to_datetime(pd.Series(stamps, dtype=object), format="ISO8601", utc=True)
+    return {
+        "case_codes": case_codes.astype(np.int32),
+        "case_names": np.asarray(case_names, dtype=str),
+        "act_codes": act_codes.astype(np.int32),
+        "act_names": np.asarray(act_names, dtype=str),
+        "ts_us": ts.dt.tz_localize(None).to_numpy(dtype="datetime64[us]").view(np.int64),
+    }
+
+
+def _frame(arrays: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Kódolt tömbök → pm4py.read_xes-szel azonos szerkezetű DataFrame (hiányzó érték kód: -1)."""
+    def decode(codes, names):
+        return pd.Series(pd.Categorical.from_codes(codes, categories=names)).astype("str")
+
+    ts = pd.Series(arrays["ts_us"].view("datetime64[us]")).dt.tz_localize("UTC")
+    df = pd.DataFrame({
+        ACTIVITY_KEY: decode(arrays["act_codes"], arrays["act_names"]),
+        TIMESTAMP_KEY: ts.where(arrays["ts_us"] != np.iinfo(np.int64).min),
+        CASE_KEY: decode(arrays["case_codes"], arrays["case_names"]),
+    })
+    df.attrs.update(_PM4PY_ATTRS)
+    return df
+
+
+@profiled("xes.load_log")
+def load_log(xes_path: Path, use_sidecar: bool = True) -> pd.DataFrame:
+    """
+    XES beolvasása pm4py-formátumú DataFrame-be (eset, aktivitás, időbélyeg oszlopokkal).
+    Érvényes sidecar esetén XML parse nélkül; különben parse + sidecar (újra)írás.
+    """
+    xes_path = Path(xes_path)
+    if not xes_path.exists():
+        raise FileNotFoundError(f"XES not found: {xes_path}")
+    side = sidecar_path(xes_path)
+    st = xes_path.stat()
+
+    if use_sidecar and side.exists():
+        with np.load(side, allow_pickle=False) as z:
+            arrays = {k: z[k] for k in z.files}
+        if int(arrays["size"]) == st.st_size:
+            if int(arrays["mtime_ns"]) == st.st_mtime_ns:
+                return _frame(arrays)
+            if str(arrays["sha256"]) == fingerprint_file(xes_path):
+                arrays["mtime_ns"] = np.int64(st.st_mtime_ns)
+                np.savez(side, **arrays)
+                return _frame(arrays)
+
+    arrays = parse_xes(xes_path)
+    if use_sidecar:
+        arrays.update(size=np.int64(st.st_size), mtime_ns=np.int64(st.st_mtime_ns),
+                      sha256=np.str_(fingerprint_file(xes_path)))
+        np.savez(side, **arrays)
+        print(f"XES sidecar mentve: {side}")
+    return _frame(arrays)
+
+
+def log_stats(log) -> tuple[int, int]:
+    """(esetek száma, események száma) – DataFrame és EventLog bemenetre is."""
+    if isinstance(log, pd.DataFrame):
+        return int(log[CASE_KEY].nunique()), len(log)
+    return len(log), sum(len(trace) for trace in log)
@@ -2,15 +2,17 @@ import pandas as pd
 import numpy as np
 from datetime import time
 
+from src.data_loading import as_datetime
+
 
 def split_users(df: pd.DataFrame, exclude_ids: list[int]) -> tuple[pd.DataFrame, pd.DataFrame]:
     mask = df["user_id"].isin(exclude_ids)
     return df[mask].copy(), df[~mask].copy()
 
 
-def add_time_parts(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out["Idő_dt"] = pd.to_datetime(out["Idő_dt"], errors="coerce")
+def add_time_parts(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    out = df.copy() if copy else df
+    out["Idő_dt"] = as_datetime(out["Idő_dt"])
     iso_cal = out["Idő_dt"].dt.isocalendar()
     out["hónap"] = out["Idő_dt"].dt.month
     out["hét"] = iso_cal.week.astype("Int64")
@@ -19,8 +21,8 @@ def add_time_parts(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def label_orai_otthoni(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+def label_orai_otthoni(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    out = df.copy() if copy else df
     valid_ts = out["Idő_dt"].notna()
 
     # tavaszi szünet kizárás – igény szerint módosítható
@@ -62,6 +64,113 @@ def label_orai_otthoni(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+# a run-length összevonás által hozzáadott attribútumok
+RUN_COLS = ("ismetles_db", "utolso_Idő_dt", "tartozkodas_s")
+
+
+def collapse_runs(df: pd.DataFrame, last_seen: dict | None = None,
+                  cols: tuple[str, ...] = ("Idő_dt", "Uj_oszlop", "user_id"),
+                  return_continued: bool = False) -> pd.DataFrame | tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Loop-mentes változat run-length kódolással: felhasználónként, időrendben egymást
+    közvetlenül követő azonos Uj_oszlop értékek egy sorrá vonódnak össze, egyetlen
+    vektorizált menetben (rendezés + szomszéd-összehasonlítás, groupby nélkül).
+
+    A sor a run első eseménye (cols oszlopok), kiegészítve:
+      - ismetles_db:   a run hossza (összevont események száma),
+      - utolso_Idő_dt: a run utolsó eseményének ideje,
+      - tartozkodas_s: első → utolsó esemény a runban, másodpercben.
+    Hiányzó user_id vagy Uj_oszlop mindig önálló run (ahogy a korábbi shift-maszknál).
+
+    last_seen (user_id → utolsó Uj_oszlop) megadásakor minden felhasználó első runját
+    az előző feldolgozás utolsó kategóriájához hasonlítjuk (inkrementális futás határán):
+    ha egyezik, a run az előző feldolgozás folytatása, ezért új runként kimarad.
+    return_continued=True esetén ezek a folytatás-sorok külön is visszajönnek
+    ((új runok, folytatások)), hogy a tárolt runhoz hozzáadhatók legyenek (extend_runs).
+    """
+    # rendezés csak a kulcsokon (stabil lexsort; hiányzó user_id / idő a végére, mint a sort_values-nál),
+    # a széles frame-ből csak a szükséges oszlopok kerülnek átrendezésre
+    user, _ = pd.factorize(df["user_id"], sort=True)
+    ts = as_datetime(df["Idő_dt"])
+    ts_key = ts.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+    ts_key[ts.isna().to_numpy()] = np.iinfo(np.int64).max
+    user_key = np.where(user < 0, np.iinfo(np.int64).max, user)
+    order = np.lexsort((ts_key, user_key))
+    d = df[list(dict.fromkeys([*cols, "user_id", "Uj_oszlop"]))].take(order)
+    ts = ts.take(order)
+    user = user[order]
+
+    cat, _ = pd.factorize(d["Uj_oszlop"], sort=False)
+    new_user = np.r_[True, user[1:] != user[:-1]] | (user < 0)
+    start = new_user | np.r_[True, cat[1:] != cat[:-1]] | (cat < 0)
+
+    first = np.flatnonzero(start)
+    last = np.r_[first[1:], len(d)][:len(first)] - 1      # üres bemenetnél nincs run
+    out = d.iloc[first][list(cols)].reset_index(drop=True)
+    out["ismetles_db"] = np.diff(np.r_[first, len(d)])
+    out["utolso_Idő_dt"] = ts.to_numpy()[last]
+    out["tartozkodas_s"] = (out["utolso_Idő_dt"] - ts.to_numpy()[first]).dt.total_seconds()
+
+    if last_seen:
+        prev = d["user_id"].iloc[first].map(last_seen).astype(object).to_numpy()
+        cont = new_user[first] & (d["Uj_oszlop"].astype(object).to_numpy()[first] == prev)
+        if return_continued:
+            return out[~cont].reset_index(drop=True), out[cont].reset_index(drop=True)
+        out = out[~cont].reset_index(drop=True)
+    if return_continued:
+        return out, out.iloc[:0]
+    return out
+
+
+def extend_runs(runs: pd.DataFrame, continued: pd.DataFrame) -> pd.DataFrame:
+    """
+    Inkrementális határ: a folytatás-sorok (collapse_runs(..., return_continued=True))
+    hozzáadása a felhasználó tárolt utolsó runjához – a run hossza összeadódik, az utolsó
+    idő a kettő maximuma, a tartózkodási idő ebből újraszámolódik. Új frame-mel tér vissza.
+    """
+    if continued.empty:
+        return runs
+    runs = runs.copy()
+    last_idx = (
+        runs.dropna(subset=["user_id"])
+            .sort_values(["user_id", "Idő_dt"], kind="stable")
+            .groupby("user_id", observed=True).tail(1)
+    )
+    idx = pd.Series(last_idx.index, index=last_idx["user_id"].astype("int64").to_numpy())
+    cont = continued.assign(user_id=continued["user_id"].astype("int64")).set_index("user_id")
+    missing = cont.index.difference(idx.index)
+    if len(missing):
+        raise ValueError(f"Folytatott run tárolt előzmény nélkül (user_id): {list(missing)[:5]}")
+    rows = idx.loc[cont.index].to_numpy()
+    runs.loc[rows, "ismetles_db"] = runs.loc[rows, "ismetles_db"].to_numpy() + cont["ismetles_db"].to_numpy()
+    last = np.maximum(as_datetime(runs.loc[rows, "utolso_Idő_dt"]).to_numpy(),
+                      as_datetime(cont["utolso_Idő_dt"]).to_numpy())
+    runs.loc[rows, "utolso_Idő_dt"] = last
+    runs.loc[rows, "tartozkodas_s"] = (
+        pd.Series(last) - pd.Series(as_datetime(runs.loc[rows, "Idő_dt"]).to_numpy())
+    ).dt.total_seconds().to_numpy()
+    return runs
+
+
+def drop_consecutive_repeats(df: pd.DataFrame, last_seen: dict | None = None,
+                             cols: tuple[str, ...] = ("Idő_dt", "Uj_oszlop", "user_id")) -> pd.DataFrame:
+    """
+    Loop-mentes változat: felhasználónként, időrendben egymást közvetlenül követő
+    azonos Uj_oszlop értékekből csak az elsőt tartjuk meg (collapse_runs, run-attribútumok nélkül).
+    """
+    return collapse_runs(df, last_seen=last_seen, cols=cols)[list(cols)]
+
+
+def last_category_by_user(df: pd.DataFrame) -> dict:
+    """Felhasználónként az időben utolsó esemény Uj_oszlop értéke."""
+    last = (
+        df.dropna(subset=["user_id"])
+          .sort_values(["user_id", "Idő_dt"], kind="stable")
+          .groupby("user_id")["Uj_oszlop"].last()
+    )
+    return {int(u): str(c) for u, c in last.items()}
+
+
 def build_slices(df_remaining: pd.DataFrame) -> dict[str, pd.DataFrame]:
     slices: dict[str, pd.DataFrame] = {}
 
@@ -3,6 +3,8 @@ from __future__ import annotations
 from datetime import time
 import pandas as pd
 
+from src.data_loading import as_datetime
+
 def _compute_orai_mask(df: pd.DataFrame,
                        break_start=pd.Timestamp("2025-04-21 00:00:00"),
                        break_end=pd.Timestamp("2025-04-27 23:59:59")) -> pd.Series:
@@ -11,8 +13,8 @@ def _compute_orai_mask(df: pd.DataFrame,
     Visszaad egy bool maszkot: True = Órai, False = nem órai.
     """
     out = df.copy()
-    valid_ts = pd.to_datetime(out["Idő_dt"], errors="coerce").notna()
-    out["Idő_dt"] = pd.to_datetime(out["Idő_dt"], errors="coerce")
+    out["Idő_dt"] = as_datetime(out["Idő_dt"])
+    valid_ts = out["Idő_dt"].notna()
 
     # tavaszi szünet kizárás
     not_break = ~((out["Idő_dt"] >= break_start) & (out["Idő_dt"] <= break_end))
@@ -34,15 +36,17 @@ def _compute_orai_mask(df: pd.DataFrame,
 
 def reclassify_exam_to_admin_if_otthoni(df: pd.DataFrame,
                                         exam_label: str = "Szamonkeres",
-                                        admin_label: str = "Admin") -> pd.DataFrame:
+                                        admin_label: str = "Admin",
+                                        copy: bool = True) -> pd.DataFrame:
     """
     Azokat a sorokat, ahol Uj_oszlop == exam_label ÉS a fenti logika szerint 'Otthoni' lenne,
     átírja Uj_oszlop = admin_label értékre.
 
     Ha a DataFrame-ben már létezik 'Munka_típus' (Órai/Otthoni), azt használja.
     Ha nincs, a maszkot újraszámolja a fenti órarend-logikával.
+    copy=False esetén helyben módosít.
     """
-    out = df.copy()
+    out = df.copy() if copy else df
 
     if "Munka_típus" in out.columns:
         otthoni_mask = out["Munka_típus"].astype(str) == "Otthoni"
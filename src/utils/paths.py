@@ -7,8 +7,9 @@ class Paths:
         self.raw = self.data / "raw"
         self.processed = self.data / "processed"
         self.xes = self.data / "xes"
+        self.cache = self.data / "cache"
         self.figures = self.base / "figures"
 
     def ensure(self):
-        for d in [self.data, self.raw, self.processed, self.xes, self.figures]:
+        for d in [self.data, self.raw, self.processed, self.xes, self.cache, self.figures]:
             d.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,259 @@
+"""
+Könnyűsúlyú stage-szintű mérés: falióra, CPU idő, csúcs RSS, be- és kimenő sorszám.
+
+Használat:
+    with profile_stage("preprocess.split_users", rows_in=len(df)) as rec:
+        df = split_users(df)
+        rec.rows_out = len(df)
+
+    @profiled("xes.export_xes")           # sorszám: az első DataFrame argumentum / a visszatérési érték
+    def export_xes(df_src, out_path): ...
+
+A mérés mindig fut (néhány rendszerhívás stage-enként); a JSON riport csak akkor íródik ki
+(processz végén, data/profiling/<szkript>_<időbélyeg>.json), ha PROFILE=1. A riportok
+összevethetők: python main_benchmark.py profile-diff régi.json új.json.
+
+Környezeti változók (.env is):
+  PROFILE=1                                  riport írása
+  PROFILE_CAPTURE=cprofile | pyinstrument    stage-enkénti profil is (.prof / .html, a legkülső stage-re)
+  PROFILE_DIR=data/profiling                 a riportok és profilok helye
+
+Megjegyzések:
+  - cpu_s a stage szálának CPU ideje (a moodle-pm run párhuzamos szálai nem keverednek bele),
+    cpu_children_s a stage alatt befejeződött gyermek processzeké (worker poolok);
+  - rss_peak_mb a processz csúcs-RSS-e a stage végén, rss_peak_delta_mb ennek növekedése
+    a stage alatt (a csúcsérték monoton, így csak az új csúcsot emelő stage-nél pozitív);
+  - process poolban futó stage-ek rekordjait a hívó adja vissza a szülőnek (drain / extend).
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from src.utils.paths import Paths
+
+try:                                    # Windows alatt nincs resource modul → RSS nélkül mérünk
+    import resource
+except ImportError:                     # pragma: no cover
+    resource = None
+
+CAPTURES = ("cprofile", "pyinstrument")
+
+_RECORDS: list[dict[str, Any]] = []
+_LOCK = threading.Lock()
+_LOCAL = threading.local()              # szálankénti stage-verem (szülő stage, profil-mélység)
+_OWNER_PID = os.getpid()                # forkolt gyermek ne írja ki a szülő rekordjait
+_STARTED = datetime.now()
+_CAPTURE_SEQ = 0
+_CAPTURE_FAILED: set[str] = set()      # ezekkel a módokkal már nem próbálkozunk (egyszeri figyelmeztetés)
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    parent: str | None = None
+    rows_in: int | None = None
+    rows_out: int | None = None
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    cpu_children_s: float = 0.0
+    rss_peak_mb: float | None = None
+    rss_peak_delta_mb: float | None = None
+    started: str = ""
+    pid: int = field(default_factory=os.getpid)
+    thread: str = field(default_factory=lambda: threading.current_thread().name)
+    profile: str | None = None          # a stage profil-fájlja (PROFILE_CAPTURE esetén)
+    error: str | None = None
+
+
+def enabled() -> bool:
+    return os.getenv("PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def report_dir() -> Path:
+    return Path(os.getenv("PROFILE_DIR") or Paths().data / "profiling")
+
+
+def rows_of(obj: Any) -> int | None:
+    """Sorszám DataFrame / Series / ndarray esetén (shape[0]), egyébként None."""
+    shape = getattr(obj, "shape", None)
+    if isinstance(shape, tuple) and shape:
+        return int(shape[0])
+    return None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: bájt
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _children_cpu() -> float:
+    if resource is None:
+        return 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _stack() -> list[str]:
+    if not hasattr(_LOCAL, "stack"):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+@contextmanager
+def _capture(stage: str, rec: StageRecord) -> Iterator[None]:
+    """Opcionális cProfile / pyinstrument profil a stage-ről (csak a szál legkülső stage-én)."""
+    global _CAPTURE_SEQ
+    mode = os.getenv("PROFILE_CAPTURE", "").strip().lower()
+    if mode not in CAPTURES or mode in _CAPTURE_FAILED or len(_stack()) > 1:
+        yield
+        return
+    with _LOCK:
+        _CAPTURE_SEQ += 1
+        seq = _CAPTURE_SEQ
+    stem = f"{stage.replace('/', '_')}_{os.getpid()}_{seq:03d}"
+    profiler = None
+    try:
+        if mode == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except ImportError as e:            # nincs telepítve: a processzben többet nem próbáljuk
+        _CAPTURE_FAILED.add(mode)
+        print(f"⚠️ {mode} profil kikapcsolva: {e}")
+        profiler = None
+    except Exception as e:              # pl. másik profiler aktív (párhuzamos szál)
+        print(f"⚠️ Profil kihagyva ({stage}, {mode}): {e}")
+        profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            report_dir().mkdir(parents=True, exist_ok=True)
+            if mode == "pyinstrument":
+                profiler.stop()
+                path = report_dir() / f"{stem}.html"
+                path.write_text(profiler.output_html(), encoding="utf-8")
+            else:
+                profiler.disable()
+                path = report_dir() / f"{stem}.prof"
+                profiler.dump_stats(str(path))
+            rec.profile = str(path)
+
+
+@contextmanager
+def profile_stage(stage: str, rows_in: int | None = None) -> Iterator[StageRecord]:
+    """Egy stage mérése; a blokkon belül rec.rows_out (és rec.rows_in) beállítható."""
+    stack = _stack()
+    rec = StageRecord(stage=stage, parent=stack[-1] if stack else None, rows_in=rows_in,
+                      started=datetime.now().isoformat(timespec="milliseconds"))
+    stack.append(stage)
+    rss0, child0 = _peak_rss_mb(), _children_cpu()
+    t0, c0 = time.perf_counter(), time.thread_time()
+    try:
+        with _capture(stage, rec):
+            yield rec
+    except BaseException as e:
+        rec.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        rec.wall_s = round(time.perf_counter() - t0, 4)
+        rec.cpu_s = round(time.thread_time() - c0, 4)
+        rec.cpu_children_s = round(_children_cpu() - child0, 4)
+        rec.rss_peak_mb = _peak_rss_mb()
+        if rss0 is not None and rec.rss_peak_mb is not None:
+            rec.rss_peak_delta_mb = round(rec.rss_peak_mb - rss0, 1)
+        stack.pop()
+        with _LOCK:
+            _RECORDS.append(asdict(rec))
+
+
+def profiled(stage: str | None = None) -> Callable:
+    """
+    Dekorátor: a függvényhívás egy stage. rows_in az első DataFrame-szerű argumentum
+    sorszáma, rows_out a visszatérési értéké (ha DataFrame-szerű).
+    """
+    def deco(func: Callable) -> Callable:
+        name = stage or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = next((n for n in map(rows_of, (*args, *kwargs.values())) if n is not None), None)
+            with profile_stage(name, rows_in=rows_in) as rec:
+                result = func(*args, **kwargs)
+                rec.rows_out = rows_of(result)
+            return result
+        return wrapper
+    return deco
+
+
+def records() -> list[dict[str, Any]]:
+    with _LOCK:
+        return list(_RECORDS)
+
+
+def drain() -> list[dict[str, Any]]:
+    """
+    A processz saját rekordjainak kivétele (worker processz → szülő átadáshoz); a forkkal
+    örökölt szülő-rekordok eldobódnak, hogy a szülő riportjában ne duplázódjanak.
+    """
+    pid = os.getpid()
+    with _LOCK:
+        out = [r for r in _RECORDS if r["pid"] == pid]
+        _RECORDS.clear()
+    return out
+
+
+def extend(recs: list[dict[str, Any]]) -> None:
+    """Máshol (pl. worker processzben) mért rekordok hozzáadása a riporthoz."""
+    with _LOCK:
+        _RECORDS.extend(recs)
+
+
+def write_report(path: Path | None = None) -> Path | None:
+    """JSON riport a processz eddigi stage-eiről; None, ha nincs mit kiírni."""
+    recs = records()
+    if not recs:
+        return None
+    program = Path(sys.argv[0]).stem or "python"
+    if path is None:
+        path = report_dir() / f"{program}_{_STARTED:%Y%m%d_%H%M%S}_{os.getpid()}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "program": program,
+        "argv": sys.argv[1:],
+        "started": _STARTED.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stages": recs,
+    }
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@atexit.register
+def _write_at_exit() -> None:
+    if enabled() and os.getpid() == _OWNER_PID:
+        path = write_report()
+        if path is not None:
+            print(f"⏱  Profil riport: {path}")
@@ -84,14 +84,16 @@ def attach_week_plan_columns(
     df: pd.DataFrame,
     src_col: str = "Eseménykörnyezet",
     label_col: str = "Tantervi_hét",
-    num_col: str = "Tantervi_hét_szám"
+    num_col: str = "Tantervi_hét_szám",
+    copy: bool = True,
 ) -> pd.DataFrame:
     """
     Hozzáad két oszlopot:
       - Tantervi_hét   (pl. '1. hét', 'Nem kapcsolódik héthez', 'Ismeretlen')
       - Tantervi_hét_szám (pl. 1..15 vagy NaN, ha nem kapcsolódik/ismeretlen)
+    copy=False esetén helyben bővíti a kapott DataFrame-et.
     """
-    out = df.copy()
+    out = df.copy() if copy else df
     # szöveges címke
     out[label_col] = out[src_col].map(WEEK_PLAN).fillna("Ismeretlen")
 